@@ -1,7 +1,22 @@
-from typing import Annotated
-from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, Optional
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.database import get_db
+from app.cache import CacheBackend, WriteOnlyCache, get_cache
+from app.database import get_db, get_read_db, get_sessionmaker, get_write_db, wrote_recently
+from app.utils.batching import AnswerBatcher, get_answer_batcher
 
-AsyncSessionDep = Annotated[AsyncSession, Depends(get_db)]
\ No newline at end of file
+
+async def get_request_cache(request: Request, cache: CacheBackend = Depends(get_cache)) -> CacheBackend:
+    """Кэш запроса: клиенты, которые читают свои записи из primary, не читают из кэша"""
+    if wrote_recently(request):
+        return WriteOnlyCache(cache)
+    return cache
+
+
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_db)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_db)]
+WriteSessionDep = Annotated[AsyncSession, Depends(get_write_db)]
+SessionMakerDep = Annotated[async_sessionmaker[AsyncSession], Depends(get_sessionmaker)]
+CacheDep = Annotated[CacheBackend, Depends(get_request_cache)]
+AnswerBatcherDep = Annotated[Optional[AnswerBatcher], Depends(get_answer_batcher)]
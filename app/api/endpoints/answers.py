@@ -1,66 +1,196 @@
-from fastapi import APIRouter, HTTPException, status
-from sqlalchemy import select
+from datetime import datetime
+from fastapi import APIRouter, Body, HTTPException, Query, status
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, Any, List, Optional
 
-from app.api.dependencies import AsyncSessionDep
-from app.models.models import Answer, Question
-from app.schemas.schemas import Answer as AnswerSchema, AnswerCreate
+from app.api.dependencies import AnswerBatcherDep, CacheDep, ReadSessionDep, WriteSessionDep
+from app.cache import QUESTION_LIST_TAG, answer_key, question_key, question_tag
+from app.models.models import Answer, ArchivedAnswer, Question
+from app.queries import (
+    answer_insert_query, answer_page_query, answer_query, answers_added_update, answers_removed_update,
+)
+from app.schemas.schemas import Answer as AnswerSchema, AnswerBulkResult, AnswerCreate, AnswerPage
+from app.schemas.serializers import dump_answer, json_response
+from app.utils.bulk import BULK_MAX_ITEMS, validate_bulk
 from app.utils.logger import logger
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SortOrder, parse_cursor, split_page
+from app.utils.profiling import ProfilingRoute
 
-router = APIRouter(tags=["answers"])
+router = APIRouter(tags=["answers"], route_class=ProfilingRoute)
+
+
+async def _insert_answer(db: AsyncSession, question_id: int, answer: AnswerCreate):
+    """Вставка одного ответа; возвращает строку (id, created_at) или None, если вопроса нет.
+
+    Проверка существования вопроса выполняется в том же запросе
+    (INSERT ... SELECT ... WHERE EXISTS), вторым запросом в той же транзакции
+    обновляются answer_count и last_answer_at вопроса.
+    """
+    try:
+        result = await db.execute(answer_insert_query(question_id, answer.user_id, answer.text))
+        row = result.one_or_none()
+    except IntegrityError:
+        # Вопрос удален конкурентно, и вставку отклонил внешний ключ
+        row = None
+
+    if row is None:
+        await db.rollback()
+        return None
+
+    await db.execute(answers_added_update(question_id, 1, row.created_at))
+    await db.commit()
+    return row
 
 
 @router.post("/questions/{question_id}/answers/", response_model=AnswerSchema, status_code=status.HTTP_201_CREATED)
-async def create_answer(question_id: int, answer: AnswerCreate, db: AsyncSessionDep):
-    """Добавить ответ к вопросу"""
-    result = await db.execute(
-        select(Question).where(Question.id == question_id)
-    )
-    question = result.scalar_one_or_none()
+async def create_answer(
+    question_id: int, answer: AnswerCreate, db: WriteSessionDep, cache: CacheDep, batcher: AnswerBatcherDep
+):
+    """Добавить ответ к вопросу.
+
+    При включенной пакетной записи ответ пишется вместе с ответами конкурентных
+    запросов одной транзакцией (app.utils.batching).
+    """
+    if batcher is not None:
+        row = await batcher.submit(question_id, answer)
+    else:
+        row = await _insert_answer(db, question_id, answer)
 
-    if not question:
+    if row is None:
         logger.warning(f"Попытка создать ответ для несуществующего вопроса id={question_id}")
         raise HTTPException(status_code=404, detail="Вопрос не найден")
 
-    db_answer = Answer(
+    await cache.delete(question_key(question_id))
+    await cache.invalidate_tags(QUESTION_LIST_TAG)
+    logger.info(f"Создан ответ с id={row.id} для вопроса id={question_id}")
+    return AnswerSchema(
+        id=row.id,
         question_id=question_id,
         user_id=answer.user_id,
-        text=answer.text
+        text=answer.text,
+        created_at=row.created_at,
     )
-    db.add(db_answer)
+
+
+@router.post(
+    "/questions/{question_id}/answers/bulk",
+    response_model=AnswerBulkResult,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_answers_bulk(
+    question_id: int,
+    items: Annotated[List[Any], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: WriteSessionDep,
+    cache: CacheDep,
+):
+    """Добавить пакет ответов к вопросу одним многострочным INSERT ... RETURNING"""
+    answers, errors = validate_bulk(AnswerCreate, items)
+
+    if not await db.scalar(select(exists().where(Question.id == question_id))):
+        logger.warning(f"Попытка создать ответы для несуществующего вопроса id={question_id}")
+        raise HTTPException(status_code=404, detail="Вопрос не найден")
+
+    try:
+        result = await db.execute(
+            insert(Answer).returning(Answer.id, Answer.created_at, sort_by_parameter_order=True),
+            [
+                {"question_id": question_id, "user_id": answer.user_id, "text": answer.text}
+                for answer in answers
+            ],
+        )
+        rows = result.all()
+    except IntegrityError:
+        # Вопрос удален конкурентно после проверки, и вставку отклонил внешний ключ
+        await db.rollback()
+        logger.warning(f"Вопрос id={question_id} удален во время пакетного создания ответов")
+        raise HTTPException(status_code=404, detail="Вопрос не найден")
+    await db.execute(answers_added_update(question_id, len(rows), max(row.created_at for row in rows)))
     await db.commit()
-    await db.refresh(db_answer)
-    logger.info(f"Создан ответ с id={db_answer.id} для вопроса id={question_id}")
-    return db_answer
+    await cache.delete(question_key(question_id))
+    await cache.invalidate_tags(QUESTION_LIST_TAG)
+
+    created = [
+        AnswerSchema(
+            id=row.id,
+            question_id=question_id,
+            user_id=answer.user_id,
+            text=answer.text,
+            created_at=row.created_at,
+        )
+        for answer, row in zip(answers, rows)
+    ]
+    logger.info(f"Создано {len(created)} ответов пакетом для вопроса id={question_id}, отклонено {len(errors)}")
+    return AnswerBulkResult(created=created, errors=errors)
+
+
+@router.get("/questions/{question_id}/answers/", response_model=AnswerPage)
+async def get_question_answers(
+    question_id: int,
+    db: ReadSessionDep,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    order: SortOrder = SortOrder.asc,
+):
+    """Получить страницу ответов на вопрос, упорядоченных по (created_at, id)"""
+    after = parse_cursor(cursor, datetime, int)
+    result = await db.execute(answer_page_query(question_id, limit, after, order))
+    answers, next_cursor = split_page(result.all(), limit)
+
+    # Существование вопроса проверяем отдельным запросом только для пустой страницы
+    if not answers and not await db.scalar(select(exists().where(Question.id == question_id))):
+        logger.warning(f"Вопрос с id={question_id} не найден")
+        raise HTTPException(status_code=404, detail="Вопрос не найден")
+
+    return AnswerPage(items=answers, next_cursor=next_cursor)
 
 
 @router.get("/answers/{answer_id}", response_model=AnswerSchema)
-async def get_answer(answer_id: int, db: AsyncSessionDep):
+async def get_answer(answer_id: int, db: ReadSessionDep, cache: CacheDep):
     """Получить конкретный ответ"""
-    result = await db.execute(
-        select(Answer).where(Answer.id == answer_id)
-    )
-    answer = result.scalar_one_or_none()
+    key = answer_key(answer_id)
+    body = await cache.get(key)
+    if body is not None:
+        return json_response(body)
+
+    # Метка берется до чтения: тег вопроса еще неизвестен, но его сброс после метки тоже учитывается
+    fence = await cache.fence()
+    result = await db.execute(answer_query(answer_id))
+    answer = result.one_or_none()
 
     if not answer:
         logger.warning(f"Ответ с id={answer_id} не найден")
         raise HTTPException(status_code=404, detail="Ответ не найден")
 
-    return answer
+    body = dump_answer(answer)
+    # Тег вопроса сбрасывает запись при каскадном удалении ответа вместе с вопросом
+    await cache.set(key, body, tags=[question_tag(answer.question_id)], fence=fence)
+    return json_response(body)
 
 
 @router.delete("/answers/{answer_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_answer(answer_id: int, db: AsyncSessionDep):
-    """Удалить ответ"""
-    result = await db.execute(
-        select(Answer).where(Answer.id == answer_id)
-    )
-    answer = result.scalar_one_or_none()
+async def delete_answer(answer_id: int, db: WriteSessionDep, cache: CacheDep):
+    """Удалить ответ; если его нет в оперативной таблице, он удаляется из архива"""
+    question_id = None
+    for model in (Answer, ArchivedAnswer):
+        result = await db.execute(
+            delete(model)
+            .where(model.id == answer_id)
+            .returning(model.question_id)
+            .execution_options(synchronize_session=False)
+        )
+        question_id = result.scalar_one_or_none()
+        if question_id is not None:
+            break
 
-    if not answer:
+    if question_id is None:
         logger.warning(f"Ответ с id={answer_id} не найден")
         raise HTTPException(status_code=404, detail="Ответ не найден")
 
-    await db.delete(answer)
+    await db.execute(answers_removed_update(question_id))
     await db.commit()
+    await cache.delete(answer_key(answer_id), question_key(question_id))
+    await cache.invalidate_tags(QUESTION_LIST_TAG)
     logger.info(f"Удален ответ с id={answer_id}")
-    return None
\ No newline at end of file
+    return None
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, status, HTTPException
+from fastapi import APIRouter, Request, Response, status, HTTPException
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.api.dependencies import AsyncSessionDep
+from app.api.dependencies import AsyncSessionDep, CacheDep
+from app.database import engine, pool_stats, replica_engines, replica_router
 from app.utils.logger import logger
+from app.utils.metrics import CONTENT_TYPE_LATEST, render_metrics
 
 router = APIRouter(tags=["health"])
 
@@ -15,8 +17,13 @@ async def liveness():
 
 
 @router.get("/ready", status_code=status.HTTP_200_OK)
-async def readiness(db: AsyncSessionDep):
-    """Проверка готовности сервиса к работе"""
+async def readiness(request: Request, db: AsyncSessionDep):
+    """Проверка готовности сервиса к работе: прогрев пулов завершен и БД доступна"""
+    if not request.app.state.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервис прогревается"
+        )
     try:
         await db.execute(text("SELECT 1"))
         return {"status": "ready"}
@@ -56,4 +63,30 @@ async def health(db: AsyncSessionDep):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Внутренняя ошибка сервера"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/health/cache", status_code=status.HTTP_200_OK)
+async def cache_stats(cache: CacheDep):
+    """Счетчики попаданий, промахов и вытеснений кэша"""
+    return await cache.get_stats()
+
+
+@router.get("/health/pool", status_code=status.HTTP_200_OK)
+async def connection_pool_stats():
+    """Состояние пулов соединений primary и реплик: выданные соединения, overflow, время ожидания"""
+    replicas = [
+        {
+            "url": replica.url.render_as_string(hide_password=True),
+            "healthy": replica_router.is_healthy(index),
+            **pool_stats(replica.pool),
+        }
+        for index, replica in enumerate(replica_engines)
+    ]
+    return {**pool_stats(engine.pool), "replicas": replicas}
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики в текстовом формате Prometheus"""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
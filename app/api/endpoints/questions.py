@@ -1,66 +1,257 @@
-from fastapi import APIRouter, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-from typing import List
+from collections import defaultdict
+from datetime import datetime
+from fastapi import APIRouter, Body, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from typing import Annotated, Any, AsyncIterator, List, Optional
 
-from app.api.dependencies import AsyncSessionDep
+from app.api.dependencies import CacheDep, ReadSessionDep, SessionMakerDep, WriteSessionDep
+from app.cache import QUESTION_LIST_TAG, question_key, question_list_key, question_tag
 from app.models.models import Question
-from app.schemas.schemas import Question as QuestionSchema, QuestionCreate, QuestionWithAnswers
-from app.utils.logger import logger
+from app.queries import (
+    ALL_ANSWERS, answer_page_query, question_page_key, question_page_query, question_query, question_search_query,
+)
+from app.schemas.schemas import (
+    Question as QuestionSchema, QuestionBulkResult, QuestionCreate, QuestionExport, QuestionPage,
+    QuestionSearchPage, QuestionSort, QuestionWithAnswers,
+)
+from app.schemas.serializers import dump_question_page, dump_question_with_answers, json_response
+from app.utils.bulk import BULK_MAX_ITEMS, validate_bulk
+from app.utils.conditional import http_date, is_not_modified, make_etag, not_modified_response, validator_headers
+from app.utils.logger import logger, sampled_logger
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SortOrder, parse_cursor, split_page
+from app.utils.profiling import ProfilingRoute
 
-router = APIRouter(prefix="/questions", tags=["questions"])
+router = APIRouter(prefix="/questions", tags=["questions"], route_class=ProfilingRoute)
 
+EXPORT_BATCH_SIZE = 1000
 
-@router.get("/", response_model=List[QuestionSchema])
-async def get_questions(db: AsyncSessionDep):
-    """Получить список всех вопросов"""
-    result = await db.execute(select(Question))
-    questions = result.scalars().all()
-    logger.info(f"Получено {len(questions)} вопросов")
-    return questions
+
+def _modified_at(row) -> datetime:
+    return max(filter(None, (row.created_at, row.last_answer_at)))
+
+
+@router.get("/", response_model=QuestionPage)
+async def get_questions(
+    request: Request,
+    db: ReadSessionDep,
+    cache: CacheDep,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    order: SortOrder = SortOrder.asc,
+    sort: QuestionSort = QuestionSort.created,
+):
+    """Получить страницу вопросов.
+
+    sort=created - по (created_at, id), active - по времени последнего ответа (только вопросы
+    с ответами), unanswered - вопросы без ответов по (created_at, id).
+    Поддерживает условный запрос: при совпадении If-None-Match возвращается 304.
+    """
+    after = parse_cursor(cursor, datetime, int)
+    key = question_list_key(limit, cursor, order.value, sort.value)
+    cached = await cache.get(key)
+
+    if cached is None:
+        fence = await cache.fence()
+        result = await db.execute(question_page_query(limit, after, order, sort))
+        page_key = question_page_key(sort)
+        rows, next_cursor = split_page(
+            result.all(), limit, key=lambda row: tuple(getattr(row, column.key) for column in page_key)
+        )
+        sampled_logger.info(f"Получено {len(rows)} вопросов")
+
+        # Текст вопроса не изменяется, поэтому страницу однозначно задают ключи ее строк и агрегаты ответов
+        etag = make_etag(
+            "questions", sort.value, order.value, limit, cursor, next_cursor,
+            [(row.id, row.created_at, row.answer_count, row.last_answer_at) for row in rows],
+        )
+        last_modified = http_date(max((_modified_at(row) for row in rows), default=None))
+        if is_not_modified(request, etag):
+            return not_modified_response(etag, last_modified)
+
+        cached = {"etag": etag, "last_modified": last_modified, "body": dump_question_page(rows, next_cursor)}
+        await cache.set(key, cached, tags=[QUESTION_LIST_TAG], fence=fence)
+    elif is_not_modified(request, cached["etag"]):
+        return not_modified_response(cached["etag"], cached["last_modified"])
+
+    return json_response(cached["body"], validator_headers(cached["etag"], cached["last_modified"]))
 
 
 @router.post("/", response_model=QuestionSchema, status_code=status.HTTP_201_CREATED)
-async def create_question(question: QuestionCreate, db: AsyncSessionDep):
-    """Создать новый вопрос"""
-    db_question = Question(text=question.text)
-    db.add(db_question)
+async def create_question(question: QuestionCreate, db: WriteSessionDep, cache: CacheDep):
+    """Создать новый вопрос одним запросом INSERT ... RETURNING"""
+    result = await db.execute(
+        insert(Question)
+        .values(text=question.text)
+        .returning(Question.id, Question.created_at)
+    )
+    row = result.one()
     await db.commit()
-    await db.refresh(db_question)
-    logger.info(f"Создан вопрос с id={db_question.id}")
-    return db_question
+    await cache.invalidate_tags(QUESTION_LIST_TAG)
+    logger.info(f"Создан вопрос с id={row.id}")
+    return QuestionSchema(id=row.id, text=question.text, created_at=row.created_at)
 
 
-@router.get("/{question_id}", response_model=QuestionWithAnswers)
-async def get_question(question_id: int, db: AsyncSessionDep):
-    """Получить вопрос и все ответы на него"""
+@router.post("/bulk", response_model=QuestionBulkResult, status_code=status.HTTP_201_CREATED)
+async def create_questions_bulk(
+    items: Annotated[List[Any], Body(min_length=1, max_length=BULK_MAX_ITEMS)],
+    db: WriteSessionDep,
+    cache: CacheDep,
+):
+    """Создать пакет вопросов одним многострочным INSERT ... RETURNING"""
+    questions, errors = validate_bulk(QuestionCreate, items)
+
     result = await db.execute(
-        select(Question)
-        .where(Question.id == question_id)
-        .options(selectinload(Question.answers))
+        insert(Question).returning(Question.id, Question.created_at, sort_by_parameter_order=True),
+        [{"text": question.text} for question in questions],
     )
-    question = result.scalar_one_or_none()
+    rows = result.all()
+    await db.commit()
+    await cache.invalidate_tags(QUESTION_LIST_TAG)
 
-    if not question:
-        logger.warning(f"Вопрос с id={question_id} не найден")
-        raise HTTPException(status_code=404, detail="Вопрос не найден")
+    created = [
+        QuestionSchema(id=row.id, text=question.text, created_at=row.created_at)
+        for question, row in zip(questions, rows)
+    ]
+    logger.info(f"Создано {len(created)} вопросов пакетом, отклонено {len(errors)}")
+    return QuestionBulkResult(created=created, errors=errors)
 
-    return question
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_questions(session_factory: SessionMakerDep, include_answers: bool = False):
+    """Выгрузить все вопросы (опционально с ответами) потоком в формате NDJSON"""
+    logger.info(f"Начата выгрузка вопросов, include_answers={include_answers}")
+    return StreamingResponse(
+        _export_ndjson(session_factory, include_answers),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _export_ndjson(
+    session_factory: async_sessionmaker[AsyncSession], include_answers: bool
+) -> AsyncIterator[str]:
+    # Сессия зависимости закрывается до отправки тела ответа,
+    # поэтому генератор открывает собственную на время выгрузки
+    async with session_factory() as session:
+        result = await session.stream_scalars(
+            select(Question)
+            .order_by(Question.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for questions in result.partitions():
+            answers = defaultdict(list)
+            if include_answers:
+                # Один запрос на пачку вопросов вместо запроса на каждый вопрос
+                batch_answers = await session.scalars(
+                    select(ALL_ANSWERS)
+                    .where(ALL_ANSWERS.question_id.in_([question.id for question in questions]))
+                    .order_by(ALL_ANSWERS.question_id, ALL_ANSWERS.id)
+                )
+                for answer in batch_answers:
+                    answers[answer.question_id].append(answer)
+
+            lines = []
+            for question in questions:
+                if include_answers:
+                    item = QuestionExport(
+                        id=question.id,
+                        text=question.text,
+                        created_at=question.created_at,
+                        answer_count=question.answer_count,
+                        last_answer_at=question.last_answer_at,
+                        answers=answers[question.id],
+                    )
+                else:
+                    item = QuestionSchema.model_validate(question)
+                lines.append(item.model_dump_json())
+            # identity map хранит объекты по слабым ссылкам, поэтому отправленная
+            # пачка освобождается и память не растет вместе с таблицей
+            yield "\n".join(lines) + "\n"
+
+
+@router.get("/search", response_model=QuestionSearchPage)
+async def search_questions(
+    db: ReadSessionDep,
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    include_answers: bool = False,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+):
+    """Полнотекстовый поиск вопросов по убыванию релевантности.
+
+    С include_answers вопрос находится и по тексту своих ответов. Курсор следующей
+    страницы действителен только для того же q и include_answers.
+    """
+    after = parse_cursor(cursor, float, int)
+    query = question_search_query(db.get_bind().dialect.name, q, include_answers, limit, after)
+    rows = [] if query is None else (await db.execute(query)).all()
+    items, next_cursor = split_page(rows, limit, key=lambda row: (row.rank, row.id))
+    return QuestionSearchPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/{question_id}", response_model=QuestionWithAnswers)
+async def get_question(
+    question_id: int,
+    request: Request,
+    db: ReadSessionDep,
+    cache: CacheDep,
+):
+    """Получить вопрос, количество ответов и первую страницу ответов.
+
+    Поддерживает условный запрос: версию вопроса задают денормализованные answer_count
+    и last_answer_at, и при совпадении If-None-Match ответы не загружаются вовсе.
+    """
+    key = question_key(question_id)
+    cached = await cache.get(key)
+
+    if cached is None:
+        fence = await cache.fence()
+        result = await db.execute(question_query(question_id))
+        question = result.one_or_none()
+
+        if not question:
+            logger.warning(f"Вопрос с id={question_id} не найден")
+            raise HTTPException(status_code=404, detail="Вопрос не найден")
+
+        etag = make_etag(
+            "question", question.id, question.created_at, question.answer_count, question.last_answer_at
+        )
+        last_modified = http_date(_modified_at(question))
+        if is_not_modified(request, etag):
+            return not_modified_response(etag, last_modified)
+
+        result = await db.execute(answer_page_query(question_id, DEFAULT_PAGE_SIZE, None, SortOrder.asc))
+        answers, next_cursor = split_page(result.all(), DEFAULT_PAGE_SIZE)
+        body = dump_question_with_answers(question, answers, next_cursor)
+        cached = {"etag": etag, "last_modified": last_modified, "body": body}
+        await cache.set(key, cached, tags=[question_tag(question_id)], fence=fence)
+    elif is_not_modified(request, cached["etag"]):
+        return not_modified_response(cached["etag"], cached["last_modified"])
+
+    return json_response(cached["body"], validator_headers(cached["etag"], cached["last_modified"]))
 
 
 @router.delete("/{question_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_question(question_id: int, db: AsyncSessionDep):
-    """Удалить вопрос вместе с ответами"""
+async def delete_question(question_id: int, db: WriteSessionDep, cache: CacheDep):
+    """Удалить вопрос вместе с ответами.
+
+    Ответы удаляет каскад ON DELETE CASCADE в БД, ORM их не загружает.
+    """
     result = await db.execute(
-        select(Question).where(Question.id == question_id)
+        delete(Question)
+        .where(Question.id == question_id)
+        .returning(Question.id)
+        .execution_options(synchronize_session=False)
     )
-    question = result.scalar_one_or_none()
+    deleted_id = result.scalar_one_or_none()
 
-    if not question:
+    if deleted_id is None:
         logger.warning(f"Вопрос с id={question_id} не найден")
         raise HTTPException(status_code=404, detail="Вопрос не найден")
 
-    await db.delete(question)
     await db.commit()
+    # Тег вопроса покрывает и сам вопрос, и закэшированные ответы на него
+    await cache.invalidate_tags(question_tag(question_id), QUESTION_LIST_TAG)
     logger.info(f"Удален вопрос с id={question_id}")
-    return None
\ No newline at end of file
+    return None
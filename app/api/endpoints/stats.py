@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Query
+from sqlalchemy import select
+from typing import Annotated
+
+from app.api.dependencies import ReadSessionDep
+from app.config import settings
+from app.models.models import AnswerDailyStats, Question, StatsWatermark, TopQuestion
+from app.schemas.schemas import DailyStats, Stats, TopQuestionStats
+from app.utils.profiling import ProfilingRoute
+from app.utils.rollups import STATS_ID, as_utc
+
+router = APIRouter(tags=["stats"], route_class=ProfilingRoute)
+
+
+@router.get("/stats", response_model=Stats)
+async def get_stats(
+    db: ReadSessionDep,
+    days: Annotated[int, Query(ge=1, le=366)] = 30,
+    top: Annotated[int, Query(ge=1, le=settings.STATS_TOP_QUESTIONS)] = 10,
+):
+    """Статистика из предрассчитанных таблиц: ответы и активные пользователи за последние days дней
+    и top самых обсуждаемых вопросов. Дни без ответов возвращаются с нулями.
+    """
+    state = (await db.execute(
+        select(StatsWatermark.watermark, StatsWatermark.refreshed_at).where(StatsWatermark.id == STATS_ID)
+    )).one_or_none()
+    fresh_until = as_utc(state.watermark) if state else None
+    refreshed_at = as_utc(state.refreshed_at) if state else None
+    if fresh_until is None:
+        return Stats(days=[], top_questions=[])
+
+    # Последний день ряда - день водяного знака: более поздние ответы еще не учтены
+    last_day = fresh_until.date()
+    first_day = last_day - timedelta(days=days - 1)
+    result = await db.execute(
+        select(AnswerDailyStats.day, AnswerDailyStats.answers, AnswerDailyStats.active_users)
+        .where(AnswerDailyStats.day.between(first_day, last_day))
+    )
+    rows = {row.day: row for row in result}
+    daily = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        row = rows.get(day)
+        daily.append(DailyStats(
+            day=day, answers=row.answers if row else 0, active_users=row.active_users if row else 0
+        ))
+
+    result = await db.execute(
+        select(Question.id, Question.text, TopQuestion.answer_count)
+        .join(Question, Question.id == TopQuestion.question_id)
+        .order_by(TopQuestion.answer_count.desc(), Question.id)
+        .limit(top)
+    )
+    return Stats(
+        days=daily,
+        top_questions=[TopQuestionStats(id=row.id, text=row.text, answer_count=row.answer_count) for row in result],
+        fresh_until=fresh_until,
+        refreshed_at=refreshed_at,
+        lag_seconds=(datetime.now(timezone.utc) - fresh_until).total_seconds(),
+    )
@@ -0,0 +1,39 @@
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Path, Query
+from typing import Annotated, Optional
+
+from app.api.dependencies import ReadSessionDep
+from app.queries import user_answer_page_query
+from app.schemas.schemas import AnswerPage
+from app.utils.logger import logger
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SortOrder, parse_cursor, split_page
+from app.utils.profiling import ProfilingRoute
+from app.utils.rollups import as_utc
+
+router = APIRouter(prefix="/users", tags=["users"], route_class=ProfilingRoute)
+
+
+@router.get("/{user_id}/answers", response_model=AnswerPage)
+async def get_user_answers(
+    user_id: Annotated[str, Path(min_length=1, max_length=36)],
+    db: ReadSessionDep,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    order: SortOrder = SortOrder.desc,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Получить историю ответов пользователя за период [since, until), по умолчанию от новых к старым.
+
+    Пользователи не хранятся отдельно, поэтому для неизвестного user_id возвращается пустая страница.
+    """
+    # Границы без часового пояса считаются UTC: иначе их нельзя сравнить с границами с поясом
+    since, until = as_utc(since), as_utc(until)
+    if since is not None and until is not None and since >= until:
+        logger.warning(f"Пустой период ответов пользователя: since={since}, until={until}")
+        raise HTTPException(status_code=422, detail="since должен быть раньше until")
+
+    after = parse_cursor(cursor, datetime, int)
+    result = await db.execute(user_answer_page_query(user_id, limit, after, order, since, until))
+    answers, next_cursor = split_page(result.all(), limit)
+    return AnswerPage(items=answers, next_cursor=next_cursor)
@@ -0,0 +1,48 @@
+from typing import Optional
+
+from app.cache.base import CacheBackend, CacheStats, NullCache, WriteOnlyCache
+from app.cache.memory import MemoryCache
+from app.config import settings
+
+QUESTION_LIST_TAG = "questions"
+
+
+def question_key(question_id: int) -> str:
+    return f"question:{question_id}"
+
+
+def answer_key(answer_id: int) -> str:
+    return f"answer:{answer_id}"
+
+
+def question_list_key(limit: int, cursor: Optional[str], order: str, sort: str = "created") -> str:
+    return f"questions:{sort}:{order}:{limit}:{cursor or ''}"
+
+
+def question_tag(question_id: int) -> str:
+    """Тег всех записей, которые устаревают при удалении вопроса"""
+    return f"question:{question_id}"
+
+
+def create_cache() -> CacheBackend:
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    if settings.CACHE_BACKEND == "redis":
+        from app.cache.redis_backend import RedisCache
+        return RedisCache.from_url(settings.CACHE_REDIS_URL, settings.CACHE_TTL_SECONDS)
+    return NullCache()
+
+
+# Общий для процесса кэш создается при импорте, а не при первом запросе: ленивое
+# создание из разных запросов могло построить два экземпляра
+cache_backend: CacheBackend = create_cache()
+
+
+async def get_cache() -> CacheBackend:
+    return cache_backend
+
+
+__all__ = [
+    "CacheBackend", "CacheStats", "MemoryCache", "NullCache", "QUESTION_LIST_TAG", "WriteOnlyCache",
+    "answer_key", "cache_backend", "create_cache", "get_cache", "question_key", "question_list_key", "question_tag",
+]
@@ -0,0 +1,126 @@
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Optional
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class CacheBackend(ABC):
+    """Хранилище закэшированных ответов API.
+
+    Значения - JSON-совместимые структуры. Теги позволяют сбросить группу записей
+    (например, все записи вопроса вместе с его ответами) одной операцией.
+
+    Чтение мимо кэша берет метку fence() до запроса к БД и передает ее в set(). Если ключ
+    или тег записи были сброшены после метки, запись отбрасывается: иначе запрос, начатый
+    до изменения, вернул бы в кэш устаревшие данные на весь TTL.
+    """
+
+    def __init__(self, default_ttl: float):
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(
+        self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = (), fence: Any = None
+    ) -> None:
+        ...
+
+    async def fence(self) -> Any:
+        """Метка момента перед чтением из БД; None - без проверки"""
+        return None
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate_tags(self, *tags: str) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    async def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, **self.stats.as_dict()}
+
+    async def close(self) -> None:
+        pass
+
+    name = "base"
+
+
+class NullCache(CacheBackend):
+    """Кэш отключен: каждое чтение - промах"""
+
+    name = "none"
+
+    def __init__(self):
+        super().__init__(default_ttl=0)
+
+    async def get(self, key: str) -> Optional[Any]:
+        self.stats.misses += 1
+        return None
+
+    async def set(
+        self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = (), fence: Any = None
+    ) -> None:
+        pass
+
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        pass
+
+    async def clear(self) -> None:
+        pass
+
+
+class WriteOnlyCache(CacheBackend):
+    """Кэш без чтений для клиента, который только что записывал данные.
+
+    После инвалидации запись мог заново заполнить запрос другого клиента к отстающей реплике.
+    Такой клиент читает из primary мимо кэша, а прочитанное записывает в общий кэш.
+    """
+
+    name = "write-only"
+
+    def __init__(self, cache: CacheBackend):
+        super().__init__(cache.default_ttl)
+        self.cache = cache
+        self.stats = cache.stats
+
+    async def get(self, key: str) -> Optional[Any]:
+        self.stats.misses += 1
+        return None
+
+    async def set(
+        self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = (), fence: Any = None
+    ) -> None:
+        await self.cache.set(key, value, ttl, tags, fence)
+
+    async def fence(self) -> Any:
+        return await self.cache.fence()
+
+    async def delete(self, *keys: str) -> None:
+        await self.cache.delete(*keys)
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        await self.cache.invalidate_tags(*tags)
+
+    async def clear(self) -> None:
+        await self.cache.clear()
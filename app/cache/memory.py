@@ -0,0 +1,115 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from app.cache.base import CacheBackend
+
+
+class MemoryCache(CacheBackend):
+    """LRU-кэш в памяти процесса с TTL и ограничением числа записей.
+
+    Метка fence() - номер последней инвалидации; для сброшенных ключей и тегов хранится
+    номер их сброса. Старые номера удаляются, и запись с меткой старше удаленных отбрасывается.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, default_ttl: float, clock: Callable[[], float] = time.monotonic):
+        super().__init__(default_ttl)
+        self.max_entries = max_entries
+        self._clock = clock
+        # key -> (момент истечения, значение, теги)
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        # Номер последней инвалидации; ключ или тег -> (номер сброса, момент сброса)
+        self._sequence = 0
+        self._invalidated: Dict[str, Tuple[int, float]] = {}
+        # Записи с меткой меньше горизонта отбрасываются: сведения о сбросах до него удалены
+        self._horizon = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        expires_at, value, _ = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    async def set(
+        self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = (), fence: Any = None
+    ) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        tags = tuple(tags)
+        if fence is not None and self._invalidated_since(fence, (key, *tags)):
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (self._clock() + ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    async def fence(self) -> Any:
+        return self._sequence
+
+    async def delete(self, *keys: str) -> None:
+        self._mark(keys)
+        for key in keys:
+            self._remove(key)
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        self._mark(tags)
+        for tag in tags:
+            for key in self._tags.pop(tag, ()):
+                self._remove(key)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+        self._sequence += 1
+        self._invalidated.clear()
+        self._horizon = self._sequence
+
+    def _mark(self, names: Iterable[str]) -> None:
+        self._sequence += 1
+        now = self._clock()
+        for name in names:
+            self._invalidated[name] = (self._sequence, now)
+        if len(self._invalidated) > self.max_entries:
+            # Чтение дольше TTL маловероятно: сведения о давних сбросах заменяет горизонт
+            for name, (sequence, moment) in list(self._invalidated.items()):
+                if moment <= now - self.default_ttl:
+                    del self._invalidated[name]
+                    self._horizon = max(self._horizon, sequence)
+
+    def _invalidated_since(self, fence: int, names: Iterable[str]) -> bool:
+        if fence < self._horizon:
+            return True
+        return any(self._invalidated.get(name, (0, 0.0))[0] > fence for name in names)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        return {**await super().get_stats(), "size": len(self._entries), "max_entries": self.max_entries}
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
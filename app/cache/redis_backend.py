@@ -0,0 +1,142 @@
+import json
+from typing import Any, Dict, Iterable, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, WatchError
+
+from app.cache.base import CacheBackend
+from app.utils.logger import logger
+
+
+class RedisCache(CacheBackend):
+    """Кэш в Redis (или совместимом по протоколу сервере), общий для всех процессов сервиса.
+
+    Теги хранятся как множества ключей. Ошибки Redis не ломают запросы:
+    чтение считается промахом, запись и инвалидация пропускаются.
+
+    Инвалидация увеличивает общий счетчик и помечает сброшенные ключи и теги его значением
+    на время TTL. Запись с меткой fence() проверяет пометки под WATCH и отбрасывается,
+    если они новее метки или изменились до записи.
+    """
+
+    name = "redis"
+
+    def __init__(self, client: Redis, default_ttl: float, prefix: str = "api:"):
+        super().__init__(default_ttl)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, default_ttl: float, prefix: str = "api:") -> "RedisCache":
+        return cls(Redis.from_url(url), default_ttl, prefix)
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self.client.get(self.prefix + key)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Ошибка чтения из Redis: {e}")
+            raw = None
+
+        if raw is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return json.loads(raw)
+
+    async def fence(self) -> Any:
+        try:
+            return int(await self.client.get(self._sequence_key) or 0)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Ошибка чтения из Redis: {e}")
+            return None
+
+    async def set(
+        self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = (), fence: Any = None
+    ) -> None:
+        ttl_ms = max(1, int((self.default_ttl if ttl is None else ttl) * 1000))
+        tags = tuple(tags)
+        try:
+            async with self.client.pipeline(transaction=fence is not None) as pipe:
+                if fence is not None:
+                    markers = [self._cleared_key, *(self._marker_key(name) for name in (key, *tags))]
+                    await pipe.watch(*markers)
+                    if any(marker is not None and int(marker) > fence for marker in await pipe.mget(markers)):
+                        return
+                    pipe.multi()
+                pipe.set(self.prefix + key, json.dumps(value, ensure_ascii=False), px=ttl_ms)
+                for tag in tags:
+                    tag_key = self._tag_key(tag)
+                    pipe.sadd(tag_key, key)
+                    pipe.pexpire(tag_key, ttl_ms)
+                await pipe.execute()
+        except WatchError:
+            # Ключ или тег сброшен между проверкой и записью
+            pass
+        except (RedisError, OSError) as e:
+            logger.warning(f"Ошибка записи в Redis: {e}")
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            await self._mark(keys)
+            await self.client.delete(*(self.prefix + key for key in keys))
+        except (RedisError, OSError) as e:
+            logger.warning(f"Ошибка удаления из Redis: {e}")
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        try:
+            await self._mark(tags)
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                keys = await self.client.smembers(tag_key)
+                await self.client.delete(tag_key, *(self.prefix + key.decode() for key in keys))
+        except (RedisError, OSError) as e:
+            logger.warning(f"Ошибка инвалидации тегов в Redis: {e}")
+
+    async def clear(self) -> None:
+        # Счетчик инвалидаций не сбрасывается: иначе старые метки fence() оказались бы новее пометок
+        sequence = await self.client.incr(self._sequence_key)
+        keys = [
+            key async for key in self.client.scan_iter(match=self.prefix + "*")
+            if key.decode() != self._sequence_key
+        ]
+        if keys:
+            await self.client.delete(*keys)
+        await self.client.set(self._cleared_key, sequence)
+
+    async def get_stats(self) -> Dict[str, Any]:
+        stats = await super().get_stats()
+        try:
+            # Вытеснение выполняет сам Redis, счетчик берется с сервера
+            info = await self.client.info("stats")
+            stats["evictions"] = info.get("evicted_keys", 0)
+        except (RedisError, OSError) as e:
+            logger.warning(f"Не удалось получить статистику Redis: {e}")
+        return stats
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    async def _mark(self, names: Iterable[str]) -> None:
+        """Пометки ставятся до удаления записей: запись, начатая до сброса, их уже увидит"""
+        sequence = await self.client.incr(self._sequence_key)
+        ttl_ms = max(1, int(self.default_ttl * 1000))
+        async with self.client.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.set(self._marker_key(name), sequence, px=ttl_ms)
+            await pipe.execute()
+
+    @property
+    def _sequence_key(self) -> str:
+        return f"{self.prefix}sequence"
+
+    @property
+    def _cleared_key(self) -> str:
+        return f"{self.prefix}cleared"
+
+    def _marker_key(self, name: str) -> str:
+        return f"{self.prefix}invalidated:{name}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
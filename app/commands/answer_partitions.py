@@ -0,0 +1,269 @@
+"""Секции таблицы ответов и перенос холодных данных в архив.
+
+В PostgreSQL answers секционирована по created_at помесячно (секции answers_pYYYY_MM,
+плюс answers_default для строк вне созданных секций). Команда create заранее создает
+секции на несколько месяцев вперед. Команда archive переносит секции старше заданного
+числа месяцев из answers в секционированную answers_archive: секция отсоединяется и
+присоединяется к архиву в одной короткой транзакции, без копирования строк, поэтому
+чтения, объединяющие обе таблицы, не теряют и не дублируют ответы.
+
+Строки, попавшие в answers_default до создания секции своего месяца, переносятся
+в нее при создании: PostgreSQL не создает секцию, пока подходящие строки лежат
+в секции по умолчанию. Секция создается отдельной таблицей, строки переносятся в нее
+из answers_default (на это время запись в answers_default блокируется, чтения
+продолжаются) и она присоединяется к answers в той же транзакции. Перед переносом
+в архив archive так же раскладывает по секциям старые строки answers_default.
+
+В SQLite секций нет: archive переносит строки пачками INSERT ... SELECT и DELETE.
+
+Пример (по расписанию: create - ежедневно, archive - ежемесячно):
+    python -m app.commands.answer_partitions create --months-ahead 3
+    python -m app.commands.answer_partitions archive --older-than-months 12
+"""
+import argparse
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.database import engine as default_engine
+from app.models.models import Answer, ArchivedAnswer
+from app.utils.logger import logger
+
+PARTITION_PREFIX = "answers_p"
+PARTITION_NAME = re.compile(r"^answers_p(\d{4})_(\d{2})$")
+DEFAULT_MONTHS_AHEAD = 3
+DEFAULT_ARCHIVE_AFTER_MONTHS = 12
+SQLITE_BATCH_SIZE = 10_000
+# Отсоединение секции берет короткую эксклюзивную блокировку answers: не ждем ее дольше
+LOCK_TIMEOUT = "5s"
+# Колонки ответа без генерируемой search_vector, как в миграции секционирования
+COPY_COLUMNS = "id, question_id, user_id, text, created_at"
+
+
+@dataclass
+class ArchiveStats:
+    partitions: List[str] = field(default_factory=list)
+    rows: int = 0
+    seconds: float = 0.0
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    match = PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def partition_bounds(month: datetime) -> str:
+    return f"FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+
+
+def partition_ddl(month: datetime, parent: str = "answers") -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {parent} "
+        f"FOR VALUES {partition_bounds(month)}"
+    )
+
+
+def move_default_rows_ddl(month: datetime) -> List[str]:
+    """Создание секции месяца, строки которого уже лежат в answers_default.
+
+    Секция присоединяется, только если search_vector в ней тоже генерируемая колонка,
+    поэтому LIKE копирует и выражение, а строки переносятся без search_vector.
+    """
+    name = partition_name(month)
+    window = f"created_at >= '{month.isoformat()}' AND created_at < '{add_months(month, 1).isoformat()}'"
+    return [
+        f"CREATE TABLE {name} (LIKE answers INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)",
+        f"WITH moved AS (DELETE FROM answers_default WHERE {window} RETURNING {COPY_COLUMNS}) "
+        f"INSERT INTO {name} ({COPY_COLUMNS}) SELECT {COPY_COLUMNS} FROM moved",
+        f"ALTER TABLE answers ATTACH PARTITION {name} FOR VALUES {partition_bounds(month)}",
+    ]
+
+
+async def _create_partition(engine: AsyncEngine, month: datetime) -> int:
+    """Создает секцию месяца; возвращает число строк, перенесенных в нее из answers_default"""
+    name = partition_name(month)
+    window = {"lower": month, "upper": add_months(month, 1)}
+    async with engine.begin() as conn:
+        if await conn.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}):
+            return 0
+        # Без блокировки строка месяца, вставленная после подсчета, сорвала бы создание секции
+        await conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        await conn.execute(text("LOCK TABLE answers_default IN EXCLUSIVE MODE"))
+        moved = await conn.scalar(
+            text("SELECT count(*) FROM answers_default WHERE created_at >= :lower AND created_at < :upper"),
+            window,
+        )
+        if not moved:
+            await conn.execute(text(partition_ddl(month)))
+            return 0
+        for statement in move_default_rows_ddl(month):
+            await conn.execute(text(statement))
+    logger.info(f"Секция {name}: перенесено строк из answers_default: {moved}")
+    return moved
+
+
+async def _default_months(engine: AsyncEngine, cutoff: datetime) -> List[datetime]:
+    """Месяцы строк answers_default старше cutoff"""
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text(
+                "SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') FROM answers_default "
+                "WHERE created_at < :cutoff ORDER BY 1"
+            ),
+            {"cutoff": cutoff},
+        )
+        return [month.replace(tzinfo=timezone.utc) for month in result.scalars()]
+
+
+async def create_partitions(
+    engine: AsyncEngine,
+    months_ahead: int = DEFAULT_MONTHS_AHEAD,
+    now: Optional[datetime] = None,
+    since: Optional[datetime] = None,
+) -> List[str]:
+    """Создает секции answers с месяца since (по умолчанию текущего) на months_ahead месяцев вперед"""
+    if engine.dialect.name != "postgresql":
+        logger.info("Секционирование ответов поддерживается только в PostgreSQL")
+        return []
+
+    current = month_start(now or datetime.now(timezone.utc))
+    months = [month_start(since or current)]
+    while months[-1] < add_months(current, months_ahead):
+        months.append(add_months(months[-1], 1))
+    for month in months:
+        await _create_partition(engine, month)
+    names = [partition_name(month) for month in months]
+    logger.info(f"Секции ответов созданы или уже существуют: {', '.join(names)}")
+    return names
+
+
+async def _answer_partitions(engine: AsyncEngine) -> List[str]:
+    async with engine.connect() as conn:
+        result = await conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'answers'::regclass ORDER BY c.relname"
+        ))
+        return [name for name in result.scalars() if partition_month(name) is not None]
+
+
+async def _archive_partition(engine: AsyncEngine, name: str) -> None:
+    lower = partition_month(name)
+    check = (
+        f"created_at IS NOT NULL AND created_at >= '{lower.isoformat()}' "
+        f"AND created_at < '{add_months(lower, 1).isoformat()}'"
+    )
+    # Проверочное ограничение с границами секции позволяет ATTACH PARTITION не сканировать строки.
+    # NOT VALID + VALIDATE проверяет строки без блокировки чтений и записей
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT IF EXISTS {name}_bounds"))
+        await conn.execute(text(f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds CHECK ({check}) NOT VALID"))
+        await conn.execute(text(f"ALTER TABLE {name} VALIDATE CONSTRAINT {name}_bounds"))
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        await conn.execute(text(f"ALTER TABLE answers DETACH PARTITION {name}"))
+        await conn.execute(
+            text(f"ALTER TABLE answers_archive ATTACH PARTITION {name} FOR VALUES {partition_bounds(lower)}")
+        )
+        await conn.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
+
+
+async def _archive_rows(engine: AsyncEngine, cutoff: datetime, batch_size: int) -> int:
+    """Перенос строк пачками для БД без секций; каждая пачка - отдельная транзакция"""
+    moved = 0
+    columns = [column.name for column in Answer.__table__.c]
+    while True:
+        async with engine.begin() as conn:
+            ids = (await conn.scalars(
+                select(Answer.id).where(Answer.created_at < cutoff).order_by(Answer.id).limit(batch_size)
+            )).all()
+            if not ids:
+                return moved
+            await conn.execute(
+                insert(ArchivedAnswer).from_select(
+                    columns, select(*Answer.__table__.c).where(Answer.id.in_(ids))
+                )
+            )
+            await conn.execute(delete(Answer).where(Answer.id.in_(ids)))
+        moved += len(ids)
+        logger.info(f"answers: перенесено в архив {moved}")
+
+
+async def archive_answers(
+    engine: AsyncEngine,
+    older_than_months: int = DEFAULT_ARCHIVE_AFTER_MONTHS,
+    batch_size: int = SQLITE_BATCH_SIZE,
+    now: Optional[datetime] = None,
+) -> ArchiveStats:
+    """Переносит в answers_archive ответы из месяцев, закончившихся older_than_months месяцев назад"""
+    started = time.perf_counter()
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -older_than_months)
+    stats = ArchiveStats()
+
+    if engine.dialect.name == "postgresql":
+        # Старые строки answers_default сначала раскладываются по секциям своих месяцев
+        for month in await _default_months(engine, cutoff):
+            await _create_partition(engine, month)
+        for name in await _answer_partitions(engine):
+            if add_months(partition_month(name), 1) <= cutoff:
+                await _archive_partition(engine, name)
+                stats.partitions.append(name)
+                logger.info(f"Секция {name} перенесена в архив")
+    else:
+        stats.rows = await _archive_rows(engine, cutoff, batch_size)
+
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="БД вместо настроенной в приложении")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="создать будущие секции answers")
+    create.add_argument("--months-ahead", type=int, default=DEFAULT_MONTHS_AHEAD)
+    archive = commands.add_parser("archive", help="перенести старые ответы в answers_archive")
+    archive.add_argument("--older-than-months", type=int, default=DEFAULT_ARCHIVE_AFTER_MONTHS)
+    archive.add_argument("--batch-size", type=int, default=SQLITE_BATCH_SIZE, help="строк в пачке (без секций)")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    engine = create_async_engine(args.database_url) if args.database_url else default_engine
+    try:
+        if args.command == "create":
+            await create_partitions(engine, args.months_ahead)
+        else:
+            stats = await archive_answers(engine, args.older_than_months, args.batch_size)
+            logger.info(
+                f"Перенесено в архив секций: {len(stats.partitions)}, строк: {stats.rows} за {stats.seconds:.1f} с"
+            )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,266 @@
+"""Генератор синтетических данных для нагрузочного тестирования.
+
+Заполняет таблицы questions и answers заданным объемом с распределением ответов
+по закону Ципфа: вопрос с рангом k получает долю ответов, пропорциональную 1 / k^skew.
+При skew около 1 и десятках миллионов ответов несколько вопросов получают
+сотни тысяч ответов, а большинство - единицы, как в рабочей базе.
+
+В PostgreSQL данные загружаются через COPY (asyncpg copy_records_to_table),
+в SQLite - пакетными INSERT. Идентификаторы назначаются генератором начиная
+с текущего максимума, поэтому во время загрузки в таблицы не должен писать сервис.
+Счетчики ответов вопросов пересчитываются после загрузки (repair_question_stats).
+
+Пример:
+    python -m app.commands.generate_dataset --questions 1000000 --answers 20000000 --skew 1.0
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Table, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.commands.answer_partitions import create_partitions
+from app.commands.repair_question_stats import repair_question_stats
+from app.database import Base, engine as default_engine
+from app.models.models import Answer, ArchivedAnswer, Question
+from app.utils.logger import logger
+
+DEFAULT_BATCH_SIZE = 100_000
+SQLITE_BATCH_SIZE = 10_000
+
+QUESTION_COLUMNS = ("id", "text", "created_at")
+ANSWER_COLUMNS = ("id", "question_id", "user_id", "text", "created_at")
+# Архив ответов берет id из той же последовательности, что и answers
+ANSWER_ID_TABLES = (Answer.__table__, ArchivedAnswer.__table__)
+
+_WORDS = (
+    "как", "почему", "где", "когда", "настроить", "ошибка", "индекс", "запрос", "сервер", "база",
+    "данных", "пул", "соединений", "кэш", "реплика", "миграция", "транзакция", "таймаут", "ответ", "вопрос",
+)
+
+
+@dataclass
+class DatasetStats:
+    questions: int = 0
+    answers: int = 0
+    max_answers_per_question: int = 0
+    seconds: float = 0.0
+
+
+def answer_distribution(questions: int, answers: int, skew: float) -> Iterator[int]:
+    """Количество ответов для вопросов с рангами 1..questions (по убыванию).
+
+    Дробные остатки переносятся на следующий ранг, поэтому сумма точно равна answers.
+    """
+    if questions <= 0:
+        return
+    harmonic = math.fsum(rank ** -skew for rank in range(1, questions + 1))
+    emitted = 0
+    carry = 0.0
+    for rank in range(1, questions + 1):
+        if rank == questions:
+            yield answers - emitted
+            return
+        exact = answers * rank ** -skew / harmonic + carry
+        count = int(exact)
+        carry = exact - count
+        emitted += count
+        yield count
+
+
+def _coprime_step(n: int) -> int:
+    """Шаг перестановки рангов по индексам вопросов: популярные вопросы не идут подряд"""
+    step = int(n * 0.6180339887) + 1
+    while math.gcd(step, n) != 1:
+        step += 1
+    return step
+
+
+def _texts(rng: random.Random, size: int, prefix: str) -> List[str]:
+    return [
+        f"{prefix} {' '.join(rng.choices(_WORDS, k=rng.randint(3, 30)))}?"
+        for _ in range(size)
+    ]
+
+
+def generate_rows(
+    questions: int,
+    answers: int,
+    skew: float,
+    first_question_id: int,
+    first_answer_id: int,
+    start: datetime,
+    end: datetime,
+    users: int,
+    seed: int,
+) -> Tuple[Iterator[tuple], Iterator[tuple]]:
+    """Строки вопросов и ответов в порядке колонок QUESTION_COLUMNS и ANSWER_COLUMNS"""
+    rng = random.Random(seed)
+    span = (end - start).total_seconds()
+    question_texts = _texts(rng, 1000, "Вопрос:")
+    answer_texts = _texts(rng, 1000, "Ответ:")
+
+    def question_time(index: int) -> datetime:
+        return start + timedelta(seconds=span * index / questions)
+
+    def question_rows() -> Iterator[tuple]:
+        for index in range(questions):
+            yield first_question_id + index, question_texts[index % len(question_texts)], question_time(index)
+
+    def answer_rows() -> Iterator[tuple]:
+        step = _coprime_step(questions)
+        user_ids = [f"user-{index}" for index in range(users)]
+        answer_id = first_answer_id
+        # Локальные ссылки заметно ускоряют внутренний цикл на десятках миллионов строк
+        choice, uniform = rng.choice, rng.random
+        for rank, count in enumerate(answer_distribution(questions, answers, skew)):
+            if count == 0:
+                continue
+            index = rank * step % questions
+            question_id = first_question_id + index
+            asked_at = question_time(index)
+            window = (end - asked_at).total_seconds()
+            for _ in range(count):
+                yield (
+                    answer_id,
+                    question_id,
+                    choice(user_ids),
+                    choice(answer_texts),
+                    asked_at + timedelta(seconds=uniform() * window),
+                )
+                answer_id += 1
+
+    return question_rows(), answer_rows()
+
+
+def batched(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+async def _next_id(engine: AsyncEngine, *tables: Table) -> int:
+    """Следующий id после занятых во всех таблицах с общей последовательностью"""
+    async with engine.connect() as conn:
+        used = [await conn.scalar(select(func.coalesce(func.max(table.c.id), 0))) for table in tables]
+    return max(used) + 1
+
+
+async def _copy(engine: AsyncEngine, table: Table, columns: Sequence[str], rows: Iterable[tuple], batch_size: int) -> int:
+    """Загрузка через COPY; каждая пачка - отдельная транзакция, прогресс пишется в лог"""
+    loaded = 0
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        for batch in batched(rows, batch_size):
+            await driver.copy_records_to_table(table.name, records=batch, columns=list(columns))
+            loaded += len(batch)
+            logger.info(f"{table.name}: загружено {loaded}")
+    return loaded
+
+
+async def _insert(engine: AsyncEngine, table: Table, columns: Sequence[str], rows: Iterable[tuple], batch_size: int) -> int:
+    loaded = 0
+    for batch in batched(rows, batch_size):
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), [dict(zip(columns, row)) for row in batch])
+        loaded += len(batch)
+        logger.info(f"{table.name}: загружено {loaded}")
+    return loaded
+
+
+async def _finish_postgresql(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        for table, id_tables in ((Question.__table__, [Question.__table__]), (Answer.__table__, ANSWER_ID_TABLES)):
+            ids = " UNION ALL ".join(f"SELECT id FROM {id_table.name}" for id_table in id_tables)
+            # Явные id не сдвигают последовательность, выравниваем ее по загруженным данным
+            await conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"(SELECT coalesce(max(id), 1) FROM ({ids}) AS ids))"
+            ))
+            await conn.execute(text(f"ANALYZE {table.name}"))
+
+
+async def generate_dataset(
+    engine: AsyncEngine,
+    questions: int,
+    answers: int,
+    skew: float = 1.0,
+    days: int = 365,
+    users: int = 100_000,
+    batch_size: Optional[int] = None,
+    seed: int = 0,
+) -> DatasetStats:
+    """Заполняет таблицы вопросов и ответов синтетическими данными"""
+    started = time.perf_counter()
+    postgresql = engine.dialect.name == "postgresql"
+    load = _copy if postgresql else _insert
+    batch_size = batch_size or (DEFAULT_BATCH_SIZE if postgresql else SQLITE_BATCH_SIZE)
+
+    end = datetime.now(timezone.utc)
+    if postgresql:
+        # Иначе ответы за прошлые месяцы попадут в секцию answers_default
+        await create_partitions(engine, now=end, since=end - timedelta(days=days))
+    question_rows, answer_rows = generate_rows(
+        questions,
+        answers,
+        skew,
+        first_question_id=await _next_id(engine, Question.__table__),
+        first_answer_id=await _next_id(engine, *ANSWER_ID_TABLES),
+        start=end - timedelta(days=days),
+        end=end,
+        users=users,
+        seed=seed,
+    )
+
+    stats = DatasetStats()
+    stats.questions = await load(engine, Question.__table__, QUESTION_COLUMNS, question_rows, batch_size)
+    stats.answers = await load(engine, Answer.__table__, ANSWER_COLUMNS, answer_rows, batch_size)
+    stats.max_answers_per_question = next(answer_distribution(questions, answers, skew), 0)
+    await repair_question_stats(engine)
+    if postgresql:
+        await _finish_postgresql(engine)
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, required=True, help="количество вопросов")
+    parser.add_argument("--answers", type=int, required=True, help="общее количество ответов")
+    parser.add_argument("--skew", type=float, default=1.0, help="показатель Ципфа; 0 - равномерно")
+    parser.add_argument("--days", type=int, default=365, help="за сколько дней распределить created_at")
+    parser.add_argument("--users", type=int, default=100_000, help="количество разных user_id")
+    parser.add_argument("--batch-size", type=int, help="строк в одной пачке COPY/INSERT")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", help="БД вместо настроенной в приложении (для SQLite таблицы создаются)")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    engine = create_async_engine(args.database_url) if args.database_url else default_engine
+    try:
+        if engine.dialect.name == "sqlite":
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+        stats = await generate_dataset(
+            engine, args.questions, args.answers, args.skew, args.days, args.users, args.batch_size, args.seed
+        )
+    finally:
+        await engine.dispose()
+    logger.info(
+        f"Загружено вопросов: {stats.questions}, ответов: {stats.answers} за {stats.seconds:.1f} с; "
+        f"максимум ответов на вопрос: {stats.max_answers_per_question}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
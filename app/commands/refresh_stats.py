@@ -0,0 +1,45 @@
+"""Обновление предрассчитанной статистики GET /stats вне приложения.
+
+Обычно статистику обновляет фоновая задача приложения (STATS_REFRESH_INTERVAL_SECONDS),
+в том числе первый расчет по уже накопленным ответам. Команда выполняет его одной
+транзакцией без ожидания фоновой задачи, а с --rebuild - полный пересчет после массовых
+удалений ответов, которые инкрементальное обновление не учитывает.
+
+Пример:
+    python -m app.commands.refresh_stats --rebuild
+"""
+import argparse
+import asyncio
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.database import engine as default_engine
+from app.utils.logger import logger
+from app.utils.rollups import refresh_stats
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="пересчитать статистику с нуля")
+    parser.add_argument("--top", type=int, default=settings.STATS_TOP_QUESTIONS, help="сколько вопросов хранить")
+    parser.add_argument("--database-url", help="БД вместо настроенной в приложении")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    engine = create_async_engine(args.database_url) if args.database_url else default_engine
+    try:
+        stats = await refresh_stats(engine, top_size=args.top, rebuild=args.rebuild)
+    finally:
+        await engine.dispose()
+    logger.info(
+        f"Статистика обновлена до {stats.watermark:%Y-%m-%d %H:%M:%S}: ответов {stats.answers}, "
+        f"дней {stats.days} за {stats.seconds:.1f} с"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
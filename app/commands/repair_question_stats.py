@@ -0,0 +1,95 @@
+"""Пересчет answer_count и last_answer_at вопросов по таблице ответов.
+
+Агрегаты поддерживаются эндпоинтами записи в одной транзакции с изменением ответов.
+Команда нужна после загрузки данных в обход API (генератор, ручные правки в БД)
+и для сверки: вопросы обходятся диапазонами id, каждая пачка - отдельная транзакция,
+поэтому таблица не блокируется целиком.
+
+Пример:
+    python -m app.commands.repair_question_stats --batch-size 10000
+"""
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.database import engine as default_engine
+from app.models.models import Question
+from app.queries import ALL_ANSWERS
+from app.utils.logger import logger
+
+DEFAULT_BATCH_SIZE = 10_000
+
+
+@dataclass
+class RepairStats:
+    questions: int = 0
+    fixed: int = 0
+    seconds: float = 0.0
+
+
+def _repair_batch(first_id: int, last_id: int):
+    """UPDATE вопросов диапазона, у которых агрегаты расходятся с таблицей ответов"""
+    count = (
+        select(func.count(ALL_ANSWERS.id)).where(ALL_ANSWERS.question_id == Question.id).scalar_subquery()
+    )
+    last_answer_at = (
+        select(func.max(ALL_ANSWERS.created_at)).where(ALL_ANSWERS.question_id == Question.id).scalar_subquery()
+    )
+    return (
+        update(Question)
+        .where(
+            Question.id.between(first_id, last_id),
+            or_(
+                Question.answer_count != count,
+                Question.last_answer_at.is_distinct_from(last_answer_at),
+            ),
+        )
+        .values(answer_count=count, last_answer_at=last_answer_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def repair_question_stats(engine: AsyncEngine, batch_size: int = DEFAULT_BATCH_SIZE) -> RepairStats:
+    """Пересчитывает агрегаты всех вопросов; возвращает число исправленных строк"""
+    started = time.perf_counter()
+    stats = RepairStats()
+    async with engine.connect() as conn:
+        bounds = (await conn.execute(select(func.min(Question.id), func.max(Question.id)))).one()
+    if bounds[0] is None:
+        return stats
+
+    for first_id in range(bounds[0], bounds[1] + 1, batch_size):
+        last_id = first_id + batch_size - 1
+        async with engine.begin() as conn:
+            result = await conn.execute(_repair_batch(first_id, last_id))
+        stats.fixed += result.rowcount
+        stats.questions = min(last_id, bounds[1]) - bounds[0] + 1
+        logger.info(f"questions: проверено id до {min(last_id, bounds[1])}, исправлено {stats.fixed}")
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="вопросов в одной транзакции")
+    parser.add_argument("--database-url", help="БД вместо настроенной в приложении")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    engine = create_async_engine(args.database_url) if args.database_url else default_engine
+    try:
+        stats = await repair_question_stats(engine, args.batch_size)
+    finally:
+        await engine.dispose()
+    logger.info(f"Исправлено вопросов: {stats.fixed} из диапазона {stats.questions} id за {stats.seconds:.1f} с")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
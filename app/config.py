@@ -1,7 +1,8 @@
 import os
 
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Literal
 
 
 class Settings(BaseSettings):
@@ -11,18 +12,111 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_USER: str
     DB_PASSWORD: str
-    
+
+    # Пул соединений (на один процесс сервиса)
+    DB_POOL_SIZE: int = Field(default=10, ge=1)
+    DB_MAX_OVERFLOW: int = Field(default=10, ge=0)
+    DB_POOL_TIMEOUT: float = Field(default=10, gt=0)
+    DB_POOL_RECYCLE: int = Field(default=1800, ge=-1)
+    DB_POOL_PRE_PING: bool = True
+
+    # Кэши подготовленных выражений asyncpg: кэш адаптера SQLAlchemy и собственный кэш asyncpg.
+    # За PgBouncer в режиме transaction оба нужно выставить в 0
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = Field(default=500, ge=0)
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=500, ge=0)
+
+    # Сколько соединений каждого пула открыть и прогреть при запуске; 0 - без прогрева.
+    # До окончания прогрева /ready отвечает 503
+    DB_WARMUP_CONNECTIONS: int = Field(default=0, ge=0)
+
+    # Реплики для чтения: DSN через запятую (postgresql+asyncpg://...), пусто - только primary
+    DB_REPLICA_URLS: str = ""
+    # На сколько секунд недоступная реплика исключается из ротации
+    DB_REPLICA_EJECT_SECONDS: float = Field(default=30, gt=0)
+    # Сколько секунд после записи чтения клиента идут в primary
+    DB_READ_YOUR_WRITES_SECONDS: float = Field(default=5, ge=0)
+
+    # HTTP-сервер (python -m app.server): процессов-воркеров, 0 - по числу ядер;
+    # сколько секунд при остановке ждать завершения запросов в обработке
+    WEB_HOST: str = "0.0.0.0"
+    WEB_PORT: int = 8000
+    WEB_WORKERS: int = Field(default=1, ge=0)
+    WEB_GRACEFUL_TIMEOUT: int = Field(default=30, ge=0)
+    # Каталог файлов метрик воркеров (режим multiprocess prometheus_client при WEB_WORKERS > 1)
+    METRICS_MULTIPROC_DIR: str = "/tmp/prometheus_multiproc"
+
     # Настройки CORS
     CORS_ORIGINS: str = "http://localhost:3000"
-    
+
+    # Кэширование чтений (none, memory - LRU в процессе, redis - общий кэш)
+    CACHE_BACKEND: Literal["none", "memory", "redis"] = "memory"
+    CACHE_TTL_SECONDS: float = Field(default=30, gt=0)
+    CACHE_MAX_ENTRIES: int = Field(default=10_000, ge=1)
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Логирование: запись в stdout из фонового потока, JSON-формат,
+    # доля сохраняемых частых INFO-событий и лимит предупреждений на место вызова
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False
+    LOG_ENQUEUE: bool = True
+    LOG_SAMPLE_RATE: float = Field(default=1.0, ge=0, le=1)
+    # Предупреждений в секунду после исчерпания запаса LOG_WARNING_BURST; 0 - без ограничения
+    LOG_WARNING_RATE: float = Field(default=1.0, ge=0)
+    LOG_WARNING_BURST: int = Field(default=10, ge=1)
+    # Как часто сообщать о подавленных предупреждениях, если с того же места новых не было; 0 - только при остановке
+    LOG_SUPPRESSED_REPORT_SECONDS: float = Field(default=60, ge=0)
+
+    # Профилирование запросов (заголовок Server-Timing): для всех запросов или по заголовку X-Profile: 1
+    PROFILING_ENABLED: bool = False
+    PROFILING_ALLOW_HEADER: bool = False
+    # Сколько одинаковых запросов за один HTTP-запрос считается признаком N+1
+    PROFILING_REPEAT_THRESHOLD: int = Field(default=5, ge=2)
+
+    # Пакетная запись ответов: запросы POST /questions/{id}/answers/ объединяются в пачки
+    # не больше ANSWER_BATCH_MAX_SIZE ответов с ожиданием не дольше ANSWER_BATCH_MAX_DELAY_MS
+    ANSWER_BATCHING_ENABLED: bool = False
+    ANSWER_BATCH_MAX_SIZE: int = Field(default=200, ge=1, le=1000)
+    ANSWER_BATCH_MAX_DELAY_MS: float = Field(default=5, gt=0)
+
+    # Адаптивный лимит одновременных запросов (отдельно для чтений и записей) и сброс нагрузки:
+    # при заполненной очереди или ожидании дольше CONCURRENCY_QUEUE_TIMEOUT_MS - ответ 503 с Retry-After
+    CONCURRENCY_LIMIT_ENABLED: bool = False
+    CONCURRENCY_INITIAL_LIMIT: int = Field(default=20, ge=1)
+    CONCURRENCY_MIN_LIMIT: int = Field(default=2, ge=1)
+    CONCURRENCY_MAX_LIMIT: int = Field(default=200, ge=1)
+    CONCURRENCY_QUEUE_SIZE: int = Field(default=100, ge=0)
+    CONCURRENCY_QUEUE_TIMEOUT_MS: float = Field(default=1000, gt=0)
+    CONCURRENCY_READ_LATENCY_TARGET_MS: float = Field(default=100, gt=0)
+    CONCURRENCY_WRITE_LATENCY_TARGET_MS: float = Field(default=250, gt=0)
+    CONCURRENCY_BACKOFF: float = Field(default=0.9, gt=0, lt=1)
+    CONCURRENCY_RETRY_AFTER: int = Field(default=1, ge=0)
+
+    # Предрассчитанная статистика GET /stats: фоновое обновление раз в STATS_REFRESH_INTERVAL_SECONDS
+    # (0 - отключено); ответы моложе STATS_REFRESH_LAG_SECONDS учитываются следующим обновлением
+    STATS_REFRESH_INTERVAL_SECONDS: float = Field(default=60, ge=0)
+    STATS_REFRESH_LAG_SECONDS: float = Field(default=30, ge=0)
+    STATS_TOP_QUESTIONS: int = Field(default=100, ge=1)
+
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".env")
     )
 
+    @field_validator("DB_POOL_RECYCLE")
+    @classmethod
+    def validate_pool_recycle(cls, v: int) -> int:
+        # 0 заставил бы пересоздавать соединение при каждой выдаче из пула
+        if v == 0:
+            raise ValueError("DB_POOL_RECYCLE должен быть положительным или -1 (отключено)")
+        return v
+
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
 
+    @property
+    def replica_urls_list(self) -> List[str]:
+        return [url.strip() for url in self.DB_REPLICA_URLS.split(",") if url.strip()]
+
 
 def get_db_url():
     """Формирует URL подключения к PostgreSQL базе данных"""
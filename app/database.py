@@ -1,14 +1,265 @@
+import itertools
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import Engine, exc
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from app.config import get_db_url, settings
+from app.utils.logger import logger
+from app.utils.metrics import instrument_engine
+
+LAST_WRITE_COOKIE = "last_write"
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Пул, который считает время ожидания соединения и таймауты выдачи"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def recreate(self):
+        # Пул пересоздается при dispose(); статистику сохраняем
+        pool = super().recreate()
+        pool.checkouts, pool.timeouts = self.checkouts, self.timeouts
+        pool.wait_total, pool.wait_max = self.wait_total, self.wait_max
+        return pool
+
+
+def get_engine_options() -> Dict[str, Any]:
+    return {
+        "poolclass": InstrumentedAsyncPool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": {
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    }
+
+
+def pool_stats(pool: Pool) -> Dict[str, Any]:
+    """Текущее состояние пула соединений"""
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    if isinstance(pool, InstrumentedAsyncPool):
+        stats.update(
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            wait_avg_ms=round(pool.wait_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+            wait_max_ms=round(pool.wait_max * 1000, 3),
+        )
+    return stats
+
+
+class ReplicaRouter:
+    """Выбор реплики для чтения: round-robin с временным исключением недоступных реплик"""
 
-from app.config import get_db_url
+    def __init__(
+        self,
+        sessionmakers: List[async_sessionmaker[AsyncSession]],
+        eject_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.sessionmakers = sessionmakers
+        self.eject_seconds = eject_seconds
+        self._clock = clock
+        self._counter = itertools.count()
+        self._ejected_until: Dict[int, float] = {}
 
-engine = create_async_engine(get_db_url(), echo=False)
+    def __bool__(self) -> bool:
+        return bool(self.sessionmakers)
+
+    def is_healthy(self, index: int) -> bool:
+        return self._ejected_until.get(index, 0.0) <= self._clock()
+
+    def choose(self) -> Optional[int]:
+        """Следующая здоровая реплика или None, если все исключены"""
+        for _ in range(len(self.sessionmakers)):
+            index = next(self._counter) % len(self.sessionmakers)
+            if self.is_healthy(index):
+                return index
+        return None
+
+    def eject(self, index: int) -> None:
+        self._ejected_until[index] = self._clock() + self.eject_seconds
+
+
+engine = create_async_engine(get_db_url(), echo=False, **get_engine_options())
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+replica_engines = [
+    create_async_engine(url, echo=False, **get_engine_options()) for url in settings.replica_urls_list
+]
+replica_router = ReplicaRouter(
+    [async_sessionmaker(replica, class_=AsyncSession, expire_on_commit=False) for replica in replica_engines],
+    settings.DB_REPLICA_EJECT_SECONDS,
+)
+
+for _engine in [engine, *replica_engines]:
+    instrument_engine(_engine)
+
+
+def _reset_pools_after_fork() -> None:
+    """Движки создаются при импорте; процесс, созданный fork после импорта (например,
+    gunicorn --preload), не должен использовать и закрывать соединения родителя"""
+    for _engine in [engine, *replica_engines]:
+        _engine.sync_engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+async def dispose_engines() -> None:
+    """Закрывает соединения пулов процесса при остановке сервиса"""
+    for _engine in [engine, *replica_engines]:
+        await _engine.dispose()
+
+
 Base = declarative_base()
 
 
 async def get_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+class RoutingSession(Session):
+    """Синхронная сессия, которая берет соединения с engine из target через get_bind"""
+
+    target: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, **kwargs):
+        return self.target
+
+
+class ReplicaSession(AsyncSession):
+    """Сессия чтения с реплики, которая берет соединение при первом запросе, а не при создании.
+
+    Ответы из кэша и 304 не занимают соединение реплики. Если реплика недоступна, она
+    исключается из ротации, и сессия переключается на следующую реплику или на primary.
+    """
+
+    def __init__(self, index: int):
+        self._replica: Optional[int] = index
+        self._connected = False
+        maker = replica_router.sessionmakers[index]
+        options = {key: value for key, value in maker.kw.items() if key not in ("bind", "info")}
+        super().__init__(sync_session_class=RoutingSession, **options)
+        self._route(maker)
+
+    def _route(self, maker: async_sessionmaker[AsyncSession]) -> None:
+        self.sync_session.target = maker.kw["bind"].sync_engine
+        self.info.clear()
+        self.info.update(maker.kw.get("info") or {})
+
+    async def _ensure_connection(self) -> None:
+        while not self._connected and self._replica is not None:
+            try:
+                await super().connection()
+                self._connected = True
+            except (exc.DBAPIError, OSError, TimeoutError) as e:
+                await super().close()
+                replica_router.eject(self._replica)
+                logger.warning(f"Реплика #{self._replica} недоступна и исключена из ротации: {e}")
+                self._replica = replica_router.choose()
+                if self._replica is None:
+                    self._route(AsyncSessionLocal)
+                else:
+                    self._route(replica_router.sessionmakers[self._replica])
+
+    async def connection(self, *args, **kwargs):
+        await self._ensure_connection()
+        return await super().connection(*args, **kwargs)
+
+    async def execute(self, *args, **kwargs):
+        await self._ensure_connection()
+        return await super().execute(*args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        await self._ensure_connection()
+        return await super().scalar(*args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        await self._ensure_connection()
+        return await super().get(*args, **kwargs)
+
+    async def stream(self, *args, **kwargs):
+        await self._ensure_connection()
+        return await super().stream(*args, **kwargs)
+
+    async def run_sync(self, *args, **kwargs):
+        await self._ensure_connection()
+        return await super().run_sync(*args, **kwargs)
+
+
+async def get_read_db(request: Request):
+    """Сессия для чтения: реплика, если клиент недавно ничего не записывал, иначе primary"""
+    index = replica_router.choose() if replica_router and not wrote_recently(request) else None
+    async with (AsyncSessionLocal() if index is None else ReplicaSession(index)) as session:
+        yield session
+
+
+async def get_write_db(response: Response):
+    """Сессия для записи в primary.
+
+    Помечает клиента cookie, чтобы его чтения сразу после записи шли в primary
+    и не видели отстающую реплику.
+    """
+    if replica_router and settings.DB_READ_YOUR_WRITES_SECONDS > 0:
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            f"{time.time():.3f}",
+            max_age=int(settings.DB_READ_YOUR_WRITES_SECONDS) + 1,
+            httponly=True,
+            samesite="lax",
+        )
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+def wrote_recently(request: Request) -> bool:
+    """Клиент записывал данные в пределах DB_READ_YOUR_WRITES_SECONDS (cookie ставится только при репликах)"""
+    value = request.cookies.get(LAST_WRITE_COOKIE)
+    if not replica_router or value is None:
+        return False
+    try:
+        return time.time() - float(value) < settings.DB_READ_YOUR_WRITES_SECONDS
+    except ValueError:
+        return False
+
+
+async def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Фабрика сессий для кода, который живет дольше зависимости (например, потоковые ответы)"""
+    return AsyncSessionLocal
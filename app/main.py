@@ -1,30 +1,86 @@
+import asyncio
+import os
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from app.api.endpoints import questions, answers, health
+from app.api.endpoints import questions, answers, health, stats, users
+from app.cache import cache_backend
 from app.config import settings
-from app.utils.logger import logger
+from app.database import dispose_engines, engine, replica_engines
+from app.utils.batching import close_answer_batcher
+from app.utils.concurrency import ConcurrencyLimitMiddleware
+from app.utils.logger import logger, run_suppressed_reporter, shutdown_logging
+from app.utils.metrics import MetricsMiddleware, shutdown_metrics
+from app.utils.pagination import InvalidCursorError
+from app.utils.profiling import ProfilingMiddleware
+from app.utils.rollups import run_stats_refresher
+from app.utils.warmup import warm_up
+
+
+async def _warm_up(app: FastAPI) -> None:
+    try:
+        await warm_up(engine, replica_engines, settings.DB_WARMUP_CONNECTIONS)
+    finally:
+        app.state.ready = True
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("Сервис запущен")
+    logger.info(f"Сервис запущен, pid={os.getpid()}")
+    # Прогрев идет в фоне: /live отвечает сразу, а /ready - только после прогрева
+    warmup = None
+    if settings.DB_WARMUP_CONNECTIONS > 0:
+        app.state.ready = False
+        warmup = asyncio.create_task(_warm_up(app))
+    refresher = None
+    if settings.STATS_REFRESH_INTERVAL_SECONDS > 0:
+        refresher = asyncio.create_task(run_stats_refresher(engine, settings.STATS_REFRESH_INTERVAL_SECONDS))
+    reporter = None
+    if settings.LOG_WARNING_RATE > 0 and settings.LOG_SUPPRESSED_REPORT_SECONDS > 0:
+        reporter = asyncio.create_task(run_suppressed_reporter(settings.LOG_SUPPRESSED_REPORT_SECONDS))
     yield
-    logger.info("Сервис остановлен")
+    tasks = [task for task in (warmup, refresher, reporter) if task is not None]
+    for task in tasks:
+        task.cancel()
+    # Задачи должны завершиться до закрытия пулов, иначе они используют закрытый engine
+    await asyncio.gather(*tasks, return_exceptions=True)
+    # Uvicorn вызывает завершение после того, как дождался запросов в обработке
+    await close_answer_batcher()
+    await cache_backend.close()
+    await dispose_engines()
+    shutdown_metrics()
+    logger.info(f"Сервис остановлен, pid={os.getpid()}")
+    await shutdown_logging()
 
 
 app = FastAPI(title="API Service", lifespan=lifespan)
+app.state.ready = True
 
+app.add_middleware(ProfilingMiddleware)
+# Внутри MetricsMiddleware, чтобы отклоненные запросы попадали в метрики,
+# и внутри CORSMiddleware, чтобы ответы 503 получали CORS-заголовки
+app.add_middleware(ConcurrencyLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
     allow_credentials=True,
     allow_methods=["GET", "POST", "DELETE"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "Server-Timing"],
 )
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)})
+
 
 app.include_router(health.router)
 app.include_router(questions.router)
-app.include_router(answers.router)
\ No newline at end of file
+app.include_router(answers.router)
+app.include_router(users.router)
+app.include_router(stats.router)
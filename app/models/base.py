@@ -1,5 +1,45 @@
-from sqlalchemy import Column, Integer, DateTime, func
+from sqlalchemy import Column, Date, Integer, DateTime
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class utcnow(FunctionElement):
+    """Текущее время на стороне БД.
+
+    В SQLite CURRENT_TIMESTAMP хранит время с точностью до секунды и в формате,
+    отличном от того, в котором SQLAlchemy передает datetime-параметры. Из-за этого
+    ломаются сравнения по created_at (keyset-пагинация), поэтому для SQLite время
+    формируется с микросекундами в формате SQLAlchemy.
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _compile_utcnow(element, compiler, **kw):
+    return "now()"
+
+
+@compiles(utcnow, "sqlite")
+def _compile_utcnow_sqlite(element, compiler, **kw):
+    return "(STRFTIME('%Y-%m-%d %H:%M:%f000', 'now'))"
+
+
+class utc_date(FunctionElement):
+    """Дата момента времени в UTC, независимо от часового пояса сессии БД"""
+    type = Date()
+    inherit_cache = True
+
+
+@compiles(utc_date)
+def _compile_utc_date(element, compiler, **kw):
+    return f"CAST(timezone('UTC', {compiler.process(element.clauses, **kw)}) AS DATE)"
+
+
+@compiles(utc_date, "sqlite")
+def _compile_utc_date_sqlite(element, compiler, **kw):
+    return f"date({compiler.process(element.clauses, **kw)})"
 
 
 class BaseModel:
@@ -8,4 +48,4 @@ class BaseModel:
         return cls.__name__.lower()
 
     id = Column(Integer, primary_key=True, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=utcnow(), nullable=False)
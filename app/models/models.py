@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Text
+from sqlalchemy import DDL, Column, Date, DateTime, String, Integer, ForeignKey, Text, Index, event, text
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -7,15 +7,128 @@ from app.models.base import BaseModel
 
 class Question(Base, BaseModel):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_created_at_id", "created_at", "id"),
+        # Списки "самые активные" и "без ответов"
+        Index(
+            "ix_questions_last_answer_at_id", "last_answer_at", "id",
+            postgresql_where=text("last_answer_at IS NOT NULL"),
+            sqlite_where=text("last_answer_at IS NOT NULL"),
+        ),
+        Index(
+            "ix_questions_unanswered_created_at_id", "created_at", "id",
+            postgresql_where=text("answer_count = 0"),
+            sqlite_where=text("answer_count = 0"),
+        ),
+    )
 
     text = Column(Text, nullable=False)
-    answers = relationship("Answer", back_populates="question", cascade="all, delete-orphan")
+    # Денормализованные агрегаты по ответам; их обновляют эндпоинты ответов в той же
+    # транзакции, что и сами ответы. Пересчет: python -m app.commands.repair_question_stats
+    answer_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_answer_at = Column(DateTime(timezone=True), nullable=True)
+    # Ответы удаляет ON DELETE CASCADE в БД, ORM не загружает их при удалении вопроса
+    answers = relationship(
+        "Answer", back_populates="question", cascade="all, delete-orphan", passive_deletes=True
+    )
 
 
 class Answer(Base, BaseModel):
     __tablename__ = "answers"
+    __table_args__ = (
+        Index("ix_answers_question_id_created_at_id", "question_id", "created_at", "id"),
+        # История ответов пользователя
+        Index("ix_answers_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Выборка новых ответов для статистики; BRIN почти не замедляет вставки в конец таблицы
+        Index("ix_answers_created_at", "created_at", postgresql_using="brin"),
+    )
 
     question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(String(36), nullable=False)
     text = Column(Text, nullable=False)
-    question = relationship("Question", back_populates="answers")
\ No newline at end of file
+    question = relationship("Question", back_populates="answers")
+
+
+class ArchivedAnswer(Base, BaseModel):
+    """Холодный уровень хранения ответов.
+
+    В PostgreSQL answers и answers_archive секционированы по created_at, и старые
+    секции целиком переносятся из answers сюда (app.commands.answer_partitions).
+    Колонки и их порядок совпадают с answers: чтения объединяют обе таблицы.
+    """
+    __tablename__ = "answers_archive"
+    __table_args__ = (
+        Index("ix_answers_archive_question_id_created_at_id", "question_id", "created_at", "id"),
+        Index("ix_answers_archive_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_answers_archive_created_at", "created_at", postgresql_using="brin"),
+    )
+
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(String(36), nullable=False)
+    text = Column(Text, nullable=False)
+
+# Предрассчитанная статистика для GET /stats (app.utils.rollups). Таблицы обновляются
+# фоновой задачей по ответам, созданным после водяного знака stats_watermark.watermark
+class AnswerDailyStats(Base):
+    __tablename__ = "stats_answers_daily"
+
+    day = Column(Date, primary_key=True)
+    answers = Column(Integer, nullable=False, default=0)
+    active_users = Column(Integer, nullable=False, default=0)
+
+
+class UserDailyActivity(Base):
+    """Пользователи, отвечавшие в каждый день: из них считается active_users"""
+    __tablename__ = "stats_user_days"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(String(36), primary_key=True)
+
+
+class TopQuestion(Base):
+    __tablename__ = "stats_top_questions"
+
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    answer_count = Column(Integer, nullable=False)
+
+
+class StatsWatermark(Base):
+    """Единственная строка: до какого момента учтены ответы и когда было обновление"""
+    __tablename__ = "stats_watermark"
+
+    id = Column(Integer, primary_key=True)
+    watermark = Column(DateTime(timezone=True), nullable=True)
+    refreshed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+# В PostgreSQL у questions и answers есть генерируемая колонка search_vector
+# (to_tsvector(SEARCH_CONFIG, text)) с GIN-индексом; она создается миграцией и не
+# отображается в модели, чтобы схема оставалась переносимой. В SQLite (тесты)
+# ее роль играют таблицы FTS5 с внешним содержимым, которые синхронизируют триггеры.
+SEARCH_CONFIG = "russian"
+FTS_TABLES = {"questions": "questions_fts", "answers": "answers_fts"}
+
+
+def _sqlite_fts_ddl(table: str, fts_table: str) -> list:
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} "
+        f"USING fts5(text, content='{table}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, text) VALUES (new.id, new.text); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, text) VALUES ('delete', old.id, old.text); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF text ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, text) VALUES ('delete', old.id, old.text); "
+        f"INSERT INTO {fts_table}(rowid, text) VALUES (new.id, new.text); END",
+    ]
+
+
+def _register_sqlite_fts(table) -> None:
+    fts_table = FTS_TABLES[table.name]
+    for statement in _sqlite_fts_ddl(table.name, fts_table):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(table, "before_drop", DDL(f"DROP TABLE IF EXISTS {fts_table}").execute_if(dialect="sqlite"))
+
+
+_register_sqlite_fts(Question.__table__)
+_register_sqlite_fts(Answer.__table__)
@@ -0,0 +1,237 @@
+"""Построители запросов, общие для нескольких эндпоинтов"""
+import re
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import (
+    Float, Insert, Integer, Select, Subquery, Update, case, column, exists, func, insert, literal, literal_column,
+    or_, select, table, union_all, update,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, websearch_to_tsquery
+from sqlalchemy.orm import aliased
+
+from app.models.models import FTS_TABLES, SEARCH_CONFIG, Answer, ArchivedAnswer, Question
+from app.schemas.schemas import QuestionSort
+from app.utils.pagination import SortOrder, keyset_condition, keyset_ordering
+
+# Ответы обоих уровней хранения: оперативная таблица answers и архив answers_archive.
+# Условия и ORDER BY ... LIMIT над объединением PostgreSQL переносит в обе ветки
+# (Merge Append по индексам (question_id, created_at, id)), SQLite - условия WHERE
+ALL_ANSWERS = aliased(
+    Answer,
+    union_all(select(Answer.__table__), select(ArchivedAnswer.__table__)).subquery("all_answers"),
+)
+
+QUESTION_PAGE_KEY = (Question.created_at, Question.id)
+ACTIVE_QUESTION_PAGE_KEY = (Question.last_answer_at, Question.id)
+ANSWER_PAGE_KEY = (ALL_ANSWERS.created_at, ALL_ANSWERS.id)
+
+# Колонки в порядке полей схем ответа: строки сериализуются в JSON без промежуточных объектов
+QUESTION_COLUMNS = (
+    Question.text, Question.id, Question.created_at, Question.answer_count, Question.last_answer_at,
+)
+ANSWER_COLUMNS = (
+    ALL_ANSWERS.text, ALL_ANSWERS.user_id, ALL_ANSWERS.id, ALL_ANSWERS.question_id, ALL_ANSWERS.created_at,
+)
+
+
+def question_page_key(sort: QuestionSort) -> tuple:
+    """Колонки ключа keyset-пагинации для порядка сортировки списка вопросов"""
+    return ACTIVE_QUESTION_PAGE_KEY if sort == QuestionSort.active else QUESTION_PAGE_KEY
+
+
+def question_page_query(
+    limit: int, after: Optional[Sequence], order: SortOrder, sort: QuestionSort = QuestionSort.created
+) -> Select:
+    """Страница вопросов; выбирается на одну запись больше, чтобы понять, есть ли следующая.
+
+    Порядки active и unanswered читают частичные индексы по last_answer_at и answer_count = 0.
+    """
+    key = question_page_key(sort)
+    query = (
+        select(*QUESTION_COLUMNS)
+        .order_by(*keyset_ordering(key, order))
+        .limit(limit + 1)
+    )
+    if sort == QuestionSort.active:
+        query = query.where(Question.last_answer_at.is_not(None))
+    elif sort == QuestionSort.unanswered:
+        query = query.where(Question.answer_count == 0)
+    if after is not None:
+        query = query.where(keyset_condition(key, after, order))
+    return query
+
+
+def answer_page_query(question_id: int, limit: int, after: Optional[Sequence], order: SortOrder) -> Select:
+    """Страница ответов на вопрос из обоих уровней хранения по индексам (question_id, created_at, id)"""
+    query = (
+        select(*ANSWER_COLUMNS)
+        .where(ALL_ANSWERS.question_id == question_id)
+        .order_by(*keyset_ordering(ANSWER_PAGE_KEY, order))
+        .limit(limit + 1)
+    )
+    if after is not None:
+        query = query.where(keyset_condition(ANSWER_PAGE_KEY, after, order))
+    return query
+
+
+def user_answer_page_query(
+    user_id: str,
+    limit: int,
+    after: Optional[Sequence],
+    order: SortOrder,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Select:
+    """Страница ответов пользователя за период [since, until) по индексам (user_id, created_at, id)"""
+    query = (
+        select(*ANSWER_COLUMNS)
+        .where(ALL_ANSWERS.user_id == user_id)
+        .order_by(*keyset_ordering(ANSWER_PAGE_KEY, order))
+        .limit(limit + 1)
+    )
+    if since is not None:
+        query = query.where(ALL_ANSWERS.created_at >= since)
+    if until is not None:
+        query = query.where(ALL_ANSWERS.created_at < until)
+    if after is not None:
+        query = query.where(keyset_condition(ANSWER_PAGE_KEY, after, order))
+    return query
+
+
+def answer_insert_query(question_id: int, user_id: str, text: str) -> Insert:
+    """Вставка ответа, только если вопрос существует (INSERT ... SELECT ... WHERE EXISTS)"""
+    return (
+        insert(Answer)
+        .from_select(
+            ["question_id", "user_id", "text"],
+            select(
+                literal(question_id, Answer.question_id.type),
+                literal(user_id, Answer.user_id.type),
+                literal(text, Answer.text.type),
+            ).where(exists().where(Question.id == question_id)),
+        )
+        .returning(Answer.id, Answer.created_at)
+    )
+
+
+def answer_query(answer_id: int) -> Select:
+    return select(*ANSWER_COLUMNS).where(ALL_ANSWERS.id == answer_id)
+
+
+# Совпадение в ответе ранжируется ниже такого же совпадения в тексте вопроса
+SEARCH_ANSWER_WEIGHT = 0.5
+
+
+def _postgresql_search_matches(q: str, include_answers: bool) -> Subquery:
+    """(question_id, rank) по колонкам search_vector с GIN-индексами"""
+    tsquery = websearch_to_tsquery(SEARCH_CONFIG, q)
+    question_vector = literal_column("questions.search_vector", TSVECTOR)
+    matches = select(
+        Question.id.label("question_id"),
+        func.ts_rank_cd(question_vector, tsquery, type_=Float).label("rank"),
+    ).where(question_vector.bool_op("@@")(tsquery))
+    if include_answers:
+        answer_vector = literal_column("answers.search_vector", TSVECTOR)
+        matches = union_all(matches, select(
+            Answer.question_id,
+            func.ts_rank_cd(answer_vector, tsquery, type_=Float) * SEARCH_ANSWER_WEIGHT,
+        ).where(answer_vector.bool_op("@@")(tsquery)))
+    return matches.subquery("matches")
+
+
+def _sqlite_search_matches(q: str, include_answers: bool) -> Optional[Subquery]:
+    """(question_id, rank) по таблицам FTS5.
+
+    Скрытая колонка rank таблицы FTS5 - это bm25() (меньше - лучше), поэтому берется со знаком
+    минус. Вызов bm25() напрямую SQLite не разрешает во вложенном запросе с группировкой.
+    """
+    # Каждое слово в кавычках: синтаксис запросов FTS5 не должен зависеть от ввода пользователя
+    terms = " ".join(f'"{term}"' for term in re.findall(r"\w+", q))
+    if not terms:
+        return None
+
+    question_fts = table(FTS_TABLES["questions"], column("rowid", Integer), column("rank", Float))
+    matches = select(
+        question_fts.c.rowid.label("question_id"),
+        (-question_fts.c.rank).label("rank"),
+    ).where(literal_column(question_fts.name).op("MATCH")(terms))
+    if include_answers:
+        answer_fts = table(FTS_TABLES["answers"], column("rowid", Integer), column("rank", Float))
+        matches = union_all(matches, select(
+            Answer.question_id,
+            -answer_fts.c.rank * SEARCH_ANSWER_WEIGHT,
+        ).join_from(answer_fts, Answer, Answer.id == answer_fts.c.rowid).where(
+            literal_column(answer_fts.name).op("MATCH")(terms)
+        ))
+    return matches.subquery("matches")
+
+
+def question_search_query(
+    dialect: str, q: str, include_answers: bool, limit: int, after: Optional[Sequence]
+) -> Optional[Select]:
+    """Страница результатов поиска по убыванию (rank, id); None, если в запросе нет слов"""
+    if dialect == "sqlite":
+        matches = _sqlite_search_matches(q, include_answers)
+    else:
+        matches = _postgresql_search_matches(q, include_answers)
+    if matches is None:
+        return None
+
+    # Вопрос, найденный и по своему тексту, и по ответам, получает лучший из рангов
+    ranked = (
+        select(matches.c.question_id, func.max(matches.c.rank).label("rank"))
+        .group_by(matches.c.question_id)
+        .subquery("ranked")
+    )
+    key = (ranked.c.rank, Question.id)
+    query = (
+        select(*QUESTION_COLUMNS, ranked.c.rank)
+        .join(ranked, ranked.c.question_id == Question.id)
+        .order_by(*keyset_ordering(key, SortOrder.desc))
+        .limit(limit + 1)
+    )
+    if after is not None:
+        query = query.where(keyset_condition(key, after, SortOrder.desc))
+    return query
+
+
+def question_query(question_id: int) -> Select:
+    return select(*QUESTION_COLUMNS).where(Question.id == question_id)
+
+
+def answers_added_update(question_id: int, count: int, last_created_at: datetime) -> Update:
+    """Учесть добавленные ответы в агрегатах вопроса.
+
+    last_answer_at не уменьшается: транзакция с более ранним created_at может
+    завершиться позже конкурентной.
+    """
+    return (
+        update(Question)
+        .where(Question.id == question_id)
+        .values(
+            answer_count=Question.answer_count + count,
+            last_answer_at=case(
+                (or_(Question.last_answer_at.is_(None), Question.last_answer_at < last_created_at), last_created_at),
+                else_=Question.last_answer_at,
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def answers_removed_update(question_id: int, count: int = 1) -> Update:
+    """Учесть удаленные ответы; время последнего ответа берется из индексов (question_id, created_at, id)"""
+    return (
+        update(Question)
+        .where(Question.id == question_id)
+        .values(
+            answer_count=Question.answer_count - count,
+            last_answer_at=(
+                select(func.max(ALL_ANSWERS.created_at))
+                .where(ALL_ANSWERS.question_id == question_id)
+                .scalar_subquery()
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
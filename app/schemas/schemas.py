@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, ConfigDict, field_validator
-from datetime import datetime
-from typing import List
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
 
 
 class AnswerBase(BaseModel):
@@ -58,10 +59,78 @@ class QuestionCreate(QuestionBase):
 class Question(QuestionBase):
     id: int
     created_at: datetime
+    answer_count: int = 0
+    last_answer_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class QuestionSort(str, Enum):
+    created = "created"
+    active = "active"
+    unanswered = "unanswered"
+
+
+class QuestionPage(BaseModel):
+    items: List[Question]
+    next_cursor: Optional[str] = None
+
+
+class AnswerPage(BaseModel):
+    items: List[Answer]
+    next_cursor: Optional[str] = None
+
 
 class QuestionWithAnswers(Question):
-    answers: List[Answer] = Field(default_factory=list)
\ No newline at end of file
+    answers: List[Answer] = Field(default_factory=list)
+    answers_next_cursor: Optional[str] = None
+
+
+class QuestionSearchResult(Question):
+    rank: float
+
+
+class QuestionSearchPage(BaseModel):
+    items: List[QuestionSearchResult]
+    next_cursor: Optional[str] = None
+
+
+class QuestionExport(Question):
+    answers: List[Answer] = Field(default_factory=list)
+
+
+
+class BulkItemError(BaseModel):
+    index: int
+    detail: List[Dict[str, Any]]
+
+
+class QuestionBulkResult(BaseModel):
+    created: List[Question]
+    errors: List[BulkItemError] = Field(default_factory=list)
+
+
+class AnswerBulkResult(BaseModel):
+    created: List[Answer]
+    errors: List[BulkItemError] = Field(default_factory=list)
+
+
+class DailyStats(BaseModel):
+    day: date
+    answers: int
+    active_users: int
+
+
+class TopQuestionStats(BaseModel):
+    id: int
+    text: str
+    answer_count: int
+
+
+class Stats(BaseModel):
+    days: List[DailyStats]
+    top_questions: List[TopQuestionStats]
+    # Учтены ответы, созданные раньше fresh_until; None - статистика еще не рассчитана
+    fresh_until: Optional[datetime] = None
+    refreshed_at: Optional[datetime] = None
+    lag_seconds: Optional[float] = None
@@ -0,0 +1,77 @@
+"""Сериализация ответов чтения напрямую из строк запроса.
+
+Эндпоинты чтения выбирают кортежи колонок и превращают их в JSON заранее
+построенными сериализаторами, минуя загрузку ORM-сущностей и повторную валидацию
+через response_model. Результат побайтно совпадает с тем, что FastAPI отдает для
+схем из schemas.py: порядок ключей здесь повторяет порядок полей этих схем.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+
+class AnswerBody(TypedDict):
+    text: str
+    user_id: str
+    id: int
+    question_id: int
+    created_at: datetime
+
+
+class QuestionBody(TypedDict):
+    text: str
+    id: int
+    created_at: datetime
+    answer_count: int
+    last_answer_at: Optional[datetime]
+
+
+class QuestionPageBody(TypedDict):
+    items: List[QuestionBody]
+    next_cursor: Optional[str]
+
+
+class QuestionWithAnswersBody(TypedDict):
+    text: str
+    id: int
+    created_at: datetime
+    answer_count: int
+    last_answer_at: Optional[datetime]
+    answers: List[AnswerBody]
+    answers_next_cursor: Optional[str]
+
+
+_answer_adapter = TypeAdapter(AnswerBody)
+_question_page_adapter = TypeAdapter(QuestionPageBody)
+_question_with_answers_adapter = TypeAdapter(QuestionWithAnswersBody)
+
+
+def row_dict(row: Any) -> Dict[str, Any]:
+    """Строка результата в словарь; колонки запроса должны идти в порядке полей схемы"""
+    return row._asdict()
+
+
+def dump_answer(row: Any) -> str:
+    return _answer_adapter.dump_json(row_dict(row)).decode()
+
+
+def dump_question_page(rows: List[Any], next_cursor: Optional[str]) -> str:
+    body = {"items": [row_dict(row) for row in rows], "next_cursor": next_cursor}
+    return _question_page_adapter.dump_json(body).decode()
+
+
+def dump_question_with_answers(question: Any, answers: List[Any], answers_next_cursor: Optional[str]) -> str:
+    body = {
+        **row_dict(question),
+        "answers": [row_dict(row) for row in answers],
+        "answers_next_cursor": answers_next_cursor,
+    }
+    return _question_with_answers_adapter.dump_json(body).decode()
+
+
+def json_response(body: str, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Готовый JSON-ответ; заголовки совпадают с заголовками JSONResponse"""
+    return Response(content=body, media_type="application/json", headers=headers)
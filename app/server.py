@@ -0,0 +1,74 @@
+"""Запуск HTTP-сервера.
+
+Uvicorn запускает WEB_WORKERS процессов-воркеров (0 - по числу ядер). Воркеры
+стартуют через spawn и импортируют приложение заново, поэтому у каждого свои
+движки и пулы соединений; они создаются при импорте app.database и закрываются
+в lifespan. Этот модуль не импортирует приложение, чтобы процесс-супервизор
+не открывал соединений с БД.
+
+По SIGTERM воркеры перестают принимать соединения, до WEB_GRACEFUL_TIMEOUT секунд
+дожидаются запросов в обработке и только потом выполняют завершение lifespan.
+
+Состояние в памяти процесса воркеры не разделяют. Поэтому с несколькими воркерами
+кэш memory запрещен: инвалидация дошла бы только до одного процесса. Метрики
+prometheus_client пишутся в файлы каталога METRICS_MULTIPROC_DIR и суммируются при опросе /metrics.
+
+Пример:
+    WEB_WORKERS=4 python -m app.server
+"""
+import importlib.util
+import os
+import shutil
+from typing import Any, Dict
+
+import uvicorn
+
+from app.config import settings
+
+APP = "app.main:app"
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def worker_count() -> int:
+    return settings.WEB_WORKERS or os.cpu_count() or 1
+
+
+def uvicorn_options() -> Dict[str, Any]:
+    """Параметры uvicorn: цикл событий uvloop и парсер httptools, если они установлены"""
+    return {
+        "host": settings.WEB_HOST,
+        "port": settings.WEB_PORT,
+        "workers": worker_count(),
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "timeout_graceful_shutdown": settings.WEB_GRACEFUL_TIMEOUT,
+    }
+
+
+def prepare_workers(workers: int) -> None:
+    """Проверки и окружение для запуска нескольких воркеров"""
+    if workers <= 1:
+        return
+    if settings.CACHE_BACKEND == "memory":
+        raise SystemExit(
+            "CACHE_BACKEND=memory не поддерживается при нескольких воркерах: "
+            "инвалидация дойдет только до одного процесса. Используйте redis или none"
+        )
+    # Файлы метрик прошлого запуска содержат счетчики завершившихся процессов
+    shutil.rmtree(settings.METRICS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(settings.METRICS_MULTIPROC_DIR)
+    # Переменную читают воркеры при импорте prometheus_client
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = settings.METRICS_MULTIPROC_DIR
+
+
+def main() -> None:
+    options = uvicorn_options()
+    prepare_workers(options["workers"])
+    uvicorn.run(APP, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Пакетная запись ответов при всплесках нагрузки.
+
+При ANSWER_BATCHING_ENABLED запросы POST /questions/{id}/answers/ не занимают каждый
+свое соединение пула: ответы складываются в очередь процесса, и одна фоновая задача
+записывает их пачками - не больше ANSWER_BATCH_MAX_SIZE ответов и не дольше
+ANSWER_BATCH_MAX_DELAY_MS ожидания первого ответа пачки. Пачка пишется в одной
+транзакции: проверка вопросов, многострочный INSERT ... RETURNING и обновление
+агрегатов вопросов. Каждый вызывающий получает свою строку (id, created_at)
+или None, если вопроса нет.
+"""
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.models import Answer, Question
+from app.queries import answers_added_update
+from app.schemas.schemas import AnswerCreate
+from app.utils.logger import logger
+
+_batcher: Optional["AnswerBatcher"] = None
+
+
+@dataclass
+class _PendingAnswer:
+    question_id: int
+    answer: AnswerCreate
+    future: asyncio.Future
+
+
+class AnswerBatcher:
+    def __init__(self, sessionmaker: async_sessionmaker[AsyncSession], max_size: int, max_delay: float):
+        self.sessionmaker = sessionmaker
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.batches = 0
+        self._pending: List[_PendingAnswer] = []
+        self._ready = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    async def submit(self, question_id: int, answer: AnswerCreate) -> Optional[Any]:
+        """Поставить ответ в очередь и дождаться записи его пачки.
+
+        Возвращает строку с id и created_at или None, если вопрос не найден.
+        Ошибка записи пачки пробрасывается всем ее участникам.
+        """
+        if self._closing:
+            raise RuntimeError("Пакетная запись ответов остановлена")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(_PendingAnswer(question_id, answer, future))
+        self._ready.set()
+        if len(self._pending) >= self.max_size:
+            self._full.set()
+        return await future
+
+    async def close(self) -> None:
+        """Записать накопленные ответы и остановить фоновую задачу"""
+        self._closing = True
+        self._ready.set()
+        self._full.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self._ready.wait()
+            if not self._pending and self._closing:
+                return
+            if len(self._pending) < self.max_size and not self._closing:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch, self._pending = self._pending[:self.max_size], self._pending[self.max_size:]
+            if len(self._pending) < self.max_size and not self._closing:
+                self._full.clear()
+                if not self._pending:
+                    self._ready.clear()
+            await self._write(batch)
+
+    async def _write(self, batch: List[_PendingAnswer]) -> None:
+        # Клиент мог отключиться, пока ответ ждал в очереди
+        batch = [item for item in batch if not item.future.done()]
+        if not batch:
+            return
+
+        results: Dict[int, Any] = {}
+        try:
+            async with self.sessionmaker() as session:
+                question_ids = sorted({item.question_id for item in batch})
+                # FOR KEY SHARE не дает удалить вопрос до конца транзакции,
+                # но не мешает конкурентным вставкам ответов в него
+                existing = set((await session.scalars(
+                    select(Question.id)
+                    .where(Question.id.in_(question_ids))
+                    .order_by(Question.id)
+                    .with_for_update(read=True, key_share=True)
+                )).all())
+
+                accepted = [item for item in batch if item.question_id in existing]
+                if accepted:
+                    result = await session.execute(
+                        insert(Answer).returning(Answer.id, Answer.created_at, sort_by_parameter_order=True),
+                        [
+                            {"question_id": item.question_id, "user_id": item.answer.user_id, "text": item.answer.text}
+                            for item in accepted
+                        ],
+                    )
+                    rows = result.all()
+                    counts: Counter = Counter()
+                    latest: Dict[int, datetime] = {}
+                    for item, row in zip(accepted, rows):
+                        results[id(item)] = row
+                        counts[item.question_id] += 1
+                        latest[item.question_id] = max(latest.get(item.question_id, row.created_at), row.created_at)
+                    # Вопросы обновляются в порядке id, чтобы параллельные пачки процессов не взаимоблокировались
+                    for question_id in sorted(counts):
+                        await session.execute(answers_added_update(question_id, counts[question_id], latest[question_id]))
+                    await session.commit()
+        except Exception as e:
+            logger.error(f"Ошибка записи пачки из {len(batch)} ответов: {e}")
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        self.batches += 1
+        for item in batch:
+            if not item.future.done():
+                item.future.set_result(results.get(id(item)))
+
+
+def get_answer_batcher() -> Optional[AnswerBatcher]:
+    """Общий для процесса пакетировщик ответов или None, если режим выключен"""
+    global _batcher
+    if not settings.ANSWER_BATCHING_ENABLED:
+        return None
+    if _batcher is None:
+        _batcher = AnswerBatcher(
+            AsyncSessionLocal, settings.ANSWER_BATCH_MAX_SIZE, settings.ANSWER_BATCH_MAX_DELAY_MS / 1000
+        )
+    return _batcher
+
+
+async def close_answer_batcher() -> None:
+    global _batcher
+    if _batcher is not None:
+        await _batcher.close()
+        _batcher = None
@@ -0,0 +1,30 @@
+from typing import Any, Iterable, List, Tuple, Type, TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+
+from app.schemas.schemas import BulkItemError
+
+BULK_MAX_ITEMS = 1000
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def validate_bulk(model: Type[ModelT], items: Iterable[Any]) -> Tuple[List[ModelT], List[BulkItemError]]:
+    """Валидирует элементы пакета за один проход, собирая ошибки по каждому элементу"""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append(model.model_validate(item))
+        except ValidationError as e:
+            errors.append(BulkItemError(
+                index=index,
+                detail=e.errors(include_url=False, include_context=False),
+            ))
+
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[error.model_dump() for error in errors],
+        )
+    return valid, errors
@@ -0,0 +1,169 @@
+"""Адаптивное ограничение одновременных запросов и сброс нагрузки.
+
+Когда БД замедляется, запросы копятся в ожидании соединения пула, и задержка растет
+без границ. Middleware ограничивает число запросов в обработке отдельно для чтений
+и записей, держит ограниченную очередь ожидания и сразу отвечает 503 с Retry-After,
+когда очередь заполнена или ожидание в ней затянулось.
+
+Лимит подбирается по схеме AIMD: каждый быстрый запрос увеличивает его на 1/limit
+(около +1 за «круг» запросов), а запрос дольше целевой задержки или ответ 5xx
+уменьшает в CONCURRENCY_BACKOFF раз, не чаще одного раза за целевую задержку.
+Потоковые ответы (без Content-Length, например выгрузка) занимают место, но на лимит
+не влияют: их длительность определяется объемом данных, а не нагрузкой на БД.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+from starlette.responses import JSONResponse
+
+from app.config import settings
+from app.utils.metrics import HTTP_CONCURRENCY_LIMIT, HTTP_REQUESTS_SHED
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Служебные эндпоинты не ограничиваются: балансировщик и Prometheus должны видеть сервис под нагрузкой
+EXEMPT_PATHS = ("/live", "/ready", "/health", "/metrics")
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        queue_size: int,
+        queue_timeout: float,
+        latency_target: float,
+        backoff: float = 0.9,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.in_flight = 0
+        self._clock = clock
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = float("-inf")
+        HTTP_CONCURRENCY_LIMIT.labels(name).set(int(self.limit))
+
+    async def acquire(self) -> bool:
+        """Занять место; False - запрос нужно отклонить"""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Место могли передать одновременно с истечением ожидания: in_flight уже увеличен
+            return waiter.done() and not waiter.cancelled()
+        except asyncio.CancelledError:
+            # Клиент отключился уже после того, как ему передали место
+            if waiter.done() and not waiter.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        # Место передано освобождающим запросом, in_flight уже увеличен
+        return True
+
+    def release(self, latency: Optional[float], overloaded: bool) -> None:
+        """Освободить место и скорректировать лимит по задержке обработки (None - без учета задержки)"""
+        self.in_flight -= 1
+        now = self._clock()
+        if overloaded or (latency is not None and latency > self.latency_target):
+            # Запросы одной «волны» завершаются почти одновременно: уменьшаем лимит один раз за волну
+            if now - self._last_decrease >= self.latency_target:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        elif latency is not None:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        HTTP_CONCURRENCY_LIMIT.labels(self.name).set(int(self.limit))
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+def create_limiters() -> Dict[str, AdaptiveLimiter]:
+    return {
+        name: AdaptiveLimiter(
+            name,
+            initial_limit=settings.CONCURRENCY_INITIAL_LIMIT,
+            min_limit=settings.CONCURRENCY_MIN_LIMIT,
+            max_limit=settings.CONCURRENCY_MAX_LIMIT,
+            queue_size=settings.CONCURRENCY_QUEUE_SIZE,
+            queue_timeout=settings.CONCURRENCY_QUEUE_TIMEOUT_MS / 1000,
+            latency_target=target / 1000,
+            backoff=settings.CONCURRENCY_BACKOFF,
+        )
+        for name, target in (
+            ("read", settings.CONCURRENCY_READ_LATENCY_TARGET_MS),
+            ("write", settings.CONCURRENCY_WRITE_LATENCY_TARGET_MS),
+        )
+    }
+
+
+class ConcurrencyLimitMiddleware:
+    """ASGI-middleware адаптивного лимита одновременных запросов (включается CONCURRENCY_LIMIT_ENABLED)"""
+
+    def __init__(self, app, limiters: Optional[Dict[str, AdaptiveLimiter]] = None):
+        self.app = app
+        self.limiters = limiters
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not (settings.CONCURRENCY_LIMIT_ENABLED or self.limiters)
+            or scope["path"].startswith(EXEMPT_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if self.limiters is None:
+            self.limiters = create_limiters()
+        limiter = self.limiters["read" if scope["method"] in READ_METHODS else "write"]
+
+        if not await limiter.acquire():
+            HTTP_REQUESTS_SHED.labels(limiter.name).inc()
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Сервис перегружен, повторите запрос позже"},
+                headers={"Retry-After": str(settings.CONCURRENCY_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = 500
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                streaming = not any(name.lower() == b"content-length" for name, _ in message.get("headers", []))
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            latency = None if streaming else time.perf_counter() - start
+            limiter.release(latency, overloaded=status_code >= 500)
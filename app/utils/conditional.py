@@ -0,0 +1,45 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """Строгий ETag из значений, однозначно определяющих содержимое ответа"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        # SQLite возвращает время без часового пояса, оно хранится в UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[str]) -> Dict[str, str]:
+    headers = {"ETag": etag}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Проверка If-None-Match.
+
+    If-Modified-Since для 304 не используется: удаление ответа меняет содержимое,
+    но не сдвигает Last-Modified, поэтому надежен только ETag.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def not_modified_response(etag: str, last_modified: Optional[str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validator_headers(etag, last_modified))
@@ -1,9 +1,144 @@
-from loguru import logger
+import asyncio
+import json
+import random
 import sys
+import threading
+import time
+import traceback
+from typing import Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
+
+TEXT_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"
+
+
+def json_format(record) -> str:
+    """Одна строка JSON на сообщение (компактнее встроенного serialize=True)"""
+    payload = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "module": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+    }
+    payload.update((key, value) for key, value in record["extra"].items() if key not in ("sampled", "json"))
+    if record["exception"] is not None:
+        payload["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"]["json"] = json.dumps(payload, ensure_ascii=False, default=str)
+    return "{extra[json]}\n"
+
+
+class WarningRateLimiter:
+    """Token bucket на каждое место вызова для предупреждений.
+
+    Место вызова (модуль, функция, строка), а не текст сообщения: 404 на разные id
+    дают разные сообщения из одной строки кода. Сообщения сверх лимита отбрасываются,
+    их количество дописывается к следующему пропущенному сообщению с того же места,
+    а если оно не приходит - выводится фоновой задачей run_suppressed_reporter.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._buckets: Dict[Tuple, Tuple[float, float]] = {}
+        self._suppressed: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record) -> bool:
+        if record["level"].name != "WARNING":
+            return True
+
+        site = (record["name"], record["function"], record["line"])
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(site, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[site] = (tokens, now)
+                self._suppressed[site] = self._suppressed.get(site, 0) + 1
+                return False
+            self._buckets[site] = (tokens - 1, now)
+            suppressed = self._suppressed.pop(site, 0)
+
+        if suppressed:
+            record["message"] += f" (пропущено похожих сообщений: {suppressed})"
+        return True
+
+    def pop_suppressed(self) -> Dict[Tuple, int]:
+        with self._lock:
+            suppressed, self._suppressed = self._suppressed, {}
+        return suppressed
+
+
+class Sampler:
+    """Пропускает долю rate сообщений, помеченных logger.bind(sampled=True)"""
+
+    def __init__(self, rate: float, rand: Callable[[], float] = random.random):
+        self.rate = rate
+        self._rand = rand
+
+    def __call__(self, record) -> bool:
+        if not record["extra"].get("sampled") or self.rate >= 1:
+            return True
+        return self._rand() < self.rate
+
+
+class LogFilter:
+    def __init__(self, sampler: Sampler, limiter: WarningRateLimiter):
+        self.sampler = sampler
+        self.limiter = limiter
+
+    def __call__(self, record) -> bool:
+        return self.sampler(record) and self.limiter(record)
+
+
+_filter = LogFilter(
+    Sampler(settings.LOG_SAMPLE_RATE),
+    WarningRateLimiter(settings.LOG_WARNING_RATE, settings.LOG_WARNING_BURST),
+)
+
+
+def setup_logging() -> None:
+    """Настраивает вывод логов.
+
+    При LOG_ENQUEUE запись в stdout выполняет фоновый поток, и обработчик запроса
+    не блокируется на вводе-выводе. При LOG_JSON каждая строка - JSON-объект.
+    """
+    logger.remove()
+    limiter_enabled = settings.LOG_WARNING_RATE > 0
+    logger.add(
+        sys.stdout,
+        format=json_format if settings.LOG_JSON else TEXT_FORMAT,
+        level=settings.LOG_LEVEL,
+        enqueue=settings.LOG_ENQUEUE,
+        filter=_filter if limiter_enabled else _filter.sampler,
+    )
+
+
+def log_suppressed_summary(limiter: Optional[WarningRateLimiter] = None) -> None:
+    """Сообщает о предупреждениях, подавленных после последнего пропущенного сообщения"""
+    for (name, function, line), count in (limiter or _filter.limiter).pop_suppressed().items():
+        logger.info(f"Подавлено предупреждений в {name}:{function}:{line}: {count}")
+
+
+async def run_suppressed_reporter(interval: float, limiter: Optional[WarningRateLimiter] = None) -> None:
+    """Раз в interval сообщает о подавленных предупреждениях мест, которые затихли после всплеска"""
+    while True:
+        await asyncio.sleep(interval)
+        log_suppressed_summary(limiter)
+
+
+async def shutdown_logging() -> None:
+    log_suppressed_summary()
+    # Дожидаемся, пока фоновый поток запишет накопленные сообщения
+    await logger.complete()
+
+
+setup_logging()
 
-logger.remove()
-logger.add(
-    sys.stdout,
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
-    level="INFO"
-                )
\ No newline at end of file
+# Логгер для частых INFO-событий: сообщения пропускаются с вероятностью LOG_SAMPLE_RATE
+sampled_logger = logger.bind(sampled=True)
@@ -0,0 +1,196 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.utils.profiling import current_profile
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Длительность обработки HTTP-запроса",
+    ["method", "route"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Количество запросов в обработке",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+HTTP_REQUESTS = Counter(
+    "http_requests",
+    "Количество обработанных HTTP-запросов",
+    ["method", "route", "status"],
+)
+HTTP_CONCURRENCY_LIMIT = Gauge(
+    "http_concurrency_limit",
+    "Текущий адаптивный лимит одновременных запросов",
+    ["route_class"],
+    # Лимит у каждого воркера свой: в режиме нескольких процессов ряды получают метку pid
+    multiprocess_mode="liveall",
+)
+HTTP_REQUESTS_SHED = Counter(
+    "http_requests_shed",
+    "Запросы, отклоненные ответом 503 из-за перегрузки",
+    ["route_class"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Время выполнения SQL-запроса",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK"}
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: латентность, статусы и запросы в обработке.
+
+    Маршрут берется из шаблона пути ("/questions/{question_id}"), а не из URL,
+    чтобы число временных рядов не росло вместе с количеством вопросов.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            in_flight.dec()
+            # Роутер FastAPI дописывает найденный маршрут в scope
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            HTTP_REQUEST_DURATION.labels(method, path).observe(duration)
+            HTTP_REQUESTS.labels(method, path, str(status_code)).inc()
+
+
+def _operation(statement: str) -> str:
+    words = statement.lstrip()[:10].split(None, 1)
+    operation = words[0].upper() if words else ""
+    return operation if operation in SQL_OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подписывает гистограмму времени SQL-запросов и профиль запроса на события движка"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Соединение выполняет запросы последовательно; отметка упавшего запроса
+        # просто перезаписывается следующим
+        conn.info["query_start_time"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start_time"]
+        DB_QUERY_DURATION.labels(_operation(statement)).observe(duration)
+        profile = current_profile()
+        if profile is not None:
+            profile.record_query(statement, duration)
+
+
+class PoolCollector:
+    """Снимает состояние пулов соединений в момент опроса /metrics"""
+
+    def describe(self):
+        # Без describe реестр вызвал бы collect при регистрации, до создания движков
+        return []
+
+    def collect(self):
+        from app.database import engine, pool_stats, replica_engines
+
+        gauges = {
+            name: GaugeMetricFamily(f"db_pool_{name}", description, labels=["pool"])
+            for name, description in (
+                ("size", "Размер пула соединений"),
+                ("checked_out", "Выданные из пула соединения"),
+                ("checked_in", "Свободные соединения в пуле"),
+                ("overflow", "Соединения сверх размера пула"),
+            )
+        }
+        timeouts = CounterMetricFamily("db_pool_checkout_timeouts", "Таймауты ожидания соединения", labels=["pool"])
+        wait = CounterMetricFamily(
+            "db_pool_checkout_wait_seconds", "Суммарное время получения соединения из пула", labels=["pool"]
+        )
+
+        pools = [("primary", engine)] + [(f"replica{index}", replica) for index, replica in enumerate(replica_engines)]
+        for label, pool_engine in pools:
+            stats = pool_stats(pool_engine.pool)
+            for name, gauge in gauges.items():
+                if name in stats:
+                    gauge.add_metric([label], stats[name])
+            if "timeouts" in stats:
+                timeouts.add_metric([label], stats["timeouts"])
+                wait.add_metric([label], pool_engine.pool.wait_total)
+
+        yield from gauges.values()
+        yield timeouts
+        yield wait
+
+
+class CacheCollector:
+    """Счетчики кэша этого процесса"""
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        from app.cache import cache_backend as cache
+
+        for name in ("hits", "misses", "evictions"):
+            metric = CounterMetricFamily(f"cache_{name}", f"Кэш: {name}", labels=["backend"])
+            metric.add_metric([cache.name], getattr(cache.stats, name))
+            yield metric
+
+
+REGISTRY.register(PoolCollector())
+REGISTRY.register(CacheCollector())
+
+
+def multiprocess_dir() -> str:
+    """Каталог метрик воркеров; задан app.server при запуске нескольких процессов"""
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR", "")
+
+
+def render_metrics() -> bytes:
+    if not multiprocess_dir():
+        return generate_latest(REGISTRY)
+    # Метрики всех воркеров из файлов каталога; пулы и кэш - процесса, ответившего на запрос
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(PoolCollector())
+    registry.register(CacheCollector())
+    return generate_latest(registry)
+
+
+def shutdown_metrics() -> None:
+    """Убирает live-метрики завершающегося воркера из суммы по процессам"""
+    if multiprocess_dir():
+        multiprocess.mark_process_dead(os.getpid())
+
+
+__all__ = ["CONTENT_TYPE_LATEST", "MetricsMiddleware", "instrument_engine", "render_metrics", "shutdown_metrics"]
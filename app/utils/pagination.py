@@ -0,0 +1,79 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class SortOrder(str, Enum):
+    asc = "asc"
+    desc = "desc"
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(*values: Any) -> str:
+    """Упаковывает значения ключа последней записи страницы в непрозрачный курсор"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """Распаковывает курсор и приводит значения к ожидаемым типам"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError("Некорректный курсор") from e
+
+    if not isinstance(payload, list) or len(payload) != len(types):
+        raise InvalidCursorError("Некорректный курсор")
+
+    values = []
+    for value, expected in zip(payload, types):
+        try:
+            if expected is datetime:
+                value = datetime.fromisoformat(value)
+            elif expected is float and isinstance(value, int):
+                value = float(value)
+            elif not isinstance(value, expected) or isinstance(value, bool):
+                raise TypeError(value)
+        except (TypeError, ValueError) as e:
+            raise InvalidCursorError("Некорректный курсор") from e
+        values.append(value)
+    return tuple(values)
+
+
+def keyset_condition(columns: Sequence, values: Sequence, order: SortOrder):
+    """Условие (col1, col2, ...) > (v1, v2, ...) для продолжения выборки после курсора"""
+    if order == SortOrder.desc:
+        return tuple_(*columns) < tuple(values)
+    return tuple_(*columns) > tuple(values)
+
+
+def keyset_ordering(columns: Sequence, order: SortOrder) -> list:
+    return [column.desc() if order == SortOrder.desc else column.asc() for column in columns]
+
+
+def split_page(
+    rows: Sequence, limit: int, key: Callable[[Any], Sequence] = lambda row: (row.created_at, row.id)
+) -> Tuple[List, Optional[str]]:
+    """Отрезает лишнюю запись, выбранную запросом с limit + 1, и строит курсор следующей страницы"""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+def parse_cursor(cursor: Optional[str], *types: type) -> Optional[tuple]:
+    return None if cursor is None else decode_cursor(cursor, *types)
@@ -0,0 +1,181 @@
+import asyncio
+import functools
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+from fastapi.routing import APIRoute
+
+from app.config import settings
+from app.utils.logger import logger
+
+PROFILE_HEADER = b"x-profile"
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+
+@dataclass
+class RequestProfile:
+    """Время и SQL-запросы одного HTTP-запроса (или блока кода в тесте).
+
+    db - суммарное время выполнения SQL, endpoint - время функции эндпоинта вместе с его
+    запросами, handler - обработка маршрута целиком: разбор тела запроса, зависимости
+    (в том числе выдача сессии БД и ее закрытие) и сериализация ответа через response_model.
+    """
+
+    repeat_threshold: int = field(default_factory=lambda: settings.PROFILING_REPEAT_THRESHOLD)
+    query_count: int = 0
+    db_time: float = 0.0
+    endpoint_time: float = 0.0
+    handler_time: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def record_query(self, statement: str, duration: float) -> None:
+        self.query_count += 1
+        self.db_time += duration
+        self.statements[statement] += 1
+
+    @property
+    def orm_time(self) -> float:
+        """Время эндпоинта без SQL: построение запросов, загрузка сущностей, бизнес-логика"""
+        return max(self.endpoint_time - self.db_time, 0.0)
+
+    @property
+    def framework_time(self) -> float:
+        """Обработка маршрута вне эндпоинта: разбор запроса, зависимости, сериализация ответа"""
+        return max(self.handler_time - self.endpoint_time, 0.0)
+
+    @property
+    def repeated_queries(self) -> Dict[str, int]:
+        """Одинаковые по структуре запросы, выполненные repeat_threshold и более раз (признак N+1).
+
+        Параметры передаются отдельно от текста, поэтому запросы, различающиеся
+        только значениями (ленивые загрузки Answer.question), дают один и тот же текст.
+        """
+        return {
+            statement: count
+            for statement, count in self.statements.items()
+            if count >= self.repeat_threshold
+        }
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        metrics = [
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.query_count} queries"',
+            f"orm;dur={self.orm_time * 1000:.2f}",
+            f"framework;dur={self.framework_time * 1000:.2f}",
+        ]
+        if total is not None:
+            metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current_profile.get()
+
+
+@contextmanager
+def profile_queries(repeat_threshold: Optional[int] = None) -> Iterator[RequestProfile]:
+    """Собирает профиль всех запросов к БД внутри блока.
+
+    В тестах позволяет проверить бюджет запросов эндпоинта:
+
+        with profile_queries() as profile:
+            await client.get("/questions/1")
+        assert profile.query_count <= 2
+    """
+    profile = RequestProfile()
+    if repeat_threshold is not None:
+        profile.repeat_threshold = repeat_threshold
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+def warn_repeated_queries(profile: RequestProfile, target: str) -> None:
+    for statement, count in profile.repeated_queries.items():
+        logger.warning(f"Повторяющийся запрос ({count} раз) в {target}, возможна проблема N+1: {statement}")
+
+
+class ProfilingRoute(APIRoute):
+    """Маршрут, который отмечает в профиле время эндпоинта и обработки целиком.
+
+    Без активного профиля добавляет только чтение contextvar на запрос.
+    """
+
+    def get_route_handler(self):
+        call = self.dependant.call
+
+        @functools.wraps(call)
+        async def profiled_call(*args, **kwargs):
+            profile = _current_profile.get()
+            if profile is None:
+                return await call(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                profile.endpoint_time += time.perf_counter() - start
+
+        # Все эндпоинты сервиса асинхронные; синхронные FastAPI запускает в пуле потоков,
+        # и обертка-корутина изменила бы это поведение
+        if asyncio.iscoroutinefunction(call):
+            self.dependant.call = profiled_call
+        handler = super().get_route_handler()
+
+        async def profiled_handler(request):
+            profile = _current_profile.get()
+            if profile is None:
+                return await handler(request)
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                profile.handler_time += time.perf_counter() - start
+
+        return profiled_handler
+
+
+class ProfilingMiddleware:
+    """ASGI-middleware режима профилирования.
+
+    Включается для всех запросов настройкой PROFILING_ENABLED или для отдельного
+    запроса заголовком X-Profile: 1, если это разрешено PROFILING_ALLOW_HEADER.
+    Результат отдается в заголовке Server-Timing.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _enabled(self, scope) -> bool:
+        if settings.PROFILING_ENABLED:
+            return True
+        if not settings.PROFILING_ALLOW_HEADER:
+            return False
+        return any(
+            name == PROFILE_HEADER and value.lower() in (b"1", b"true")
+            for name, value in scope["headers"]
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._enabled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                timing = profile.server_timing(time.perf_counter() - start)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        with profile_queries() as profile:
+            await self.app(scope, receive, send_wrapper)
+        warn_repeated_queries(profile, f"{scope['method']} {scope['path']}")
@@ -0,0 +1,202 @@
+"""Предрассчитанная статистика ответов для GET /stats.
+
+Ответы по дням, активные пользователи по дням и самые обсуждаемые вопросы хранятся
+в таблицах stats_*, чтобы дашборды не выполняли агрегаты по всем ответам рядом с живым
+трафиком. Обновление инкрементальное: читаются только ответы с created_at в
+[watermark, now - lag), после чего watermark сдвигается на правую границу:
+
+- stats_answers_daily.answers увеличивается на число новых ответов дня;
+- в stats_user_days добавляются новые пары (день, пользователь), по ним пересчитывается
+  active_users затронутых дней;
+- stats_top_questions заново выбирается по answer_count среди прежних лидеров
+  и вопросов, получивших новые ответы.
+
+created_at ответа - время начала транзакции вставки, и ответ становится виден только
+после ее фиксации. Задержка lag оставляет таким транзакциям время завершиться.
+Удаления ответов инкрементально не вычитаются: полный пересчет выполняет
+python -m app.commands.refresh_stats --rebuild.
+
+Строка stats_watermark блокируется на время обновления, поэтому фоновые задачи
+нескольких воркеров не учитывают одни и те же ответы дважды.
+
+Фоновая задача учитывает за одну транзакцию не больше REFRESH_CHUNK ответов по времени
+и, пока не догонит now - lag, сразу берет следующий отрезок. Поэтому первый расчет по
+накопленным ответам (миграция ставит watermark на самый старый ответ) идет короткими
+блокировками, а не одним агрегатом по всей таблице.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, exists, func, insert, select, union, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.config import settings
+from app.models.base import utc_date
+from app.models.models import AnswerDailyStats, Question, StatsWatermark, TopQuestion, UserDailyActivity
+from app.queries import ALL_ANSWERS
+from app.utils.logger import logger
+
+STATS_ID = 1
+# Наибольший отрезок created_at, который фоновая задача учитывает за одну транзакцию
+REFRESH_CHUNK = timedelta(days=1)
+
+
+@dataclass
+class RefreshStats:
+    answers: int = 0
+    days: int = 0
+    watermark: Optional[datetime] = None
+    seconds: float = 0.0
+    # False, если отрезок ограничен max_window и до now - lag остались ответы
+    complete: bool = True
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Время в UTC; время без часового пояса (так его возвращает SQLite) считается UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+async def _lock_watermark(conn: AsyncConnection) -> Optional[datetime]:
+    result = await conn.execute(
+        select(StatsWatermark.watermark).where(StatsWatermark.id == STATS_ID).with_for_update()
+    )
+    row = result.one_or_none()
+    if row is None:
+        # В PostgreSQL строку создает миграция; здесь - для БД, созданных по моделям
+        await conn.execute(insert(StatsWatermark).values(id=STATS_ID))
+        return None
+    return as_utc(row.watermark)
+
+
+async def _add_answers(conn: AsyncConnection, window: list) -> tuple:
+    """Добавляет к дневной статистике ответы окна; возвращает (число ответов, число дней)"""
+    day = utc_date(ALL_ANSWERS.created_at)
+    counts = (await conn.execute(select(day, func.count()).where(*window).group_by(day))).all()
+    for answer_day, count in counts:
+        result = await conn.execute(
+            update(AnswerDailyStats)
+            .where(AnswerDailyStats.day == answer_day)
+            .values(answers=AnswerDailyStats.answers + count)
+        )
+        if result.rowcount == 0:
+            await conn.execute(insert(AnswerDailyStats).values(day=answer_day, answers=count, active_users=0))
+
+    users = select(day.label("day"), ALL_ANSWERS.user_id).where(*window).distinct().subquery()
+    await conn.execute(
+        insert(UserDailyActivity).from_select(
+            ["day", "user_id"],
+            select(users.c.day, users.c.user_id).where(
+                ~exists().where(UserDailyActivity.day == users.c.day, UserDailyActivity.user_id == users.c.user_id)
+            ),
+        )
+    )
+    days = [answer_day for answer_day, _ in counts]
+    if days:
+        active_users = (
+            select(func.count()).where(UserDailyActivity.day == AnswerDailyStats.day).scalar_subquery()
+        )
+        await conn.execute(
+            update(AnswerDailyStats).where(AnswerDailyStats.day.in_(days)).values(active_users=active_users)
+        )
+    return sum(count for _, count in counts), len(days)
+
+
+async def _update_top_questions(conn: AsyncConnection, window: list, top_size: int) -> None:
+    """Лидеры выбираются по answer_count среди прежних лидеров и вопросов с новыми ответами"""
+    candidates = union(
+        select(ALL_ANSWERS.question_id).where(*window),
+        select(TopQuestion.question_id),
+    )
+    rows = (await conn.execute(
+        select(Question.id, Question.answer_count)
+        .where(Question.id.in_(candidates), Question.answer_count > 0)
+        .order_by(Question.answer_count.desc(), Question.id)
+        .limit(top_size)
+    )).all()
+    await conn.execute(delete(TopQuestion))
+    if rows:
+        await conn.execute(
+            insert(TopQuestion), [{"question_id": row.id, "answer_count": row.answer_count} for row in rows]
+        )
+
+
+async def refresh_stats(
+    engine: AsyncEngine,
+    top_size: Optional[int] = None,
+    lag_seconds: Optional[float] = None,
+    now: Optional[datetime] = None,
+    rebuild: bool = False,
+    max_window: Optional[timedelta] = None,
+) -> RefreshStats:
+    """Учитывает ответы, созданные после watermark; rebuild пересчитывает статистику с нуля.
+
+    max_window ограничивает отрезок [watermark, now - lag); пустой watermark тогда
+    заменяется временем самого старого ответа.
+    """
+    started = time.perf_counter()
+    top_size = settings.STATS_TOP_QUESTIONS if top_size is None else top_size
+    lag_seconds = settings.STATS_REFRESH_LAG_SECONDS if lag_seconds is None else lag_seconds
+    now = now or datetime.now(timezone.utc)
+    upper = now - timedelta(seconds=lag_seconds)
+    stats = RefreshStats()
+
+    async with engine.begin() as conn:
+        lower = await _lock_watermark(conn)
+        if rebuild:
+            for model in (AnswerDailyStats, UserDailyActivity, TopQuestion):
+                await conn.execute(delete(model))
+            lower = None
+        elif lower is not None and lower > upper:
+            # Задержку увеличили после прошлого обновления: граница не сдвигается назад
+            upper = lower
+        if max_window is not None:
+            if lower is None:
+                lower = as_utc(await conn.scalar(select(func.min(ALL_ANSWERS.created_at)))) or upper
+            if lower + max_window < upper:
+                upper = lower + max_window
+                stats.complete = False
+
+        window = [ALL_ANSWERS.created_at < upper]
+        if lower is not None:
+            window.append(ALL_ANSWERS.created_at >= lower)
+        stats.answers, stats.days = await _add_answers(conn, window)
+        await _update_top_questions(conn, window, top_size)
+        stats.watermark = upper
+        await conn.execute(
+            update(StatsWatermark)
+            .where(StatsWatermark.id == STATS_ID)
+            .values(watermark=stats.watermark, refreshed_at=now)
+        )
+
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+async def run_stats_refresher(engine: AsyncEngine, interval: float) -> None:
+    """Фоновое обновление статистики; ошибка обновления не останавливает цикл.
+
+    Первое обновление - через interval после запуска, чтобы не конкурировать с прогревом пулов.
+    Отставание больше REFRESH_CHUNK догоняется отрезками подряд, без ожидания interval.
+    """
+    complete = True
+    while True:
+        if complete:
+            await asyncio.sleep(interval)
+        try:
+            stats = await refresh_stats(engine, max_window=REFRESH_CHUNK)
+        except Exception as e:
+            logger.warning(f"Статистика не обновлена: {e}")
+            complete = True
+            continue
+        complete = stats.complete
+        logger.debug(
+            f"Статистика обновлена до {stats.watermark:%Y-%m-%d %H:%M:%S}: ответов {stats.answers}, "
+            f"дней {stats.days} за {stats.seconds * 1000:.0f} мс"
+        )
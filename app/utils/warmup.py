@@ -0,0 +1,122 @@
+"""Прогрев пулов соединений после запуска.
+
+Первые запросы после деплоя открывают соединения asyncpg и подготавливают выражения
+с нуля. Прогрев заранее открывает DB_WARMUP_CONNECTIONS соединений каждого пула
+и выполняет на каждом горячие запросы эндпоинтов вопросов и ответов: подготовленные
+выражения попадают в кэш соединения, а скомпилированный SQL - в кэш движка.
+Запросы выполняются с несуществующими id и в откатываемой транзакции, данные не меняются.
+"""
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import Executable, exists, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.models.models import Question
+from app.queries import (
+    answer_insert_query, answer_page_query, answer_query, answers_added_update, answers_removed_update,
+    question_page_query, question_query, user_answer_page_query,
+)
+from app.schemas.schemas import QuestionSort
+from app.utils.logger import logger
+from app.utils.pagination import DEFAULT_PAGE_SIZE, SortOrder
+
+# Id, которого нет в таблицах: запросы выполняются, но ничего не находят и не меняют
+MISSING_ID = 0
+MISSING_USER_ID = ""
+
+
+@dataclass
+class WarmupStats:
+    connections: int = 0
+    statements: int = 0
+    seconds: float = 0.0
+
+
+def read_statements() -> List[Executable]:
+    """Запросы эндпоинтов чтения, в том числе с курсором: у них другой текст SQL"""
+    after = (datetime.now(timezone.utc), MISSING_ID)
+    statements: List[Executable] = [
+        question_page_query(DEFAULT_PAGE_SIZE, cursor, order, sort)
+        for sort in QuestionSort
+        for order in SortOrder
+        for cursor in (None, after)
+    ]
+    statements += [
+        answer_page_query(MISSING_ID, DEFAULT_PAGE_SIZE, cursor, order)
+        for order in SortOrder
+        for cursor in (None, after)
+    ]
+    statements += [
+        user_answer_page_query(MISSING_USER_ID, DEFAULT_PAGE_SIZE, cursor, order)
+        for order in SortOrder
+        for cursor in (None, after)
+    ]
+    statements += [question_query(MISSING_ID), answer_query(MISSING_ID)]
+    return statements
+
+
+def write_statements() -> List[Executable]:
+    """Запросы создания и удаления ответов, которые ничего не меняют для несуществующего вопроса"""
+    return [
+        answer_insert_query(MISSING_ID, "warmup", "warmup"),
+        answers_added_update(MISSING_ID, 1, datetime.now(timezone.utc)),
+        answers_removed_update(MISSING_ID),
+        select(exists().where(Question.id == MISSING_ID)),
+    ]
+
+
+def _raise_first(results: list) -> None:
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def warm_up_engine(engine: AsyncEngine, connections: int, statements: List[Executable]) -> WarmupStats:
+    """Одновременно открывает соединения пула и выполняет на каждом запросы"""
+    started = time.perf_counter()
+    stats = WarmupStats()
+    # Соединения сверх размера пула при возврате закрываются, прогревать их бесполезно
+    size = getattr(engine.pool, "size", None)
+    if size is not None:
+        connections = min(connections, size())
+
+    async def run(conn: AsyncConnection) -> None:
+        async with conn.begin() as transaction:
+            for statement in statements:
+                await conn.execute(statement)
+                stats.statements += 1
+            await transaction.rollback()
+        stats.connections += 1
+
+    async with AsyncExitStack() as stack:
+        # Все соединения держатся открытыми до конца прогрева, иначе пул выдал бы одно и то же.
+        # Ошибки собираются после завершения всех задач: stack закрывается, когда соединения не используются
+        opened = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections)), return_exceptions=True
+        )
+        _raise_first(opened)
+        _raise_first(await asyncio.gather(*(run(conn) for conn in opened), return_exceptions=True))
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+async def warm_up(primary: AsyncEngine, replicas: List[AsyncEngine], connections: int) -> None:
+    """Прогрев primary (чтения и записи) и реплик (чтения); ошибка прогрева не мешает запуску"""
+    reads = read_statements()
+    targets = [("primary", primary, reads + write_statements())]
+    targets += [(f"replica{index}", replica, reads) for index, replica in enumerate(replicas)]
+    for name, engine, statements in targets:
+        try:
+            stats = await warm_up_engine(engine, connections, statements)
+        except Exception as e:
+            logger.warning(f"Прогрев пула {name} не выполнен: {e}")
+            continue
+        logger.info(
+            f"Пул {name} прогрет: соединений {stats.connections}, запросов {stats.statements} "
+            f"за {stats.seconds * 1000:.0f} мс"
+        )
@@ -0,0 +1,398 @@
+"""Нагрузочный тест API: пропускная способность и хвостовые задержки по маршрутам.
+
+Приложение app.main:app нагружается либо в том же процессе через ASGI, либо по HTTP
+(например, запущенный локально uvicorn). Каждый сценарий - взвешенная смесь операций;
+по каждому маршруту считаются RPS и задержки p50/p95/p99. Отчет печатается в JSON
+и может сравниваться с сохраненным baseline, чтобы ловить деградации до релиза.
+
+Примеры:
+    python -m benchmarks.loadtest --sqlite --duration 5
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --scenario read-heavy --concurrency 64
+    python -m benchmarks.loadtest --sqlite --baseline benchmarks/baseline.json
+    python -m benchmarks.loadtest --sqlite --baseline benchmarks/baseline.json --update-baseline
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BULK_SIZE = 1000
+SQLITE_BUSY_TIMEOUT_MS = 30_000
+
+
+@dataclass
+class LoadState:
+    """Данные, созданные при подготовке и по ходу теста"""
+
+    question_ids: List[int] = field(default_factory=list)
+    large_question_id: int = 0
+
+
+class Recorder:
+    """Выполняет запросы и копит задержки и ошибки по маршрутам"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+
+    async def request(self, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latencies[route].append(time.perf_counter() - start)
+        if response is None or response.is_error:
+            self.errors[route] += 1
+            return None
+        return response
+
+
+Operation = Callable[[Recorder, LoadState], Awaitable[None]]
+
+
+def _answers(count: int) -> List[dict]:
+    return [{"user_id": f"user-{random.randrange(10_000)}", "text": f"Ответ {index}"} for index in range(count)]
+
+
+async def list_questions(recorder: Recorder, state: LoadState) -> None:
+    response = await recorder.request(
+        "GET /questions/", "GET", "/questions/", params={"limit": random.choice((20, 50, 100))}
+    )
+    # Часть клиентов листает дальше первой страницы
+    if response is not None and response.json()["next_cursor"] and random.random() < 0.3:
+        await recorder.request(
+            "GET /questions/", "GET", "/questions/", params={"cursor": response.json()["next_cursor"]}
+        )
+
+
+async def get_question(recorder: Recorder, state: LoadState) -> None:
+    question_id = random.choice(state.question_ids)
+    await recorder.request("GET /questions/{id}", "GET", f"/questions/{question_id}")
+
+
+async def get_large_question(recorder: Recorder, state: LoadState) -> None:
+    await recorder.request("GET /questions/{id} (large)", "GET", f"/questions/{state.large_question_id}")
+
+
+async def list_large_answers(recorder: Recorder, state: LoadState) -> None:
+    params = {"limit": 100}
+    for _ in range(3):
+        response = await recorder.request(
+            "GET /questions/{id}/answers/", "GET", f"/questions/{state.large_question_id}/answers/", params=params
+        )
+        if response is None or not response.json()["next_cursor"]:
+            break
+        params["cursor"] = response.json()["next_cursor"]
+
+
+async def create_question(recorder: Recorder, state: LoadState) -> None:
+    response = await recorder.request("POST /questions/", "POST", "/questions/", json={"text": "Новый вопрос"})
+    if response is not None:
+        state.question_ids.append(response.json()["id"])
+
+
+async def create_answer(recorder: Recorder, state: LoadState) -> None:
+    question_id = random.choice(state.question_ids)
+    await recorder.request(
+        "POST /questions/{id}/answers/", "POST", f"/questions/{question_id}/answers/", json=_answers(1)[0]
+    )
+
+
+async def create_answers_bulk(recorder: Recorder, state: LoadState) -> None:
+    question_id = random.choice(state.question_ids)
+    await recorder.request(
+        "POST /questions/{id}/answers/bulk", "POST", f"/questions/{question_id}/answers/bulk", json=_answers(100)
+    )
+
+
+async def cascade_delete(recorder: Recorder, state: LoadState) -> None:
+    response = await recorder.request("POST /questions/", "POST", "/questions/", json={"text": "Вопрос на удаление"})
+    if response is None:
+        return
+    question_id = response.json()["id"]
+    await recorder.request(
+        "POST /questions/{id}/answers/bulk", "POST", f"/questions/{question_id}/answers/bulk", json=_answers(200)
+    )
+    await recorder.request("DELETE /questions/{id}", "DELETE", f"/questions/{question_id}")
+
+
+SCENARIOS: Dict[str, List[Tuple[int, Operation]]] = {
+    "read-heavy": [(50, list_questions), (35, get_question), (5, list_large_answers), (10, create_answer)],
+    "write-burst": [(40, create_question), (40, create_answer), (20, create_answers_bulk)],
+    "large-question": [(50, get_large_question), (50, list_large_answers)],
+    "cascade-delete": [(1, cascade_delete)],
+}
+
+
+async def prepare(client: httpx.AsyncClient, questions: int, large_answers: int) -> LoadState:
+    """Заполняет БД через API: обычные вопросы и один вопрос с большим числом ответов"""
+    state = LoadState()
+    for offset in range(0, questions, BULK_SIZE):
+        batch = [{"text": f"Вопрос {index}"} for index in range(offset, min(offset + BULK_SIZE, questions))]
+        response = await client.post("/questions/bulk", json=batch)
+        response.raise_for_status()
+        state.question_ids.extend(item["id"] for item in response.json()["created"])
+
+    response = await client.post("/questions/", json={"text": "Вопрос с большим числом ответов"})
+    response.raise_for_status()
+    state.large_question_id = response.json()["id"]
+    for offset in range(0, large_answers, BULK_SIZE):
+        response = await client.post(
+            f"/questions/{state.large_question_id}/answers/bulk",
+            json=_answers(min(BULK_SIZE, large_answers - offset)),
+        )
+        response.raise_for_status()
+    return state
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Перцентиль по методу ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(percent / 100 * len(sorted_values) + 0.5 - 1e-9))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    routes = {}
+    for route, latencies in sorted(recorder.latencies.items()):
+        latencies = sorted(latencies)
+        routes[route] = {
+            "count": len(latencies),
+            "errors": recorder.errors[route],
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "max_ms": round(latencies[-1] * 1000, 3),
+        }
+    total = sum(route["count"] for route in routes.values())
+    return {
+        "duration_s": round(elapsed, 3),
+        "requests": total,
+        "errors": sum(recorder.errors.values()),
+        "rps": round(total / elapsed, 2),
+        "routes": routes,
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, state: LoadState, scenario: str, concurrency: int, duration: float
+) -> dict:
+    weights, operations = zip(*SCENARIOS[scenario])
+    recorder = Recorder(client)
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            operation = random.choices(operations, weights)[0]
+            await operation(recorder, state)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(recorder, time.perf_counter() - start)
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Деградации относительно baseline: p95 выросла или RPS упал больше чем на tolerance"""
+    if report["target"] != baseline.get("target"):
+        return []
+    regressions = []
+    for scenario, result in report["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(scenario)
+        if reference is None:
+            continue
+        for route, stats in result["routes"].items():
+            expected = reference["routes"].get(route)
+            if expected is None:
+                continue
+            if stats["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{scenario} {route}: p95 {stats['p95_ms']} мс, в baseline {expected['p95_ms']} мс"
+                )
+            if stats["rps"] < expected["rps"] * (1 - tolerance):
+                regressions.append(f"{scenario} {route}: {stats['rps']} RPS, в baseline {expected['rps']} RPS")
+            if stats["errors"] > expected["errors"]:
+                regressions.append(f"{scenario} {route}: ошибок {stats['errors']}, в baseline {expected['errors']}")
+    return regressions
+
+
+@asynccontextmanager
+async def in_process_client(database_url: Optional[str], app_logs: bool) -> AsyncIterator[httpx.AsyncClient]:
+    """Клиент к app.main:app в этом процессе; при database_url сессии идут в указанную БД"""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.database import Base, get_db, get_read_db, get_sessionmaker, get_write_db
+    from app.main import app
+    from app.utils.logger import logger
+    from app.utils.metrics import instrument_engine
+
+    if not app_logs:
+        # Вывод каждого запроса в консоль исказил бы замер
+        logger.remove()
+
+    engines = []
+    if database_url:
+        engine = create_async_engine(database_url)
+        write_engine = engine
+        if engine.dialect.name == "sqlite":
+            # SQLite допускает одного писателя. Транзакция, которая сначала читает, а потом пишет
+            # (INSERT ... SELECT WHERE EXISTS), получает "database is locked" без ожидания,
+            # если писатель уже есть. Поэтому записи начинаются с BEGIN IMMEDIATE и ждут
+            # блокировку до busy_timeout, а WAL не дает им блокировать чтения
+            write_engine = create_async_engine(database_url)
+            for sqlite_engine in (engine, write_engine):
+                _configure_sqlite(sqlite_engine, immediate=sqlite_engine is write_engine)
+            async with write_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+        engines = [engine] if write_engine is engine else [engine, write_engine]
+        for instrumented in engines:
+            instrument_engine(instrumented)
+
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        write_session_factory = async_sessionmaker(write_engine, expire_on_commit=False)
+
+        async def override_get_read_db():
+            async with session_factory() as session:
+                yield session
+
+        # Писатели SQLite ждут блокировку опросом с растущими паузами, и хвост задержек записи
+        # определяло бы везение. Очередь в процессе выдает запись по порядку
+        write_lock = asyncio.Lock() if write_engine is not engine else contextlib.nullcontext()
+
+        async def override_get_write_db():
+            async with write_lock, write_session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_read_db] = override_get_read_db
+        for dependency in (get_db, get_write_db):
+            app.dependency_overrides[dependency] = override_get_write_db
+        app.dependency_overrides[get_sessionmaker] = lambda: write_session_factory
+
+    # Исключение приложения становится ответом 500 и считается ошибкой маршрута, а не прерывает прогон
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    try:
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+                yield client
+    finally:
+        app.dependency_overrides.clear()
+        for engine in engines:
+            await engine.dispose()
+
+
+def _configure_sqlite(engine, immediate: bool) -> None:
+    from sqlalchemy import event
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def configure_connection(dbapi_connection, connection_record):
+        # Транзакции начинает SQLAlchemy (событие begin), а не драйвер
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+
+@asynccontextmanager
+async def http_client(url: str, concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        yield client
+
+
+async def run(args: argparse.Namespace) -> dict:
+    database_url = args.database_url
+    if args.sqlite:
+        database_url = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'loadtest.db')}"
+
+    if args.url:
+        target = "http"
+        client_context = http_client(args.url, args.concurrency)
+    else:
+        target = "asgi-sqlite" if args.sqlite else "asgi"
+        client_context = in_process_client(database_url, args.app_logs)
+
+    random.seed(args.seed)
+    report = {
+        "target": target,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "scenarios": {},
+    }
+    async with client_context as client:
+        state = await prepare(client, args.questions, args.large_answers)
+        for scenario in args.scenario:
+            report["scenarios"][scenario] = await run_scenario(
+                client, state, scenario, args.concurrency, args.duration
+            )
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="адрес запущенного сервиса; без него приложение запускается в процессе")
+    parser.add_argument("--database-url", help="БД для запуска в процессе (по умолчанию из настроек приложения)")
+    parser.add_argument("--sqlite", action="store_true", help="запуск в процессе на временной БД SQLite")
+    parser.add_argument("--scenario", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10, help="секунд на сценарий")
+    parser.add_argument("--questions", type=int, default=2000, help="вопросов при подготовке")
+    parser.add_argument("--large-answers", type=int, default=5000, help="ответов у большого вопроса")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="файл для JSON-отчета")
+    parser.add_argument("--baseline", help=f"baseline для сравнения, например {DEFAULT_BASELINE}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допустимое отклонение от baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="записать отчет как новый baseline")
+    parser.add_argument("--app-logs", action="store_true", help="не отключать логи приложения")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+
+    if not args.baseline:
+        return 0
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    if baseline.get("target") != report["target"]:
+        print(f"baseline снят для {baseline.get('target')}, сравнение пропущено", file=sys.stderr)
+        return 0
+    regressions = compare(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"Деградация: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Сравнение прежнего и нового пути чтения GET /questions/ и GET /questions/{id}.
+
+Прежний путь: загрузка ORM-сущностей, построение схем, model_dump и повторная
+валидация через response_model перед JSONResponse. Новый: кортежи колонок и
+сериализация заранее построенным TypeAdapter. Оба пути должны давать одинаковые байты.
+
+Запуск: python -m benchmarks.read_path [--questions 100] [--answers 100] [--repeat 200]
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base
+from app.models.models import Answer, Question
+from app.queries import answer_page_query, question_page_query, question_query
+from app.schemas.schemas import QuestionPage, QuestionWithAnswers
+from app.schemas.serializers import dump_question_page, dump_question_with_answers
+from app.utils.pagination import MAX_PAGE_SIZE, SortOrder, split_page
+
+
+async def seed(session_factory: async_sessionmaker[AsyncSession], questions: int, answers: int) -> None:
+    async with session_factory() as session:
+        await session.execute(insert(Question), [{"text": f"Вопрос {i}"} for i in range(questions)])
+        await session.execute(
+            insert(Answer),
+            [{"question_id": 1, "user_id": f"user-{i}", "text": f"Ответ {i}"} for i in range(answers)],
+        )
+        await session.commit()
+
+
+def render(schema, data) -> bytes:
+    # То же, что делает FastAPI: валидация по response_model и рендер JSONResponse
+    return JSONResponse(schema.model_validate(data).model_dump(mode="json")).body
+
+
+async def legacy_questions(session: AsyncSession, limit: int) -> bytes:
+    questions = (await session.scalars(select(Question).order_by(Question.created_at, Question.id).limit(limit + 1))).all()
+    rows, next_cursor = split_page(questions, limit)
+    page = QuestionPage(items=rows, next_cursor=next_cursor)
+    return render(QuestionPage, page.model_dump(mode="json"))
+
+
+async def lean_questions(session: AsyncSession, limit: int) -> bytes:
+    result = await session.execute(question_page_query(limit, None, SortOrder.asc))
+    rows, next_cursor = split_page(result.all(), limit)
+    return dump_question_page(rows, next_cursor).encode()
+
+
+async def legacy_question(session: AsyncSession, limit: int) -> bytes:
+    question = await session.get(Question, 1)
+    answers = (await session.scalars(
+        select(Answer).where(Answer.question_id == 1).order_by(Answer.created_at, Answer.id).limit(limit + 1)
+    )).all()
+    answers, next_cursor = split_page(answers, limit)
+    data = QuestionWithAnswers(
+        id=question.id, text=question.text, created_at=question.created_at,
+        answer_count=question.answer_count, last_answer_at=question.last_answer_at,
+        answers=answers, answers_next_cursor=next_cursor,
+    )
+    return render(QuestionWithAnswers, data.model_dump(mode="json"))
+
+
+async def lean_question(session: AsyncSession, limit: int) -> bytes:
+    question = (await session.execute(question_query(1))).one()
+    result = await session.execute(answer_page_query(1, limit, None, SortOrder.asc))
+    answers, next_cursor = split_page(result.all(), limit)
+    return dump_question_with_answers(question, answers, next_cursor).encode()
+
+
+async def measure(session_factory, func, limit: int, repeat: int) -> tuple[float, bytes]:
+    body = b""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        # Новая сессия на запрос, как в эндпоинте: identity map не переиспользуется
+        async with session_factory() as session:
+            body = await func(session, limit)
+    return (time.perf_counter() - start) / repeat, body
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=MAX_PAGE_SIZE)
+    parser.add_argument("--answers", type=int, default=MAX_PAGE_SIZE)
+    parser.add_argument("--limit", type=int, default=MAX_PAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_async_engine("sqlite+aiosqlite://")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(session_factory, args.questions, args.answers)
+
+    for name, legacy, lean in (
+        ("GET /questions/", legacy_questions, lean_questions),
+        ("GET /questions/{id}", legacy_question, lean_question),
+    ):
+        legacy_time, legacy_body = await measure(session_factory, legacy, args.limit, args.repeat)
+        lean_time, lean_body = await measure(session_factory, lean, args.limit, args.repeat)
+        assert legacy_body == lean_body, f"{name}: ответы различаются"
+        print(
+            f"{name:<22} прежний путь {legacy_time * 1000:7.3f} мс, "
+            f"новый {lean_time * 1000:7.3f} мс, ускорение x{legacy_time / lean_time:.2f}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,4 +5,4 @@ echo "Применение миграций.."
 alembic upgrade head
 
 echo "Запуск приложения.."
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+exec python -m app.server
\ No newline at end of file
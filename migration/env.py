@@ -1,5 +1,6 @@
 import asyncio
 import os
+import re
 
 from dotenv import load_dotenv
 from logging.config import fileConfig
@@ -32,6 +33,25 @@ target_metadata = Base.metadata
 
 config.set_main_option("sqlalchemy.url", get_db_url())
 
+# Объекты, которые создаются только миграциями и намеренно не описаны в моделях
+UNMAPPED_OBJECTS = {
+    ("column", "search_vector"),
+    ("index", "ix_questions_search_vector"),
+    ("index", "ix_answers_search_vector"),
+    ("index", "ix_answers_archive_search_vector"),
+}
+# Секции answers и answers_archive (app.commands.answer_partitions)
+PARTITION_TABLE = re.compile(r"^answers_(p\d{4}_\d{2}|default)$")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Не даем autogenerate удалять объекты из UNMAPPED_OBJECTS и секции таблиц"""
+    if not (reflected and compare_to is None):
+        return True
+    if type_ == "table" and PARTITION_TABLE.match(name):
+        return False
+    return (type_, name) not in UNMAPPED_OBJECTS
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -49,6 +69,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -58,7 +79,7 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,57 @@
+"""answer_count and last_answer_at on questions
+
+Revision ID: 1127e3663f35
+Revises: 5ff061a04db8
+Create Date: 2026-10-18 13:42:09.281734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1127e3663f35'
+down_revision: Union[str, Sequence[str], None] = '5ff061a04db8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Колонка со константным DEFAULT добавляется без перезаписи таблицы
+    op.add_column('questions', sa.Column('answer_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('questions', sa.Column('last_answer_at', sa.DateTime(timezone=True), nullable=True))
+    # Заполнение одним запросом по агрегату; для очень больших таблиц вместо него
+    # можно пачками запустить python -m app.commands.repair_question_stats
+    op.execute(
+        """
+        UPDATE questions
+        SET answer_count = stats.answer_count, last_answer_at = stats.last_answer_at
+        FROM (
+            SELECT question_id, count(*) AS answer_count, max(created_at) AS last_answer_at
+            FROM answers
+            GROUP BY question_id
+        ) AS stats
+        WHERE questions.id = stats.question_id
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_questions_last_answer_at_id', 'questions', ['last_answer_at', 'id'],
+            unique=False, postgresql_where=sa.text('last_answer_at IS NOT NULL'), postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_questions_unanswered_created_at_id', 'questions', ['created_at', 'id'],
+            unique=False, postgresql_where=sa.text('answer_count = 0'), postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in ('ix_questions_unanswered_created_at_id', 'ix_questions_last_answer_at_id'):
+            op.drop_index(name, table_name='questions', postgresql_concurrently=True)
+    op.drop_column('questions', 'last_answer_at')
+    op.drop_column('questions', 'answer_count')
@@ -0,0 +1,50 @@
+"""index answers by (user_id, created_at, id)
+
+Revision ID: 1ee7fbdaa340
+Revises: f1844ca6fd64
+Create Date: 2026-10-18 16:20:41.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1ee7fbdaa340'
+down_revision: Union[str, Sequence[str], None] = 'f1844ca6fd64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('answers', 'answers_archive')
+COLUMNS = 'user_id, created_at, id'
+
+
+def _partitions(table: str) -> list:
+    return op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:table AS regclass) ORDER BY c.relname"
+    ), {'table': table}).scalars().all()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не поддерживается для секционированной таблицы: индекс создается
+    # на родителе без секций (ON ONLY, невалидный), затем CONCURRENTLY на каждой секции
+    # и присоединяется к родителю; после присоединения всех секций он становится валидным
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            index = f'ix_{table}_user_id_created_at_id'
+            op.execute(f'CREATE INDEX IF NOT EXISTS {index} ON ONLY {table} ({COLUMNS})')
+            for partition in _partitions(table):
+                partition_index = f'{partition}_user_id_created_at_id_idx'
+                op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} ({COLUMNS})')
+                op.execute(f'ALTER INDEX {index} ATTACH PARTITION {partition_index}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Индексы секций удаляются вместе с индексом родителя
+    for table in reversed(TABLES):
+        op.drop_index(f'ix_{table}_user_id_created_at_id', table_name=table)
@@ -0,0 +1,38 @@
+"""answers (question_id, created_at, id) index
+
+Revision ID: 3cb525fe83ee
+Revises: 57bb93a2aee3
+Create Date: 2026-10-18 11:03:17.594802
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3cb525fe83ee'
+down_revision: Union[str, Sequence[str], None] = '57bb93a2aee3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Индекс обслуживает пагинацию ответов, подсчет ответов вопроса
+    # и каскадное удаление по внешнему ключу answers.question_id
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_answers_question_id_created_at_id', 'answers', ['question_id', 'created_at', 'id'],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_answers_question_id_created_at_id', table_name='answers',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,84 @@
+"""precomputed stats tables and BRIN index on answers.created_at
+
+Revision ID: 4c717b202cd4
+Revises: 1ee7fbdaa340
+Create Date: 2026-10-18 17:02:15.406829
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c717b202cd4'
+down_revision: Union[str, Sequence[str], None] = '1ee7fbdaa340'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('answers', 'answers_archive')
+
+
+def _partitions(table: str) -> list:
+    return op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:table AS regclass) ORDER BY c.relname"
+    ), {'table': table}).scalars().all()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'stats_answers_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('answers', sa.Integer(), nullable=False),
+        sa.Column('active_users', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day'),
+    )
+    op.create_table(
+        'stats_user_days',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('user_id', sa.String(length=36), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'user_id'),
+    )
+    op.create_table(
+        'stats_top_questions',
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('answer_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('question_id'),
+    )
+    op.create_table(
+        'stats_watermark',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('watermark', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Строка, которую блокирует обновление статистики. Watermark ставится на самый старый
+    # ответ (на пустой БД - на текущее время), и фоновая задача догоняет историю по отрезкам
+    op.execute(
+        'INSERT INTO stats_watermark (id, watermark) SELECT 1, coalesce(min(created_at), now()) '
+        'FROM (SELECT created_at FROM answers UNION ALL SELECT created_at FROM answers_archive) AS all_answers'
+    )
+
+    # Как и для (user_id, created_at, id): индекс на родителе ON ONLY, на секциях CONCURRENTLY
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            index = f'ix_{table}_created_at'
+            op.execute(f'CREATE INDEX IF NOT EXISTS {index} ON ONLY {table} USING brin (created_at)')
+            for partition in _partitions(table):
+                partition_index = f'{partition}_created_at_idx'
+                op.execute(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} USING brin (created_at)'
+                )
+                op.execute(f'ALTER INDEX {index} ATTACH PARTITION {partition_index}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(TABLES):
+        op.drop_index(f'ix_{table}_created_at', table_name=table)
+    for table in ('stats_watermark', 'stats_top_questions', 'stats_user_days', 'stats_answers_daily'):
+        op.drop_table(table)
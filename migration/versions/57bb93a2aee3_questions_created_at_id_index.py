@@ -0,0 +1,37 @@
+"""questions (created_at, id) index
+
+Revision ID: 57bb93a2aee3
+Revises: 67ab79cf9403
+Create Date: 2026-10-18 10:12:40.318221
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '57bb93a2aee3'
+down_revision: Union[str, Sequence[str], None] = '67ab79cf9403'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Индекс под keyset-пагинацию GET /questions/, строится без блокировки записи
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_questions_created_at_id', 'questions', ['created_at', 'id'],
+            unique=False, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_questions_created_at_id', table_name='questions',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,52 @@
+"""full-text search columns on questions and answers
+
+Revision ID: 5ff061a04db8
+Revises: 3cb525fe83ee
+Create Date: 2026-10-18 12:20:41.508113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5ff061a04db8'
+down_revision: Union[str, Sequence[str], None] = '3cb525fe83ee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('questions', 'answers')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Генерируемая колонка поддерживается самой БД при любой вставке и изменении.
+    # Добавление STORED-колонки переписывает таблицу, на больших таблицах - в окно обслуживания
+    for table in TABLES:
+        op.add_column(table, sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('russian', text)", persisted=True),
+            nullable=True,
+        ))
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(
+                f'ix_{table}_search_vector', table, ['search_vector'],
+                unique=False, postgresql_using='gin', postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.drop_index(
+                f'ix_{table}_search_vector', table_name=table,
+                postgresql_concurrently=True,
+            )
+    for table in TABLES:
+        op.drop_column(table, 'search_vector')
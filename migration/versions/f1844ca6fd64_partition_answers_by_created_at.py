@@ -0,0 +1,105 @@
+"""partition answers by created_at and add answers_archive
+
+Revision ID: f1844ca6fd64
+Revises: 1127e3663f35
+Create Date: 2026-10-18 15:05:52.730194
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1844ca6fd64'
+down_revision: Union[str, Sequence[str], None] = '1127e3663f35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Ключ секционирования должен входить в первичный ключ, поэтому он (id, created_at);
+# id по-прежнему выдает последовательность answers_id_seq
+COLUMNS = """
+    id integer NOT NULL DEFAULT nextval('answers_id_seq'),
+    question_id integer NOT NULL REFERENCES questions (id) ON DELETE CASCADE,
+    user_id varchar(36) NOT NULL,
+    text text NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    search_vector tsvector GENERATED ALWAYS AS (to_tsvector('russian', text)) STORED,
+    PRIMARY KEY (id, created_at)
+"""
+COPY_COLUMNS = 'id, question_id, user_id, text, created_at'
+MONTHS_AHEAD = 3
+
+
+def _month_start(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _create_partition(parent: str, month: datetime) -> None:
+    # Имена и границы совпадают с теми, что создает app.commands.answer_partitions
+    op.execute(
+        f"CREATE TABLE answers_p{month:%Y_%m} PARTITION OF {parent} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+    )
+
+
+def _create_indexes(table: str) -> None:
+    # На секционированной таблице индекс создается на каждой секции, в том числе на будущих
+    op.create_index(f'ix_{table}_id', table, ['id'])
+    op.create_index(f'ix_{table}_question_id_created_at_id', table, ['question_id', 'created_at', 'id'])
+    op.create_index(f'ix_{table}_search_vector', table, ['search_vector'], postgresql_using='gin')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Таблица переписывается целиком: на больших объемах миграцию нужно выполнять
+    # в окно обслуживания, пока сервис не пишет ответы
+    conn = op.get_bind()
+    oldest = conn.scalar(sa.text('SELECT min(created_at) FROM answers'))
+    current = _month_start(datetime.now(timezone.utc))
+    month = _month_start(oldest) if oldest is not None else current
+
+    op.execute(f'CREATE TABLE answers_partitioned ({COLUMNS}) PARTITION BY RANGE (created_at)')
+    while month <= _add_months(current, MONTHS_AHEAD):
+        _create_partition('answers_partitioned', month)
+        month = _add_months(month, 1)
+    # Страховка от ошибок вставки, если секции на будущее не были созданы вовремя
+    op.execute('CREATE TABLE answers_default PARTITION OF answers_partitioned DEFAULT')
+
+    op.execute(f'INSERT INTO answers_partitioned ({COPY_COLUMNS}) SELECT {COPY_COLUMNS} FROM answers')
+    op.execute('ALTER SEQUENCE answers_id_seq OWNED BY answers_partitioned.id')
+    op.drop_table('answers')
+    op.rename_table('answers_partitioned', 'answers')
+    op.execute('ALTER TABLE answers RENAME CONSTRAINT answers_partitioned_pkey TO answers_pkey')
+    op.execute(
+        'ALTER TABLE answers RENAME CONSTRAINT answers_partitioned_question_id_fkey TO answers_question_id_fkey'
+    )
+    _create_indexes('answers')
+
+    # Холодный уровень: сюда команда archive переносит старые секции answers целиком
+    op.execute(f'CREATE TABLE answers_archive ({COLUMNS}) PARTITION BY RANGE (created_at)')
+    _create_indexes('answers_archive')
+    op.execute('ANALYZE answers')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(f'CREATE TABLE answers_plain ({COLUMNS.replace("PRIMARY KEY (id, created_at)", "PRIMARY KEY (id)")})')
+    for table in ('answers', 'answers_archive'):
+        op.execute(f'INSERT INTO answers_plain ({COPY_COLUMNS}) SELECT {COPY_COLUMNS} FROM {table}')
+    op.execute('ALTER SEQUENCE answers_id_seq OWNED BY answers_plain.id')
+    # Секции удаляются вместе с родительскими таблицами
+    op.drop_table('answers_archive')
+    op.drop_table('answers')
+    op.rename_table('answers_plain', 'answers')
+    op.execute('ALTER TABLE answers RENAME CONSTRAINT answers_plain_pkey TO answers_pkey')
+    op.execute('ALTER TABLE answers RENAME CONSTRAINT answers_plain_question_id_fkey TO answers_question_id_fkey')
+    _create_indexes('answers')
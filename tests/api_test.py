@@ -1,5 +1,11 @@
+import json
+from contextlib import contextmanager
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event, insert
+
+from app.models.models import Answer
 
 
 @pytest.mark.asyncio
@@ -26,6 +32,40 @@ async def test_create_question(client: AsyncClient):
     assert "created_at" in data
 
 
+@pytest.mark.asyncio
+async def test_create_questions_bulk(client: AsyncClient):
+    """Тест пакетного создания вопросов с ошибками по отдельным элементам"""
+    response = await client.post(
+        "/questions/bulk",
+        json=[{"text": "Вопрос 1"}, {"text": "   "}, {"text": "Вопрос 2"}, {"foo": "bar"}]
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert [question["text"] for question in data["created"]] == ["Вопрос 1", "Вопрос 2"]
+    assert all("id" in question and "created_at" in question for question in data["created"])
+    assert [error["index"] for error in data["errors"]] == [1, 3]
+    assert data["errors"][1]["detail"][0]["loc"] == ["text"]
+
+    response = await client.get("/questions/")
+    assert [question["id"] for question in response.json()["items"]] == [
+        question["id"] for question in data["created"]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_create_questions_bulk_all_invalid(client: AsyncClient):
+    """Тест пакета без единого валидного элемента и превышения размера пакета"""
+    response = await client.post("/questions/bulk", json=[{"text": ""}])
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["index"] == 0
+
+    response = await client.post("/questions/bulk", json=[])
+    assert response.status_code == 422
+
+    response = await client.post("/questions/bulk", json=[{"text": "В"}] * 1001)
+    assert response.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_get_questions(client: AsyncClient):
     """Тест получения списка вопросов"""
@@ -37,8 +77,77 @@ async def test_get_questions(client: AsyncClient):
     response = await client.get("/questions/")
     assert response.status_code == 200
     data = response.json()
-    assert len(data) >= 2
-    assert all("id" in question for question in data)
+    assert len(data["items"]) >= 2
+    assert all("id" in question for question in data["items"])
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_questions_cursor_pagination(client: AsyncClient):
+    """Тест keyset-пагинации списка вопросов в обе стороны"""
+    created_ids = []
+    for i in range(5):
+        response = await client.post("/questions/", json={"text": f"Вопрос {i}"})
+        created_ids.append(response.json()["id"])
+
+    for order, expected in (("asc", created_ids), ("desc", created_ids[::-1])):
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2, "order": order}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get("/questions/", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page["items"]) <= 2
+            seen.extend(question["id"] for question in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == expected
+
+
+@pytest.mark.asyncio
+async def test_get_questions_invalid_params(client: AsyncClient):
+    """Тест валидации параметров пагинации"""
+    response = await client.get("/questions/", params={"cursor": "не-курсор"})
+    assert response.status_code == 400
+
+    response = await client.get("/questions/", params={"limit": 0})
+    assert response.status_code == 422
+
+    response = await client.get("/questions/", params={"limit": 1001})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_export_questions(client: AsyncClient, monkeypatch):
+    """Тест потоковой выгрузки вопросов с ответами в NDJSON"""
+    from app.api.endpoints import questions as questions_module
+    monkeypatch.setattr(questions_module, "EXPORT_BATCH_SIZE", 2)
+
+    question_ids = []
+    for i in range(5):
+        response = await client.post("/questions/", json={"text": f"Вопрос {i}"})
+        question_ids.append(response.json()["id"])
+    await client.post(
+        f"/questions/{question_ids[0]}/answers/",
+        json={"text": "Ответ", "user_id": "user1"}
+    )
+
+    response = await client.get("/questions/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == question_ids
+    assert all("answers" not in line for line in lines)
+
+    response = await client.get("/questions/export", params={"include_answers": True})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == question_ids
+    assert [answer["text"] for answer in lines[0]["answers"]] == ["Ответ"]
+    assert all(line["answers"] == [] for line in lines[1:])
 
 
 @pytest.mark.asyncio
@@ -66,6 +175,142 @@ async def test_get_question_by_id(client: AsyncClient):
     assert len(data["answers"]) == 1
 
 
+@pytest.mark.asyncio
+async def test_get_question_first_answers_page(client: AsyncClient, monkeypatch):
+    """Тест: вопрос возвращается с количеством ответов и только первой их страницей"""
+    from app.api.endpoints import questions as questions_module
+    monkeypatch.setattr(questions_module, "DEFAULT_PAGE_SIZE", 2)
+
+    question_response = await client.post("/questions/", json={"text": "Популярный вопрос"})
+    question_id = question_response.json()["id"]
+    answer_ids = []
+    for i in range(3):
+        response = await client.post(
+            f"/questions/{question_id}/answers/",
+            json={"text": f"Ответ {i}", "user_id": "user1"}
+        )
+        answer_ids.append(response.json()["id"])
+
+    response = await client.get(f"/questions/{question_id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["answer_count"] == 3
+    assert [answer["id"] for answer in data["answers"]] == answer_ids[:2]
+    assert data["answers_next_cursor"] is not None
+
+    response = await client.get(
+        f"/questions/{question_id}/answers/",
+        params={"cursor": data["answers_next_cursor"], "limit": 2}
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert [answer["id"] for answer in page["items"]] == answer_ids[2:]
+    assert page["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_question_answers_pagination(client: AsyncClient):
+    """Тест keyset-пагинации ответов на вопрос"""
+    question_response = await client.post("/questions/", json={"text": "Вопрос"})
+    question_id = question_response.json()["id"]
+    other_response = await client.post("/questions/", json={"text": "Другой вопрос"})
+    await client.post(
+        f"/questions/{other_response.json()['id']}/answers/",
+        json={"text": "Чужой ответ", "user_id": "user2"}
+    )
+
+    answer_ids = []
+    for i in range(5):
+        response = await client.post(
+            f"/questions/{question_id}/answers/",
+            json={"text": f"Ответ {i}", "user_id": "user1"}
+        )
+        answer_ids.append(response.json()["id"])
+
+    for order, expected in (("asc", answer_ids), ("desc", answer_ids[::-1])):
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2, "order": order}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get(f"/questions/{question_id}/answers/", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            seen.extend(answer["id"] for answer in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == expected
+
+
+@pytest.mark.asyncio
+async def test_get_question_answers_empty_and_missing(client: AsyncClient):
+    """Тест пустой страницы ответов и несуществующего вопроса"""
+    question_response = await client.post("/questions/", json={"text": "Вопрос без ответов"})
+    question_id = question_response.json()["id"]
+
+    response = await client.get(f"/questions/{question_id}/answers/")
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": None}
+
+    response = await client.get("/questions/999999/answers/")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_question_conditional(client: AsyncClient, cache):
+    """Тест ETag/Last-Modified и ответа 304 для вопроса"""
+    question_response = await client.post("/questions/", json={"text": "Вопрос"})
+    question_id = question_response.json()["id"]
+
+    response = await client.get(f"/questions/{question_id}")
+    etag = response.headers["etag"]
+    assert response.headers["last-modified"].endswith("GMT")
+
+    # Из кэша и из БД версия должна совпадать
+    for _ in range(2):
+        response = await client.get(f"/questions/{question_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        await cache.clear()
+
+    answer_response = await client.post(
+        f"/questions/{question_id}/answers/",
+        json={"text": "Ответ", "user_id": "user1"}
+    )
+    response = await client.get(f"/questions/{question_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    etag = response.headers["etag"]
+
+    await client.delete(f"/answers/{answer_response.json()['id']}")
+    response = await client.get(f"/questions/{question_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["answer_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_get_questions_conditional(client: AsyncClient, cache):
+    """Тест ETag и ответа 304 для страницы вопросов"""
+    await client.post("/questions/", json={"text": "Вопрос 1"})
+
+    response = await client.get("/questions/")
+    etag = response.headers["etag"]
+
+    response = await client.get("/questions/", headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert response.status_code == 304
+    await cache.clear()
+    response = await client.get("/questions/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    await client.post("/questions/", json={"text": "Вопрос 2"})
+    response = await client.get("/questions/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 2
+
+
 @pytest.mark.asyncio
 async def test_create_answer(client: AsyncClient):
     """Тест создания ответа на вопрос"""
@@ -89,6 +334,94 @@ async def test_create_answer(client: AsyncClient):
     assert "id" in data
 
 
+@pytest.mark.asyncio
+async def test_create_answers_bulk(client: AsyncClient):
+    """Тест пакетного создания ответов"""
+    question_response = await client.post("/questions/", json={"text": "Вопрос"})
+    question_id = question_response.json()["id"]
+
+    response = await client.post(
+        f"/questions/{question_id}/answers/bulk",
+        json=[
+            {"text": "Ответ 1", "user_id": "user1"},
+            {"text": "Ответ 2", "user_id": ""},
+            {"text": "Ответ 3", "user_id": "user3"},
+        ]
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert [answer["user_id"] for answer in data["created"]] == ["user1", "user3"]
+    assert all(answer["question_id"] == question_id for answer in data["created"])
+    assert [error["index"] for error in data["errors"]] == [1]
+
+    response = await client.get(f"/questions/{question_id}")
+    assert response.json()["answer_count"] == 2
+
+    response = await client.post(
+        "/questions/999999/answers/bulk",
+        json=[{"text": "Ответ", "user_id": "user1"}]
+    )
+    assert response.status_code == 404
+
+
+@contextmanager
+def question_deleted_before_insert(db_engine, question_id: int):
+    """Удаляет вопрос в транзакции вставки ответов прямо перед INSERT, как конкурентный запрос"""
+    def delete_question(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO answers"):
+            cursor.execute("DELETE FROM questions WHERE id = ?", (question_id,))
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", delete_question)
+    try:
+        yield
+    finally:
+        event.remove(db_engine.sync_engine, "before_cursor_execute", delete_question)
+
+
+@pytest.mark.asyncio
+async def test_create_answer_question_deleted_concurrently(client: AsyncClient, db_engine, monkeypatch):
+    """Тест создания ответа: внешний ключ отклоняет вставку для удаленного вопроса"""
+    from app.api.endpoints import answers as answers_module
+
+    question_id = (await client.post("/questions/", json={"text": "Вопрос"})).json()["id"]
+    # Без проверки EXISTS в самом INSERT, как если бы вопрос удалили между проверкой и вставкой
+    monkeypatch.setattr(
+        answers_module,
+        "answer_insert_query",
+        lambda question_id, user_id, text: insert(Answer)
+        .values(question_id=question_id, user_id=user_id, text=text)
+        .returning(Answer.id, Answer.created_at),
+    )
+
+    with question_deleted_before_insert(db_engine, question_id):
+        response = await client.post(
+            f"/questions/{question_id}/answers/", json={"text": "Ответ", "user_id": "user1"}
+        )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Вопрос не найден"
+
+    # Откат вернул вопрос, счетчики не изменились
+    question = (await client.get(f"/questions/{question_id}")).json()
+    assert (question["answer_count"], question["last_answer_at"], question["answers"]) == (0, None, [])
+
+
+@pytest.mark.asyncio
+async def test_create_answers_bulk_question_deleted_concurrently(client: AsyncClient, db_engine):
+    """Тест пакетного создания ответов: вопрос удален между проверкой и вставкой"""
+    question_id = (await client.post("/questions/", json={"text": "Вопрос"})).json()["id"]
+
+    with question_deleted_before_insert(db_engine, question_id):
+        response = await client.post(
+            f"/questions/{question_id}/answers/bulk",
+            json=[{"text": "Ответ", "user_id": "user1"}]
+        )
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Вопрос не найден"
+
+    question = (await client.get(f"/questions/{question_id}")).json()
+    assert (question["answer_count"], question["last_answer_at"], question["answers"]) == (0, None, [])
+
+
 @pytest.mark.asyncio
 async def test_get_answer_by_id(client: AsyncClient):
     """Тест получения конкретного ответа"""
@@ -306,7 +639,7 @@ async def test_complete_workflow(client: AsyncClient):
     # 2. Получаем список вопросов
     questions_response = await client.get("/questions/")
     assert questions_response.status_code == 200
-    questions = questions_response.json()
+    questions = questions_response.json()["items"]
     assert any(q["id"] == question_id for q in questions)
 
     # 3. Добавляем ответы
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.commands.answer_partitions import (
+    add_months, archive_answers, create_partitions, move_default_rows_ddl, partition_ddl, partition_month,
+    partition_name,
+)
+from app.commands.repair_question_stats import repair_question_stats
+from app.models.models import Answer, ArchivedAnswer
+
+
+def test_partition_naming():
+    """Тест имен и границ месячных секций"""
+    month = datetime(2025, 12, 1, tzinfo=timezone.utc)
+    assert add_months(month, 1) == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert add_months(month, -12) == datetime(2024, 12, 1, tzinfo=timezone.utc)
+    assert partition_name(month) == "answers_p2025_12"
+    assert partition_month("answers_p2025_12") == month
+    assert partition_month("answers_default") is None
+    assert partition_ddl(month) == (
+        "CREATE TABLE IF NOT EXISTS answers_p2025_12 PARTITION OF answers "
+        "FOR VALUES FROM ('2025-12-01T00:00:00+00:00') TO ('2026-01-01T00:00:00+00:00')"
+    )
+    # Строки месяца из answers_default переносятся в новую секцию до ее присоединения
+    create, move, attach = move_default_rows_ddl(month)
+    assert create.startswith("CREATE TABLE answers_p2025_12 (LIKE answers ")
+    # ATTACH PARTITION требует, чтобы search_vector в секции тоже была генерируемой
+    assert "INCLUDING GENERATED" in create
+    # Генерируемая колонка не переносится: ее значение вычисляет PostgreSQL
+    columns = "id, question_id, user_id, text, created_at"
+    assert f"RETURNING {columns})" in move
+    assert f"INSERT INTO answers_p2025_12 ({columns}) SELECT {columns} FROM moved" in move
+    assert "*" not in move and "search_vector" not in move
+    assert attach == (
+        "ALTER TABLE answers ATTACH PARTITION answers_p2025_12 "
+        "FOR VALUES FROM ('2025-12-01T00:00:00+00:00') TO ('2026-01-01T00:00:00+00:00')"
+    )
+
+
+@pytest.mark.asyncio
+async def test_archived_answers_stay_readable(client: AsyncClient, db_engine, db_session: AsyncSession):
+    """Тест архивации: ответы обоих уровней читаются, удаляются и учитываются в агрегатах"""
+    assert await create_partitions(db_engine) == []
+
+    question_id = (await client.post("/questions/", json={"text": "Вопрос"})).json()["id"]
+    answers = []
+    for index in range(4):
+        response = await client.post(
+            f"/questions/{question_id}/answers/", json={"user_id": "user-1", "text": f"Ответ {index}"}
+        )
+        answers.append(response.json())
+
+    # Два первых ответа становятся старше двух лет
+    old_ids = [answers[0]["id"], answers[1]["id"]]
+    old = datetime.now(timezone.utc) - timedelta(days=800)
+    for offset, answer_id in enumerate(old_ids):
+        await db_session.execute(
+            update(Answer).where(Answer.id == answer_id).values(created_at=old + timedelta(seconds=offset))
+        )
+    await db_session.commit()
+
+    stats = await archive_answers(db_engine, older_than_months=12, batch_size=1)
+    assert stats.rows == 2
+    assert await db_session.scalar(select(func.count(ArchivedAnswer.id))) == 2
+    assert await db_session.scalar(select(func.count(Answer.id))) == 2
+
+    response = await client.get(f"/answers/{old_ids[0]}")
+    assert response.status_code == 200
+    assert response.json()["text"] == "Ответ 0"
+
+    # Страницы ответов идут по (created_at, id) через оба уровня
+    page = (await client.get(f"/questions/{question_id}/answers/", params={"limit": 3})).json()
+    assert [item["id"] for item in page["items"]] == old_ids + [answers[2]["id"]]
+    page = (await client.get(
+        f"/questions/{question_id}/answers/", params={"limit": 3, "cursor": page["next_cursor"]}
+    )).json()
+    assert [item["id"] for item in page["items"]] == [answers[3]["id"]]
+
+    question = (await client.get(f"/questions/{question_id}")).json()
+    assert question["answer_count"] == 4
+    assert len(question["answers"]) == 4
+    assert (await repair_question_stats(db_engine)).fixed == 0
+
+    # Удаление архивного ответа и каскадное удаление вопроса
+    assert (await client.delete(f"/answers/{old_ids[1]}")).status_code == 204
+    assert (await client.get(f"/answers/{old_ids[1]}")).status_code == 404
+    assert (await client.get(f"/questions/{question_id}")).json()["answer_count"] == 3
+
+    await client.delete(f"/questions/{question_id}")
+    assert await db_session.scalar(select(func.count(ArchivedAnswer.id))) == 0
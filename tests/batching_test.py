@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.main import app
+from app.schemas.schemas import AnswerCreate
+from app.utils.batching import AnswerBatcher, get_answer_batcher
+
+
+@pytest.fixture
+async def batcher(client: AsyncClient, db_engine):
+    """Пакетная запись ответов на тестовой БД, подключенная к эндпоинту create_answer"""
+    batcher = AnswerBatcher(
+        async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False), max_size=20, max_delay=0.01
+    )
+    app.dependency_overrides[get_answer_batcher] = lambda: batcher
+    yield batcher
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_batched_answers_under_concurrency(client: AsyncClient, batcher: AnswerBatcher):
+    """Тест конкурентных запросов: каждый получает свой ответ или 404, записи идут пачками"""
+    first_id = (await client.post("/questions/", json={"text": "Первый"})).json()["id"]
+    second_id = (await client.post("/questions/", json={"text": "Второй"})).json()["id"]
+
+    requests = [(first_id if index % 3 else second_id, f"Ответ {index}") for index in range(60)]
+    responses = await asyncio.gather(*(
+        client.post(f"/questions/{question_id}/answers/", json={"user_id": "user-1", "text": text})
+        for question_id, text in requests
+    ), client.post("/questions/999/answers/", json={"user_id": "user-1", "text": "Мимо"}))
+
+    *created, missing = responses
+    assert missing.status_code == 404
+    assert all(response.status_code == 201 for response in created)
+    for (question_id, text), response in zip(requests, created):
+        assert (response.json()["question_id"], response.json()["text"]) == (question_id, text)
+    assert len({response.json()["id"] for response in created}) == 60
+    assert 3 <= batcher.batches < 20
+
+    # Ответы и агрегаты вопросов записаны
+    for question_id, expected in ((first_id, 40), (second_id, 20)):
+        question = (await client.get(f"/questions/{question_id}")).json()
+        assert question["answer_count"] == expected
+        answers = (await client.get(f"/questions/{question_id}/answers/", params={"limit": 100})).json()["items"]
+        assert len(answers) == expected
+        assert question["last_answer_at"] == max(answer["created_at"] for answer in answers)
+
+    response = await client.get(f"/answers/{created[0].json()['id']}")
+    assert response.json() == created[0].json()
+
+
+@pytest.mark.asyncio
+async def test_batch_limits(client: AsyncClient, db_engine):
+    """Тест границ пачки: полная пачка пишется сразу, остаток дописывается при остановке"""
+    question_id = (await client.post("/questions/", json={"text": "Вопрос"})).json()["id"]
+    batcher = AnswerBatcher(
+        async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False), max_size=5, max_delay=10
+    )
+    answer = AnswerCreate(user_id="user-1", text="Ответ")
+
+    started = time.perf_counter()
+    rows = await asyncio.gather(*(batcher.submit(question_id, answer) for _ in range(5)))
+    assert time.perf_counter() - started < 5
+    assert batcher.batches == 1
+    assert [row.id for row in rows] == sorted(row.id for row in rows)
+
+    pending = asyncio.create_task(batcher.submit(question_id, answer))
+    await asyncio.sleep(0.01)
+    assert not pending.done()
+    await batcher.close()
+    assert (await pending).id == rows[-1].id + 1
+
+    with pytest.raises(RuntimeError):
+        await batcher.submit(question_id, answer)
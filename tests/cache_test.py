@@ -0,0 +1,155 @@
+import pytest
+from fakeredis import FakeAsyncRedis
+from httpx import AsyncClient
+
+from app.cache import MemoryCache
+from app.cache.redis_backend import RedisCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "redis"])
+async def backend(request):
+    """Оба бэкенда кэша; Redis заменен локальным fakeredis"""
+    if request.param == "memory":
+        yield MemoryCache(max_entries=100, default_ttl=60)
+    else:
+        cache = RedisCache(FakeAsyncRedis(), default_ttl=60, prefix="test:")
+        yield cache
+        await cache.clear()
+        await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_cache_get_set_and_stats(backend):
+    """Тест чтения, записи и счетчиков попаданий/промахов"""
+    assert await backend.get("key") is None
+    await backend.set("key", {"id": 1, "text": "Вопрос"})
+    assert await backend.get("key") == {"id": 1, "text": "Вопрос"}
+
+    stats = await backend.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["backend"] == backend.name
+
+
+@pytest.mark.asyncio
+async def test_cache_delete_and_tags(backend):
+    """Тест удаления по ключу и инвалидации по тегу"""
+    await backend.set("question:1", {"id": 1}, tags=["question:1"])
+    await backend.set("answer:10", {"id": 10}, tags=["question:1"])
+    await backend.set("answer:20", {"id": 20}, tags=["question:2"])
+
+    await backend.delete("answer:20")
+    assert await backend.get("answer:20") is None
+
+    await backend.invalidate_tags("question:1")
+    assert await backend.get("question:1") is None
+    assert await backend.get("answer:10") is None
+
+
+@pytest.mark.asyncio
+async def test_cache_drops_writes_started_before_invalidation(backend):
+    """Тест гонки чтения с инвалидацией: данные, прочитанные до сброса, не попадают в кэш"""
+    fence = await backend.fence()
+    await backend.invalidate_tags("question:1")
+    await backend.set("question:1", {"id": 1, "stale": True}, tags=["question:1"], fence=fence)
+    assert await backend.get("question:1") is None
+
+    fence = await backend.fence()
+    await backend.delete("answer:10")
+    await backend.set("answer:10", {"id": 10, "stale": True}, fence=fence)
+    assert await backend.get("answer:10") is None
+
+    # Сброс других ключей и чтение, начатое после сброса, не мешают записи
+    fence = await backend.fence()
+    await backend.invalidate_tags("question:2")
+    await backend.set("question:1", {"id": 1}, tags=["question:1"], fence=fence)
+    assert await backend.get("question:1") == {"id": 1}
+
+    await backend.clear()
+    await backend.set("question:3", {"id": 3}, fence=fence)
+    assert await backend.get("question:3") is None
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_lru_eviction():
+    """Тест вытеснения давно не использованных записей"""
+    cache = MemoryCache(max_entries=2, default_ttl=60)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    assert await cache.get("a") == 1
+    await cache.set("c", 3)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == 1
+    assert await cache.get("c") == 3
+    stats = await cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_ttl():
+    """Тест истечения срока жизни записи"""
+    clock = FakeClock()
+    cache = MemoryCache(max_entries=10, default_ttl=5, clock=clock)
+    await cache.set("a", 1, tags=["t"])
+    await cache.set("b", 2, ttl=20)
+
+    clock.now = 6
+    assert await cache.get("a") is None
+    assert await cache.get("b") == 2
+    assert cache._tags == {}
+
+
+@pytest.mark.asyncio
+async def test_question_read_is_cached_and_invalidated(client: AsyncClient, cache: MemoryCache):
+    """Тест: чтение вопроса кэшируется, а изменения ответов сбрасывают кэш"""
+    question_response = await client.post("/questions/", json={"text": "Вопрос"})
+    question_id = question_response.json()["id"]
+
+    first = await client.get(f"/questions/{question_id}")
+    second = await client.get(f"/questions/{question_id}")
+    assert first.json() == second.json()
+    assert cache.stats.hits == 1
+
+    answer_response = await client.post(
+        f"/questions/{question_id}/answers/",
+        json={"text": "Ответ", "user_id": "user1"}
+    )
+    answer_id = answer_response.json()["id"]
+    response = await client.get(f"/questions/{question_id}")
+    assert response.json()["answer_count"] == 1
+
+    assert (await client.get(f"/answers/{answer_id}")).status_code == 200
+    await client.delete(f"/questions/{question_id}")
+    assert (await client.get(f"/answers/{answer_id}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_question_list_cache_invalidated_on_create(client: AsyncClient):
+    """Тест: создание вопроса сбрасывает закэшированные страницы списка"""
+    await client.post("/questions/", json={"text": "Вопрос 1"})
+    response = await client.get("/questions/")
+    assert len(response.json()["items"]) == 1
+
+    await client.post("/questions/", json={"text": "Вопрос 2"})
+    response = await client.get("/questions/")
+    assert len(response.json()["items"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_stats_endpoint(client: AsyncClient):
+    """Тест эндпоинта со статистикой кэша"""
+    response = await client.get("/health/cache")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["backend"] == "memory"
+    assert {"hits", "misses", "evictions", "size"} <= data.keys()
@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from app import main
+from app.utils import concurrency
+from app.utils.concurrency import AdaptiveLimiter, ConcurrencyLimitMiddleware
+
+
+def make_limiter(name: str = "read", **options) -> AdaptiveLimiter:
+    params = dict(
+        initial_limit=4, min_limit=1, max_limit=8, queue_size=2, queue_timeout=1.0, latency_target=0.1,
+        backoff=0.5, clock=lambda: 0.0,
+    )
+    params.update(options)
+    return AdaptiveLimiter(name, **params)
+
+
+@pytest.mark.asyncio
+async def test_aimd_limit():
+    """Тест AIMD: аддитивный рост на быстрых запросах, мультипликативное снижение на медленных"""
+    now = [0.0]
+    limiter = make_limiter(clock=lambda: now[0])
+
+    for _ in range(4):
+        assert await limiter.acquire()
+        limiter.release(latency=0.01, overloaded=False)
+    assert 4.9 < limiter.limit < 5
+
+    # Медленные ответы одной волны уменьшают лимит один раз
+    for _ in range(3):
+        assert await limiter.acquire()
+    for _ in range(3):
+        limiter.release(latency=0.5, overloaded=False)
+    assert 2.4 < limiter.limit < 2.5
+
+    now[0] = 1.0
+    assert await limiter.acquire()
+    limiter.release(latency=0.01, overloaded=True)
+    assert limiter.limit == pytest.approx(limiter.min_limit, abs=0.3)
+
+    for _ in range(10):
+        now[0] += 1
+        assert await limiter.acquire()
+        limiter.release(latency=1.0, overloaded=True)
+    assert limiter.limit == limiter.min_limit
+
+
+@pytest.mark.asyncio
+async def test_queue_and_shedding():
+    """Тест очереди ожидания: места передаются по порядку, лишние запросы отклоняются"""
+    limiter = make_limiter(initial_limit=1, queue_size=1, queue_timeout=0.05)
+    assert await limiter.acquire()
+
+    waiting = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    # Очередь заполнена
+    assert not await limiter.acquire()
+
+    # Медленный ответ не дает лимиту вырасти, место переходит к ожидающему
+    limiter.release(latency=0.5, overloaded=False)
+    assert limiter.limit == 1
+    assert await waiting
+    assert limiter.in_flight == 1
+
+    # Ожидание дольше queue_timeout
+    assert not await limiter.acquire()
+    assert limiter.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_middleware_sheds_with_retry_after():
+    """Тест middleware: при перегрузке записи получают 503 с Retry-After, чтения и служебные эндпоинты - нет"""
+    release = asyncio.Event()
+    app = FastAPI()
+
+    @app.post("/slow")
+    async def slow():
+        await release.wait()
+        return {"status": "ok"}
+
+    @app.get("/fast")
+    async def fast():
+        return {"status": "ok"}
+
+    @app.get("/live")
+    async def live():
+        return {"status": "alive"}
+
+    limiters = {"read": make_limiter("read"), "write": make_limiter("write", initial_limit=1, queue_size=1)}
+    app.add_middleware(ConcurrencyLimitMiddleware, limiters=limiters)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        running = [asyncio.create_task(client.post("/slow")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+
+        shed = await client.post("/slow")
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == "1"
+
+        assert (await client.get("/fast")).status_code == 200
+        assert (await client.get("/live")).status_code == 200
+
+        release.set()
+        assert [response.status_code for response in await asyncio.gather(*running)] == [200, 200]
+    assert limiters["write"].in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_races_with_grant():
+    """Тест гонки: место передано одновременно с истечением ожидания и не теряется"""
+    limiter = make_limiter(initial_limit=1, queue_size=1)
+    assert await limiter.acquire()
+
+    async def granted_then_timed_out(waiter, timeout):
+        limiter.release(latency=0.5, overloaded=False)
+        assert waiter.done()
+        raise asyncio.TimeoutError
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(concurrency.asyncio, "wait_for", granted_then_timed_out)
+        assert await limiter.acquire()
+    assert limiter.in_flight == 1
+
+    limiter.release(latency=0.5, overloaded=False)
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_streaming_does_not_change_limit():
+    """Тест потоковых ответов: длинная выгрузка не уменьшает лимит"""
+    app = FastAPI()
+
+    @app.get("/export")
+    async def export():
+        async def lines():
+            for index in range(3):
+                await asyncio.sleep(0.05)
+                yield f"{index}\n"
+        return StreamingResponse(lines())
+
+    limiters = {"read": make_limiter("read", latency_target=0.01), "write": make_limiter("write")}
+    app.add_middleware(ConcurrencyLimitMiddleware, limiters=limiters)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/export")).text == "0\n1\n2\n"
+    assert limiters["read"].limit == 4
+    assert limiters["read"].in_flight == 0
+
+
+def test_shed_responses_get_cors_headers():
+    """Тест порядка middleware: лимит внутри CORS, чтобы 503 получали CORS-заголовки"""
+    order = [middleware.cls for middleware in main.app.user_middleware]
+    assert order.index(CORSMiddleware) < order.index(ConcurrencyLimitMiddleware)
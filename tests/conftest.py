@@ -1,16 +1,28 @@
 import pytest
 from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from httpx import AsyncClient, ASGITransport
 from fastapi import FastAPI
 
+from app.cache import MemoryCache, get_cache
 from app.main import app as fastapi_app
-from app.database import get_db, Base
+from app.utils.metrics import instrument_engine
+from app.database import get_db, get_read_db, get_sessionmaker, get_write_db, Base
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 test_engine = create_async_engine(TEST_DATABASE_URL, echo=False)
 TestSessionLocal = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+instrument_engine(test_engine)
+
+
+@event.listens_for(test_engine.sync_engine, "connect")
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite проверяет внешние ключи и выполняет ON DELETE CASCADE только с этой настройкой"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
 
 
 @pytest.fixture(scope="function", autouse=True)
@@ -32,20 +44,41 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+@pytest.fixture(scope="function")
+def db_engine() -> AsyncEngine:
+    """Движок тестовой БД для кода, который работает с движком, а не с сессией"""
+    return test_engine
+
+
 async def override_get_db() -> AsyncGenerator[AsyncSession, None]:
     """Переопределение зависимости базы данных для тестов"""
     async with TestSessionLocal() as session:
         yield session
 
 
+def override_get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Переопределение фабрики сессий для тестов"""
+    return TestSessionLocal
+
+
+@pytest.fixture(scope="function")
+def cache() -> MemoryCache:
+    """Отдельный кэш на каждый тест: идентификаторы в пересоздаваемой БД повторяются"""
+    return MemoryCache(max_entries=1000, default_ttl=60)
+
+
 @pytest.fixture(scope="function")
-async def client() -> AsyncGenerator[AsyncClient, None]:
+async def client(cache: MemoryCache) -> AsyncGenerator[AsyncClient, None]:
     """HTTP клиент для тестирования API"""
     # Явно указываем тип для app
     app: FastAPI = fastapi_app
 
     # Переопределяем зависимость базы данных
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_write_db] = override_get_db
+    app.dependency_overrides[get_sessionmaker] = override_get_sessionmaker
+    app.dependency_overrides[get_cache] = lambda: cache
 
     # Используем ASGITransport для работы с FastAPI
     async with AsyncClient(
@@ -0,0 +1,159 @@
+import time
+
+import pytest
+from fastapi import Request, Response
+from httpx import AsyncClient
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import database
+from app.api.dependencies import get_request_cache
+from app.cache import MemoryCache
+from app.database import InstrumentedAsyncPool, ReplicaRouter, pool_stats
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_stats():
+    """Тест счетчиков выдачи соединений и таймаутов пула"""
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        poolclass=InstrumentedAsyncPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            stats = pool_stats(engine.pool)
+            assert stats["checked_out"] == 1
+            assert stats["size"] == 1
+
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+
+        stats = pool_stats(engine.pool)
+        assert stats["checked_out"] == 0
+        assert stats["checkouts"] == 2
+        assert stats["timeouts"] == 1
+        assert stats["wait_max_ms"] >= 50
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_endpoint(client: AsyncClient):
+    """Тест эндпоинта со статистикой пула соединений"""
+    response = await client.get("/health/pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["pool"] == "InstrumentedAsyncPool"
+    assert {"size", "checked_out", "overflow", "timeouts", "wait_avg_ms"} <= data.keys()
+    assert data["replicas"] == []
+
+
+def test_settings_reject_zero_pool_recycle(monkeypatch):
+    """Тест валидации настроек пула"""
+    from pydantic import ValidationError
+    from app.config import Settings
+
+    monkeypatch.setenv("DB_POOL_RECYCLE", "0")
+    with pytest.raises(ValidationError):
+        Settings()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_replica_router_round_robin_and_ejection():
+    """Тест round-robin по репликам и временного исключения недоступной"""
+    clock = FakeClock()
+    router = ReplicaRouter(["r0", "r1", "r2"], eject_seconds=10, clock=clock)
+    assert [router.choose() for _ in range(4)] == [0, 1, 2, 0]
+
+    router.eject(1)
+    assert [router.choose() for _ in range(4)] == [2, 0, 2, 0]
+
+    clock.now = 11
+    assert router.is_healthy(1)
+    assert sorted(router.choose() for _ in range(3)) == [0, 1, 2]
+
+    for index in range(3):
+        router.eject(index)
+    assert router.choose() is None
+
+
+def make_request(cookies: str = "") -> Request:
+    headers = [(b"cookie", cookies.encode())] if cookies else []
+    return Request({"type": "http", "headers": headers})
+
+
+async def read_session_role(request: Request) -> str:
+    dependency = database.get_read_db(request)
+    session = await anext(dependency)
+    await session.execute(text("SELECT 1"))
+    role = session.info.get("role", "primary")
+    await dependency.aclose()
+    return role
+
+
+@pytest.mark.asyncio
+async def test_read_routing_with_failover_and_read_your_writes(monkeypatch):
+    """Тест маршрутизации чтений: недоступная реплика исключается, после записи читаем из primary"""
+    broken_engine = create_async_engine("sqlite+aiosqlite:////nonexistent-dir/replica.db")
+    replica_engine = create_async_engine("sqlite+aiosqlite://")
+    router = ReplicaRouter(
+        [
+            async_sessionmaker(broken_engine, info={"role": "broken"}),
+            async_sessionmaker(replica_engine, info={"role": "replica"}),
+        ],
+        eject_seconds=60,
+    )
+    monkeypatch.setattr(database, "replica_router", router)
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(replica_engine))
+
+    try:
+        # Соединение берется при первом запросе: сессия без запросов не трогает реплику
+        dependency = database.get_read_db(make_request())
+        session = await anext(dependency)
+        assert session.info["role"] == "broken"
+        await dependency.aclose()
+        assert router.is_healthy(0)
+
+        # По кругу снова очередь недоступной реплики: запрос переключается на живую
+        assert await read_session_role(make_request()) == "replica"
+        assert await read_session_role(make_request()) == "replica"
+        assert not router.is_healthy(0)
+
+        response = Response()
+        dependency = database.get_write_db(response)
+        await anext(dependency)
+        await dependency.aclose()
+        cookie = response.headers["set-cookie"]
+        assert cookie.startswith(f"{database.LAST_WRITE_COOKIE}=")
+
+        value = cookie.split(";")[0]
+        assert await read_session_role(make_request(value)) == "primary"
+        # Клиент после записи читает мимо кэша, но заполняет общий кэш
+        cache = MemoryCache(max_entries=10, default_ttl=60)
+        await cache.set("question:1", {"id": 1})
+        request_cache = await get_request_cache(make_request(value), cache)
+        assert await request_cache.get("question:1") is None
+        await request_cache.set("question:2", {"id": 2})
+        assert await cache.get("question:2") == {"id": 2}
+        assert await get_request_cache(make_request(), cache) is cache
+        stale = f"{database.LAST_WRITE_COOKIE}={time.time() - 3600:.3f}"
+        assert await read_session_role(make_request(stale)) == "replica"
+
+        # Все реплики недоступны: чтения уходят в primary
+        router.eject(1)
+        assert await read_session_role(make_request()) == "primary"
+    finally:
+        await broken_engine.dispose()
+        await replica_engine.dispose()
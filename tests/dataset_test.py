@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.commands.generate_dataset import answer_distribution, generate_dataset
+from app.models.models import Answer, ArchivedAnswer, Question
+
+
+def test_answer_distribution():
+    """Тест распределения ответов: точная сумма и убывание по рангу"""
+    counts = list(answer_distribution(1000, 100_000, skew=1.0))
+    assert sum(counts) == 100_000
+    assert counts[0] > 10_000 > counts[-1]
+
+    uniform = list(answer_distribution(10, 100, skew=0))
+    assert uniform == [10] * 10
+
+
+@pytest.mark.asyncio
+async def test_generate_dataset(db_engine, db_session, client):
+    """Тест загрузки синтетических данных в SQLite"""
+    await client.post("/questions/", json={"text": "Существующий вопрос"})
+
+    stats = await generate_dataset(db_engine, questions=200, answers=3000, skew=1.2, batch_size=500)
+    assert (stats.questions, stats.answers) == (200, 3000)
+
+    assert await db_session.scalar(select(func.count(Question.id))) == 201
+    assert await db_session.scalar(select(func.count(Answer.id))) == 3000
+    top = await db_session.scalar(
+        select(func.count(Answer.id)).group_by(Answer.question_id).order_by(func.count(Answer.id).desc()).limit(1)
+    )
+    assert top == stats.max_answers_per_question > 3000 / 200
+
+    # Синтетические данные читаются через API как обычные
+    response = await client.get("/questions/?limit=100")
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 100
+
+
+@pytest.mark.asyncio
+async def test_generate_dataset_after_archive(db_engine, db_session, client):
+    """Тест загрузки после архивации: id новых ответов не пересекаются с архивными"""
+    question_id = (await client.post("/questions/", json={"text": "Вопрос"})).json()["id"]
+    db_session.add(ArchivedAnswer(id=50, question_id=question_id, user_id="user-1", text="Архивный ответ"))
+    await db_session.commit()
+
+    await generate_dataset(db_engine, questions=5, answers=20, batch_size=10)
+    assert await db_session.scalar(select(func.min(Answer.id))) == 51
+    assert (await client.get("/answers/50")).json()["text"] == "Архивный ответ"
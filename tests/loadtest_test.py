@@ -0,0 +1,55 @@
+import pytest
+from httpx import AsyncClient
+
+from benchmarks.loadtest import SCENARIOS, compare, in_process_client, percentile, prepare, run_scenario
+
+
+def test_percentile():
+    """Тест перцентилей по методу ближайшего ранга"""
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 99) == 7
+    assert percentile([], 50) == 0
+
+
+def test_compare_with_baseline():
+    """Тест обнаружения деградаций относительно baseline"""
+    route = {"count": 100, "errors": 0, "rps": 100.0, "p50_ms": 5.0, "p95_ms": 10.0, "p99_ms": 20.0}
+    baseline = {"target": "asgi-sqlite", "scenarios": {"read-heavy": {"routes": {"GET /questions/": route}}}}
+
+    report = {"target": "asgi-sqlite", "scenarios": {"read-heavy": {"routes": {"GET /questions/": dict(route, p95_ms=12.0)}}}}
+    assert compare(report, baseline, tolerance=0.25) == []
+
+    report["scenarios"]["read-heavy"]["routes"]["GET /questions/"] = dict(route, p95_ms=20.0, rps=50.0)
+    assert len(compare(report, baseline, tolerance=0.25)) == 2
+
+    # Отчеты для разных стендов не сравниваются
+    report["target"] = "http"
+    assert compare(report, baseline, tolerance=0.25) == []
+
+
+@pytest.mark.asyncio
+async def test_scenarios_run(client: AsyncClient):
+    """Тест прогона всех сценариев нагрузочного теста без ошибок"""
+    state = await prepare(client, questions=20, large_answers=150)
+    assert len(state.question_ids) == 20
+
+    for scenario in SCENARIOS:
+        result = await run_scenario(client, state, scenario, concurrency=1, duration=0.1)
+        assert result["requests"] > 0
+        assert result["errors"] == 0
+        for stats in result["routes"].values():
+            assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_on_sqlite_file(tmp_path):
+    """Тест прогона записей с конкуренцией на файловой SQLite: без "database is locked" и падения прогона"""
+    async with in_process_client(f"sqlite+aiosqlite:///{tmp_path / 'loadtest.db'}", app_logs=True) as client:
+        state = await prepare(client, questions=20, large_answers=10)
+        for scenario in ("write-burst", "cascade-delete"):
+            result = await run_scenario(client, state, scenario, concurrency=8, duration=0.5)
+            assert result["requests"] > 0
+            assert result["errors"] == 0
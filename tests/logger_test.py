@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from loguru import logger
+
+from app.utils.logger import LogFilter, Sampler, WarningRateLimiter, run_suppressed_reporter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def capture(log_filter) -> tuple[list, int]:
+    messages = []
+    sink_id = logger.add(lambda message: messages.append(message.record["message"]), filter=log_filter)
+    return messages, sink_id
+
+
+def warn_from_same_site(count: int) -> None:
+    for index in range(count):
+        logger.warning(f"Вопрос с id={index} не найден")
+
+
+def test_warning_rate_limit():
+    """Тест token bucket для повторяющихся предупреждений"""
+    clock = FakeClock()
+    limiter = WarningRateLimiter(rate=1.0, burst=3, clock=clock)
+    messages, sink_id = capture(limiter)
+    try:
+        warn_from_same_site(10)
+        assert len(messages) == 3
+
+        # Другое место вызова расходует собственный запас
+        logger.warning("Другое предупреждение")
+        logger.info("Информационное сообщение")
+        assert len(messages) == 5
+
+        clock.now = 2.0
+        warn_from_same_site(3)
+        assert len(messages) == 7
+        assert messages[5].endswith("(пропущено похожих сообщений: 7)")
+        assert "пропущено" not in messages[6]
+        assert list(limiter.pop_suppressed().values()) == [1]
+        assert limiter.pop_suppressed() == {}
+    finally:
+        logger.remove(sink_id)
+
+
+@pytest.mark.asyncio
+async def test_suppressed_warnings_reported_periodically():
+    """Тест сводки: о затихшем месте вызова сообщается без нового предупреждения с него"""
+    clock = FakeClock()
+    limiter = WarningRateLimiter(rate=1.0, burst=1, clock=clock)
+    messages, sink_id = capture(limiter)
+    reporter = asyncio.create_task(run_suppressed_reporter(0.01, limiter))
+    try:
+        warn_from_same_site(5)
+        for _ in range(100):
+            if len(messages) > 1:
+                break
+            await asyncio.sleep(0.01)
+        assert messages[1].startswith("Подавлено предупреждений в ")
+        assert messages[1].endswith(": 4")
+        assert limiter.pop_suppressed() == {}
+    finally:
+        reporter.cancel()
+        logger.remove(sink_id)
+
+
+def test_sampling():
+    """Тест сэмплирования частых INFO-событий"""
+    values = iter([0.05, 0.5, 0.09, 0.95])
+    sampler = Sampler(rate=0.1, rand=lambda: next(values))
+    messages, sink_id = capture(LogFilter(sampler, WarningRateLimiter(rate=1.0, burst=10)))
+    try:
+        for index in range(4):
+            logger.bind(sampled=True).info(f"Получено {index} вопросов")
+        logger.info("Без сэмплирования")
+        assert messages == ["Получено 0 вопросов", "Получено 2 вопросов", "Без сэмплирования"]
+    finally:
+        logger.remove(sink_id)
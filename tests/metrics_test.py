@@ -0,0 +1,65 @@
+import pytest
+from httpx import AsyncClient
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def scrape(client: AsyncClient) -> dict:
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    samples = {}
+    for family in text_string_to_metric_families(response.text):
+        for sample in family.samples:
+            samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return samples
+
+
+def sample(samples: dict, name: str, **labels) -> float:
+    return samples.get((name, tuple(sorted(labels.items()))), 0.0)
+
+
+@pytest.mark.asyncio
+async def test_metrics_http_and_db(client: AsyncClient):
+    """Тест метрик HTTP-запросов и SQL-запросов"""
+    before = await scrape(client)
+
+    question_response = await client.post("/questions/", json={"text": "Вопрос"})
+    question_id = question_response.json()["id"]
+    await client.get(f"/questions/{question_id}")
+    await client.get("/questions/999999")
+
+    after = await scrape(client)
+    route = "/questions/{question_id}"
+    for status in ("200", "404"):
+        name = "http_requests_total"
+        labels = {"method": "GET", "route": route, "status": status}
+        assert sample(after, name, **labels) - sample(before, name, **labels) == 1
+
+    name = "http_request_duration_seconds_count"
+    assert sample(after, name, method="GET", route=route) - sample(before, name, method="GET", route=route) == 2
+    assert sample(after, "http_requests_in_flight", method="GET") == 1  # сам запрос /metrics
+
+    name = "db_query_duration_seconds_count"
+    assert sample(after, name, operation="INSERT") > sample(before, name, operation="INSERT")
+    assert sample(after, name, operation="SELECT") > sample(before, name, operation="SELECT")
+
+
+@pytest.mark.asyncio
+async def test_metrics_pool_and_cache(client: AsyncClient):
+    """Тест метрик пула соединений и кэша"""
+    samples = await scrape(client)
+    assert sample(samples, "db_pool_size", pool="primary") == 10
+    assert ("db_pool_checkout_timeouts_total", (("pool", "primary"),)) in samples
+    assert any(name == "cache_hits_total" for name, _ in samples)
+
+
+@pytest.mark.asyncio
+async def test_metrics_failed_query(db_session: AsyncSession):
+    """Тест: ошибка БД не подменяется ошибкой инструментирования"""
+    with pytest.raises(OperationalError):
+        await db_session.execute(text("SELECT * FROM missing_table"))
+    await db_session.rollback()
+    assert await db_session.scalar(text("SELECT 1")) == 1
@@ -0,0 +1,77 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.models import Question
+from app.utils.logger import logger
+from app.utils.profiling import profile_queries, warn_repeated_queries
+
+
+@pytest.mark.asyncio
+async def test_query_budgets(client: AsyncClient):
+    """Тест количества SQL-запросов на эндпоинт"""
+    with profile_queries() as profile:
+        question_response = await client.post("/questions/", json={"text": "Вопрос"})
+    question_id = question_response.json()["id"]
+    assert profile.query_count == 1
+
+    with profile_queries() as profile:
+        await client.post(f"/questions/{question_id}/answers/", json={"user_id": "user-1", "text": "Ответ"})
+    # Вставка ответа и обновление счетчиков вопроса
+    assert profile.query_count == 2
+
+    with profile_queries() as profile:
+        await client.get("/questions/")
+    assert profile.query_count == 1
+
+    with profile_queries() as profile:
+        await client.get(f"/questions/{question_id}")
+    assert profile.query_count == 2
+
+    with profile_queries() as profile:
+        await client.delete(f"/questions/{question_id}")
+    assert profile.query_count == 1
+    assert profile.endpoint_time >= profile.db_time > 0
+    assert profile.handler_time >= profile.endpoint_time
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header(client: AsyncClient, monkeypatch: pytest.MonkeyPatch):
+    """Тест заголовка Server-Timing в режиме профилирования"""
+    response = await client.get("/questions/", headers={"X-Profile": "1"})
+    assert "server-timing" not in response.headers
+
+    monkeypatch.setattr(settings, "PROFILING_ALLOW_HEADER", True)
+    # Другая страница, чтобы ответ не пришел из кэша
+    response = await client.get("/questions/?limit=5", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert 'db;dur=' in timing and 'desc="1 queries"' in timing
+    for metric in ("orm;dur=", "framework;dur=", "total;dur="):
+        assert metric in timing
+
+    response = await client.get("/questions/")
+    assert "server-timing" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_repeated_queries_warning(db_session: AsyncSession):
+    """Тест обнаружения повторяющихся запросов (N+1)"""
+    with profile_queries(repeat_threshold=3) as profile:
+        for question_id in range(1, 4):
+            await db_session.execute(select(Question).where(Question.id == question_id))
+        await db_session.execute(select(Question))
+
+    assert profile.query_count == 4
+    assert list(profile.repeated_queries.values()) == [3]
+
+    messages = []
+    sink_id = logger.add(messages.append, level="WARNING")
+    try:
+        warn_repeated_queries(profile, "GET /test")
+    finally:
+        logger.remove(sink_id)
+    assert len(messages) == 1
+    assert "N+1" in messages[0]
@@ -0,0 +1,99 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.commands.repair_question_stats import repair_question_stats
+from app.models.models import Question
+
+
+async def create_question(client: AsyncClient, text: str) -> int:
+    response = await client.post("/questions/", json={"text": text})
+    return response.json()["id"]
+
+
+async def create_answer(client: AsyncClient, question_id: int, text: str = "Ответ") -> dict:
+    response = await client.post(f"/questions/{question_id}/answers/", json={"user_id": "user-1", "text": text})
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_answer_stats_follow_writes(client: AsyncClient):
+    """Тест согласованности answer_count и last_answer_at при записи ответов"""
+    question_id = await create_question(client, "Вопрос")
+    question = (await client.get(f"/questions/{question_id}")).json()
+    assert (question["answer_count"], question["last_answer_at"]) == (0, None)
+
+    first = await create_answer(client, question_id)
+    response = await client.post(
+        f"/questions/{question_id}/answers/bulk",
+        json=[{"user_id": "user-2", "text": "Пакет 1"}, {"user_id": "user-2", "text": "Пакет 2"}],
+    )
+    last = response.json()["created"][-1]
+
+    # Кэш вопроса и списка сбрасывается при записи ответов
+    question = (await client.get(f"/questions/{question_id}")).json()
+    assert question["answer_count"] == 3
+    assert question["last_answer_at"] == last["created_at"]
+    items = (await client.get("/questions/")).json()["items"]
+    assert items[0]["answer_count"] == 3
+
+    await client.delete(f"/answers/{last['id']}")
+    await client.delete(f"/answers/{response.json()['created'][0]['id']}")
+    question = (await client.get(f"/questions/{question_id}")).json()
+    assert question["answer_count"] == 1
+    assert question["last_answer_at"] == first["created_at"]
+
+    await client.delete(f"/answers/{first['id']}")
+    question = (await client.get(f"/questions/{question_id}")).json()
+    assert (question["answer_count"], question["last_answer_at"]) == (0, None)
+
+
+@pytest.mark.asyncio
+async def test_question_sort_orders(client: AsyncClient):
+    """Тест сортировок списка вопросов active и unanswered"""
+    old_id = await create_question(client, "Старый вопрос")
+    new_id = await create_question(client, "Новый вопрос")
+    empty_id = await create_question(client, "Вопрос без ответов")
+    await create_answer(client, new_id)
+    await create_answer(client, old_id)
+
+    response = await client.get("/questions/", params={"sort": "active", "order": "desc"})
+    assert [item["id"] for item in response.json()["items"]] == [old_id, new_id]
+
+    response = await client.get("/questions/", params={"sort": "unanswered"})
+    assert [item["id"] for item in response.json()["items"]] == [empty_id]
+
+    # Курсор активных вопросов идет по last_answer_at
+    page = (await client.get("/questions/", params={"sort": "active", "limit": 1})).json()
+    assert [item["id"] for item in page["items"]] == [new_id]
+    page = (await client.get(
+        "/questions/", params={"sort": "active", "limit": 1, "cursor": page["next_cursor"]}
+    )).json()
+    assert [item["id"] for item in page["items"]] == [old_id]
+    assert page["next_cursor"] is None
+
+    assert (await client.get("/questions/", params={"sort": "popular"})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_repair_question_stats(client: AsyncClient, db_engine, db_session: AsyncSession):
+    """Тест пересчета агрегатов после записи в обход API"""
+    question_id = await create_question(client, "Вопрос")
+    other_id = await create_question(client, "Другой вопрос")
+    answer = await create_answer(client, question_id)
+
+    await db_session.execute(update(Question).values(answer_count=7, last_answer_at=None))
+    await db_session.commit()
+
+    stats = await repair_question_stats(db_engine, batch_size=1)
+    assert stats.fixed == 2
+
+    question = (await client.get(f"/questions/{question_id}")).json()
+    assert question["answer_count"] == 1
+    assert question["last_answer_at"] == answer["created_at"]
+    other = (await client.get(f"/questions/{other_id}")).json()
+    assert (other["answer_count"], other["last_answer_at"]) == (0, None)
+
+    # Повторный запуск ничего не меняет
+    assert (await repair_question_stats(db_engine)).fixed == 0
@@ -0,0 +1,85 @@
+import pytest
+from httpx import AsyncClient
+
+
+async def create_question(client: AsyncClient, text: str) -> int:
+    response = await client.post("/questions/", json={"text": text})
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_search_questions(client: AsyncClient):
+    """Тест полнотекстового поиска по вопросам"""
+    pool_id = await create_question(client, "Как настроить пул соединений?")
+    await create_question(client, "Ошибка миграции базы")
+
+    response = await client.get("/questions/search", params={"q": "пул"})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["id"] for item in data["items"]] == [pool_id]
+    assert data["items"][0]["text"] == "Как настроить пул соединений?"
+    assert data["items"][0]["rank"] > 0
+    assert data["next_cursor"] is None
+
+    response = await client.get("/questions/search", params={"q": "реплика"})
+    assert response.json()["items"] == []
+
+    # Удаленный вопрос пропадает из индекса
+    await client.delete(f"/questions/{pool_id}")
+    response = await client.get("/questions/search", params={"q": "пул"})
+    assert response.json()["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_search_include_answers(client: AsyncClient):
+    """Тест поиска по тексту ответов"""
+    question_id = await create_question(client, "Почему падает сервер?")
+    direct_id = await create_question(client, "Что такое таймаут?")
+    await client.post(
+        f"/questions/{question_id}/answers/", json={"user_id": "user-1", "text": "Увеличьте таймаут запроса"}
+    )
+
+    response = await client.get("/questions/search", params={"q": "таймаут"})
+    assert [item["id"] for item in response.json()["items"]] == [direct_id]
+
+    response = await client.get("/questions/search", params={"q": "таймаут", "include_answers": True})
+    items = response.json()["items"]
+    # Совпадение в тексте вопроса ранжируется выше совпадения в ответе
+    assert [item["id"] for item in items] == [direct_id, question_id]
+    assert items[0]["rank"] > items[1]["rank"]
+
+
+@pytest.mark.asyncio
+async def test_search_pagination(client: AsyncClient):
+    """Тест keyset-пагинации результатов поиска"""
+    ids = {await create_question(client, f"Вопрос про индекс номер {index}") for index in range(5)}
+
+    seen, ranks, cursor = [], [], None
+    while True:
+        params = {"q": "индекс", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        data = (await client.get("/questions/search", params=params)).json()
+        assert len(data["items"]) <= 2
+        seen += [item["id"] for item in data["items"]]
+        ranks += [item["rank"] for item in data["items"]]
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(ids)
+    assert ranks == sorted(ranks, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_search_validation(client: AsyncClient):
+    """Тест валидации поискового запроса"""
+    await create_question(client, "Вопрос")
+    assert (await client.get("/questions/search")).status_code == 422
+    assert (await client.get("/questions/search", params={"q": ""})).status_code == 422
+    assert (await client.get("/questions/search", params={"q": "вопрос", "cursor": "x"})).status_code == 400
+
+    # Запрос без слов и с синтаксисом FTS5 не приводит к ошибке
+    for q in ("!!!", 'вопрос" OR', "NEAR(вопрос"):
+        response = await client.get("/questions/search", params={"q": q})
+        assert response.status_code == 200
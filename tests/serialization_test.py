@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.responses import JSONResponse
+from httpx import AsyncClient
+from pydantic import BaseModel
+
+from app.schemas.schemas import Answer, Question, QuestionPage, QuestionWithAnswers
+from app.schemas.serializers import (
+    AnswerBody, QuestionBody, QuestionPageBody, QuestionWithAnswersBody, dump_question_with_answers,
+)
+
+
+def legacy_body(schema: type[BaseModel], data) -> bytes:
+    """Тело ответа, которое FastAPI строит через response_model"""
+    return JSONResponse(schema.model_validate(data).model_dump(mode="json")).body
+
+
+@pytest.mark.parametrize(
+    "body, schema",
+    [
+        (AnswerBody, Answer),
+        (QuestionBody, Question),
+        (QuestionPageBody, QuestionPage),
+        (QuestionWithAnswersBody, QuestionWithAnswers),
+    ],
+)
+def test_serializer_fields_match_schema(body, schema):
+    """Тест порядка ключей: сериализаторы повторяют поля схем"""
+    assert list(body.__annotations__) == list(schema.model_fields)
+
+
+def test_serializer_matches_response_model():
+    """Тест побайтного совпадения с сериализацией через response_model"""
+    created_at = datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+    text = 'Ответ "в кавычках"\n\\  \x01 😀'
+
+    class Row(dict):
+        def _asdict(self):
+            return dict(self)
+
+    answers = [Row(text=text, user_id="user-1", id=1, question_id=7, created_at=created_at)]
+    question = Row(text="Вопрос", id=7, created_at=created_at, answer_count=1, last_answer_at=created_at)
+    body = dump_question_with_answers(question, answers, "cursor")
+
+    expected = legacy_body(
+        QuestionWithAnswers,
+        {**question, "answers": answers, "answers_next_cursor": "cursor"},
+    )
+    assert body.encode() == expected
+
+
+@pytest.mark.asyncio
+async def test_read_endpoints_match_response_model(client: AsyncClient):
+    """Тест эндпоинтов чтения: тело и заголовки совпадают с прежней сериализацией"""
+    question_response = await client.post("/questions/", json={"text": "Вопрос с \"кавычками\""})
+    question_id = question_response.json()["id"]
+    answer_response = await client.post(
+        f"/questions/{question_id}/answers/", json={"user_id": "user-1", "text": "Ответ 😀"}
+    )
+    answer_id = answer_response.json()["id"]
+
+    for url, schema in (
+        ("/questions/", QuestionPage),
+        (f"/questions/{question_id}", QuestionWithAnswers),
+        (f"/answers/{answer_id}", Answer),
+    ):
+        # Второй запрос отдается из кэша
+        for _ in range(2):
+            response = await client.get(url)
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/json"
+            assert response.content == legacy_body(schema, response.json())
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app import database
+from app.config import settings
+from app.main import app, lifespan
+from app.server import prepare_workers, uvicorn_options
+
+
+def test_uvicorn_options(monkeypatch: pytest.MonkeyPatch):
+    """Тест параметров запуска: число воркеров и быстрые реализации цикла и HTTP-парсера"""
+    monkeypatch.setattr(settings, "WEB_WORKERS", 3)
+    options = uvicorn_options()
+    assert options["workers"] == 3
+    assert options["loop"] == "uvloop"
+    assert options["http"] == "httptools"
+    assert options["timeout_graceful_shutdown"] == settings.WEB_GRACEFUL_TIMEOUT
+
+    monkeypatch.setattr(settings, "WEB_WORKERS", 0)
+    assert uvicorn_options()["workers"] == (os.cpu_count() or 1)
+
+
+def test_supervisor_does_not_create_engines():
+    """Тест процесса-супервизора: модуль запуска не импортирует приложение и БД"""
+    code = "import sys, app.server; print('app.database' in sys.modules, 'app.main' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["False", "False"]
+
+
+@pytest.mark.asyncio
+async def test_lifespan_disposes_engine():
+    """Тест завершения lifespan: пул соединений процесса закрывается"""
+    pool = database.engine.pool
+    async with lifespan(app):
+        assert database.engine.pool is pool
+    assert database.engine.pool is not pool
+
+
+def test_pools_reset_after_fork():
+    """Тест обработчика fork: дочерний процесс получает новые пулы, не трогая соединения родителя"""
+    pool = database.engine.pool
+    database._reset_pools_after_fork()
+    assert database.engine.pool is not pool
+
+
+def test_prepare_workers(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    """Тест запуска нескольких воркеров: кэш в памяти запрещен, метрики пишутся в общий каталог"""
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "memory")
+    prepare_workers(1)
+    with pytest.raises(SystemExit, match="CACHE_BACKEND=memory"):
+        prepare_workers(2)
+
+    metrics_dir = tmp_path / "metrics"
+    metrics_dir.mkdir()
+    (metrics_dir / "counter_1.db").write_bytes(b"")
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "redis")
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", str(metrics_dir))
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", "")
+    prepare_workers(2)
+    assert os.environ["PROMETHEUS_MULTIPROC_DIR"] == str(metrics_dir)
+    assert list(metrics_dir.iterdir()) == []
+
+
+def test_metrics_summed_across_workers(tmp_path):
+    """Тест multiprocess-метрик: /metrics суммирует счетчики всех воркеров"""
+    code = (
+        "from app.utils.metrics import HTTP_REQUESTS, render_metrics;"
+        "HTTP_REQUESTS.labels('GET', '/questions/', '200').inc();"
+        "print(render_metrics().decode())"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    for _ in range(2):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+    assert 'http_requests_total{method="GET",route="/questions/",status="200"} 2.0' in result.stdout
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Answer
+from app.utils.rollups import refresh_stats
+
+
+async def _answer(client: AsyncClient, question_id: int, user_id: str) -> dict:
+    response = await client.post(f"/questions/{question_id}/answers/", json={"user_id": user_id, "text": "Ответ"})
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_stats_incremental_refresh(client: AsyncClient, db_engine, db_session: AsyncSession):
+    """Тест инкрементального обновления: учитываются только ответы после водяного знака"""
+    assert (await client.get("/stats")).json() == {
+        "days": [], "top_questions": [], "fresh_until": None, "refreshed_at": None, "lag_seconds": None,
+    }
+
+    first = (await client.post("/questions/", json={"text": "Первый"})).json()["id"]
+    second = (await client.post("/questions/", json={"text": "Второй"})).json()["id"]
+    yesterday = await _answer(client, first, "user-1")
+    for user_id in ("user-1", "user-1", "user-2"):
+        await _answer(client, second, user_id)
+    await db_session.execute(
+        update(Answer).where(Answer.id == yesterday["id"])
+        .values(created_at=datetime.now(timezone.utc) - timedelta(days=1))
+    )
+    await db_session.commit()
+
+    now = datetime.now(timezone.utc)
+    stats = await refresh_stats(db_engine, lag_seconds=0, now=now)
+    assert (stats.answers, stats.days) == (4, 2)
+
+    body = (await client.get("/stats", params={"days": 2, "top": 1})).json()
+    assert [(day["answers"], day["active_users"]) for day in body["days"]] == [(1, 1), (3, 2)]
+    assert body["top_questions"] == [{"id": second, "text": "Второй", "answer_count": 3}]
+    assert datetime.fromisoformat(body["fresh_until"]) == now
+    assert body["lag_seconds"] >= 0
+
+    # Второе обновление читает только новые ответы и не дублирует пользователей дня
+    await asyncio.sleep(0.01)
+    for user_id in ("user-2", "user-3", "user-3"):
+        await _answer(client, first, user_id)
+    stats = await refresh_stats(db_engine, lag_seconds=0)
+    assert (stats.answers, stats.days) == (3, 1)
+
+    body = (await client.get("/stats", params={"days": 3})).json()
+    assert [(day["answers"], day["active_users"]) for day in body["days"]] == [(0, 0), (1, 1), (6, 3)]
+    assert [question["id"] for question in body["top_questions"]] == [first, second]
+
+    # Удаления учитывает полный пересчет
+    await client.delete(f"/answers/{yesterday['id']}")
+    await client.delete(f"/questions/{second}")
+    assert (await refresh_stats(db_engine, lag_seconds=0, rebuild=True)).answers == 3
+    body = (await client.get("/stats", params={"days": 2})).json()
+    assert [(day["answers"], day["active_users"]) for day in body["days"]] == [(0, 0), (3, 2)]
+    assert body["top_questions"] == [{"id": first, "text": "Первый", "answer_count": 3}]
+
+
+@pytest.mark.asyncio
+async def test_stats_refresh_lag(client: AsyncClient, db_engine):
+    """Тест задержки: недавние ответы ждут следующего обновления"""
+    question_id = (await client.post("/questions/", json={"text": "Вопрос"})).json()["id"]
+    await _answer(client, question_id, "user-1")
+
+    assert (await refresh_stats(db_engine, lag_seconds=60)).answers == 0
+    later = datetime.now(timezone.utc) + timedelta(minutes=2)
+    assert (await refresh_stats(db_engine, lag_seconds=60, now=later)).answers == 1
+    assert (await refresh_stats(db_engine, lag_seconds=60, now=later)).answers == 0
+
+
+@pytest.mark.asyncio
+async def test_stats_refresh_in_chunks(client: AsyncClient, db_engine, db_session: AsyncSession):
+    """Тест первого расчета отрезками: история учитывается по суткам, пока не догонит now - lag"""
+    question_id = (await client.post("/questions/", json={"text": "Вопрос"})).json()["id"]
+    old = await _answer(client, question_id, "user-1")
+    await _answer(client, question_id, "user-2")
+    now = datetime.now(timezone.utc) + timedelta(seconds=1)
+    await db_session.execute(
+        update(Answer).where(Answer.id == old["id"]).values(created_at=now - timedelta(days=2, hours=12))
+    )
+    await db_session.commit()
+
+    chunks = []
+    while not chunks or not chunks[-1].complete:
+        chunks.append(await refresh_stats(db_engine, lag_seconds=0, now=now, max_window=timedelta(days=1)))
+    assert [chunk.answers for chunk in chunks] == [1, 0, 1]
+    assert chunks[-1].watermark == now
+
+    body = (await client.get("/stats", params={"days": 4})).json()
+    assert [day["answers"] for day in body["days"]][-1] == 1
+    assert sum(day["answers"] for day in body["days"]) == 2
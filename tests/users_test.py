@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.commands.answer_partitions import archive_answers
+from app.models.models import Answer
+from app.utils.profiling import profile_queries
+
+
+async def _create_answers(client: AsyncClient, user_id: str, count: int) -> list:
+    question_id = (await client.post("/questions/", json={"text": "Вопрос"})).json()["id"]
+    answers = []
+    for index in range(count):
+        response = await client.post(
+            f"/questions/{question_id}/answers/", json={"user_id": user_id, "text": f"Ответ {index}"}
+        )
+        answers.append(response.json())
+    return answers
+
+
+@pytest.mark.asyncio
+async def test_user_answers_pagination(client: AsyncClient):
+    """Тест истории ответов пользователя: от новых к старым, курсор, чужие ответы не попадают"""
+    answers = await _create_answers(client, "user-1", 5)
+    await _create_answers(client, "user-2", 2)
+
+    with profile_queries() as profile:
+        page = (await client.get("/users/user-1/answers", params={"limit": 3})).json()
+    assert profile.query_count == 1
+    ids = [item["id"] for item in reversed(answers)]
+    assert [item["id"] for item in page["items"]] == ids[:3]
+    assert all(item["user_id"] == "user-1" for item in page["items"])
+
+    page = (await client.get(
+        "/users/user-1/answers", params={"limit": 3, "cursor": page["next_cursor"]}
+    )).json()
+    assert [item["id"] for item in page["items"]] == ids[3:]
+    assert page["next_cursor"] is None
+
+    page = (await client.get("/users/user-1/answers", params={"order": "asc"})).json()
+    assert [item["id"] for item in page["items"]] == ids[::-1]
+
+    # Пользователи не хранятся отдельно: неизвестный пользователь - пустая страница
+    page = (await client.get("/users/unknown/answers")).json()
+    assert page == {"items": [], "next_cursor": None}
+
+
+@pytest.mark.asyncio
+async def test_user_answers_period(client: AsyncClient, db_engine, db_session: AsyncSession):
+    """Тест фильтра по периоду [since, until), в том числе по архивным ответам"""
+    answers = await _create_answers(client, "user-1", 3)
+    now = datetime.now(timezone.utc)
+    old = now - timedelta(days=800)
+    await db_session.execute(update(Answer).where(Answer.id == answers[0]["id"]).values(created_at=old))
+    await db_session.commit()
+    assert (await archive_answers(db_engine, older_than_months=12)).rows == 1
+
+    params = {"until": (now - timedelta(days=1)).isoformat()}
+    page = (await client.get("/users/user-1/answers", params=params)).json()
+    assert [item["id"] for item in page["items"]] == [answers[0]["id"]]
+
+    params = {"since": (old + timedelta(seconds=1)).isoformat()}
+    page = (await client.get("/users/user-1/answers", params=params)).json()
+    assert [item["id"] for item in page["items"]] == [answers[2]["id"], answers[1]["id"]]
+
+    params = {"since": now.isoformat(), "until": old.isoformat()}
+    response = await client.get("/users/user-1/answers", params=params)
+    assert response.status_code == 422
+    assert response.json()["detail"] == "since должен быть раньше until"
+
+    # Границы с часовым поясом и без него: время без пояса считается UTC
+    params = {"since": old.replace(tzinfo=None).isoformat(), "until": (now - timedelta(days=1)).isoformat()}
+    page = (await client.get("/users/user-1/answers", params=params)).json()
+    assert [item["id"] for item in page["items"]] == [answers[0]["id"]]
+
+    params = {"since": now.replace(tzinfo=None).isoformat(), "until": old.isoformat()}
+    assert (await client.get("/users/user-1/answers", params=params)).status_code == 422
+
+    response = await client.get("/users/" + "u" * 37 + "/answers")
+    assert response.status_code == 422
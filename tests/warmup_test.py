@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import main
+from app.database import Base, InstrumentedAsyncPool, pool_stats
+from app.models.models import Answer, Question
+from app.utils.warmup import read_statements, warm_up_engine, write_statements
+
+
+@pytest.fixture
+async def file_engine(tmp_path):
+    """Движок с настоящим пулом: у SQLite в памяти пул из одного соединения"""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'warmup.db'}", poolclass=InstrumentedAsyncPool, pool_size=3, max_overflow=2
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_engine(file_engine):
+    """Тест прогрева: соединения открыты и возвращены в пул, данные не изменились"""
+    async with file_engine.begin() as conn:
+        await conn.execute(insert(Question).values(text="Вопрос"))
+
+    statements = read_statements() + write_statements()
+    stats = await warm_up_engine(file_engine, connections=5, statements=statements)
+
+    # Соединения сверх размера пула не прогреваются
+    assert stats.connections == 3
+    assert stats.statements == 3 * len(statements)
+    assert pool_stats(file_engine.pool)["checked_in"] == 3
+
+    async with file_engine.connect() as conn:
+        assert await conn.scalar(select(func.count(Answer.id))) == 0
+        question = (await conn.execute(select(Question.answer_count, Question.last_answer_at))).one()
+        assert tuple(question) == (0, None)
+
+
+@pytest.mark.asyncio
+async def test_ready_waits_for_warm_up(client: AsyncClient, db_engine, monkeypatch: pytest.MonkeyPatch):
+    """Тест /ready: 503 до окончания прогрева, /live отвечает сразу"""
+    monkeypatch.setattr(main.app.state, "ready", False)
+    assert (await client.get("/live")).status_code == 200
+    response = await client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Сервис прогревается"
+
+    monkeypatch.setattr(main.settings, "DB_WARMUP_CONNECTIONS", 1)
+    monkeypatch.setattr(main, "engine", db_engine)
+    monkeypatch.setattr(main, "replica_engines", [])
+    async with main.lifespan(main.app):
+        # Прогрев запущен в фоне и еще не завершен
+        assert main.app.state.ready is False
+        for _ in range(100):
+            if main.app.state.ready:
+                break
+            await asyncio.sleep(0.01)
+        assert (await client.get("/ready")).status_code == 200